@@ -3,10 +3,12 @@ import pandas as pd
 from pathlib import Path
 import json
 import os
-from utils.storage import initialize_storage, load_projects
+from utils.storage import initialize_storage
+from utils.dashboard import STAGES, get_dashboard
 from utils.research_tools import create_problem_statement
 import sys
 from components.bottom_menu import show_bottom_menu
+from utils.instrumentation import profile_rerun
 
 # Configure logging
 import logging
@@ -67,33 +69,27 @@ def main():
             st.header("Research Dashboard")
 
             # Project selection
-            projects = load_projects()
-            if projects.empty:
+            dashboard = get_dashboard()
+            if not dashboard['projects']:
                 st.info("No projects yet. Create your first project in the Projects tab!")
             else:
                 selected_project = st.selectbox(
                     "Select Active Project",
-                    options=projects['title'].tolist(),
+                    options=list(dashboard['projects']),
+                    format_func=lambda project_id: dashboard['projects'][project_id]['title'],
                     help="Choose a project to view its details"
                 )
 
                 # Show project progress only if a project is selected
                 if selected_project:
-                    try:
-                        project_data = projects[projects['title'] == selected_project]
-                        if not project_data.empty:
-                            project_info = project_data.iloc[0]
-                            st.subheader("Project Progress")
-                            stages = ['Problem Formulation', 'Literature Review', 'Research Design', 
-                                    'Data Collection', 'Analysis', 'Reporting']
-                            for stage in stages:
-                                progress = float(project_info.get(f'{stage.lower()}_progress', 0))
-                                st.progress(progress, text=stage)
-                        else:
-                            st.warning("Selected project not found.")
-                    except Exception as e:
-                        logger.error(f"Error displaying project progress: {str(e)}")
-                        st.error("Error loading project progress.")
+                    project_info = dashboard['projects'].get(selected_project)
+                    if project_info is not None:
+                        st.subheader("Project Progress")
+                        for stage, column in STAGES:
+                            st.progress(project_info['progress'][column], text=stage)
+                        st.metric("Citations", project_info['citations'])
+                    else:
+                        st.warning("Selected project not found.")
 
         with col2:
             logger.info("Rendering quick actions...")
@@ -109,7 +105,11 @@ def main():
 
             # Recent Activities
             st.subheader("Recent Activities")
-            st.info("No recent activities")
+            if dashboard['activity']:
+                for activity in dashboard['activity'][:10]:
+                    st.caption(f"{activity['time'].replace('T', ' ')} · {activity['text']}")
+            else:
+                st.info("No recent activities")
 
         # Show bottom menu
         show_bottom_menu()
@@ -123,4 +123,9 @@ def main():
             st.rerun()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profile_rerun(
+        "home",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
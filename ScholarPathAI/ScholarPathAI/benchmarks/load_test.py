@@ -0,0 +1,237 @@
+"""Headless load test replaying user flows across concurrent sessions.
+
+Run from the app directory:
+
+    python benchmarks/load_test.py --sessions 20 --iterations 3
+
+Each simulated session logs in, creates a project, adds citations, loads a
+dataset, runs the analysis page and generates a report, driving the real
+page scripts through Streamlit's ``AppTest``. Sessions run concurrently in
+threads inside one process, like sessions sharing one Streamlit server, and
+write to a throwaway data directory. Background jobs started by a step are
+polled until they finish; their end-to-end latency is reported as
+``<step>_job``, and failed, cancelled or timed-out jobs count as errors.
+Rerun latency percentiles per step and process memory growth are reported
+at the end.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from benchmarks.synthetic import make_numeric_dataset  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from utils import parallel  # noqa: E402
+from utils.jobs import ACTIVE_STATUSES, get_job, list_jobs  # noqa: E402
+
+_lock = threading.Lock()
+
+# Seconds between polls of a session's background jobs
+JOB_POLL_INTERVAL = 0.1
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class SessionDriver:
+    """Drives one simulated user through the app's pages"""
+
+    def __init__(self, username, seed, timings, errors, timeout):
+        self.username = username
+        self.seed = seed
+        self.timings = timings
+        self.errors = errors
+        self.timeout = timeout
+        self.state = {'logged_in': True, 'username': username}
+
+    def open(self, page):
+        at = AppTest.from_file(str(APP_DIR / page), default_timeout=self.timeout)
+        for key, value in self.state.items():
+            at.session_state[key] = value
+        return at
+
+    def rerun(self, step, at):
+        start = time.perf_counter()
+        try:
+            at.run()
+            failed = bool(at.exception)
+        except Exception:
+            failed = True
+        with _lock:
+            self.timings[step].append(time.perf_counter() - start)
+            if failed:
+                self.errors[step] += 1
+        return at
+
+    def job_ids(self):
+        return {job['id'] for job in list_jobs(limit=10_000, username=self.username)}
+
+    def wait_for_jobs(self, step, job_ids, start):
+        """Poll jobs until they finish; latency since `start` is recorded under `<step>_job`"""
+        pending = set(job_ids)
+        failed = 0
+        deadline = time.perf_counter() + self.timeout
+        while pending and time.perf_counter() < deadline:
+            for job_id in list(pending):
+                job = get_job(job_id, self.username)
+                if job is None or job['status'] not in ACTIVE_STATUSES:
+                    pending.discard(job_id)
+                    if job is None or job['status'] != "done":
+                        failed += 1
+            if pending:
+                time.sleep(JOB_POLL_INTERVAL)
+        if not job_ids:
+            return
+        with _lock:
+            self.timings[f"{step}_job"].append(time.perf_counter() - start)
+            # Jobs still running at the deadline count as failures too
+            if failed or pending:
+                self.errors[f"{step}_job"] += failed + len(pending)
+
+    @staticmethod
+    def widget(widgets, label):
+        return next(w for w in widgets if w.label == label)
+
+    def login(self):
+        self.rerun("login", self.open("app.py"))
+
+    def create_project(self, title):
+        at = self.rerun("open_projects", self.open("pages/2_Projects.py"))
+        self.widget(at.text_input, "Project Title").set_value(title)
+        self.widget(at.text_area, "Project Description").set_value("Load test project")
+        self.widget(at.button, "Create Project").click()
+        self.rerun("create_project", at)
+
+    def add_citations(self, project, count):
+        for i in range(count):
+            at = self.rerun("open_citations", self.open("pages/3_Citations.py"))
+            self.widget(at.text_input, "Publication Title").set_value(f"{project} reference {i}")
+            self.widget(at.text_input, "Authors (comma-separated)").set_value("Smith, Chen, Patel")
+            self.widget(at.text_input, "Publication Year").set_value(str(2000 + i))
+            self.widget(at.button, "Add Citation").click()
+            self.rerun("add_citation", at)
+
+    def upload_dataset(self, cells):
+        # AppTest cannot drive st.file_uploader, so seed the parsed dataset
+        self.state['data'] = make_numeric_dataset(cells, seed=self.seed)
+
+    def run_analysis(self):
+        # Opening the page already starts the profile and other tab jobs
+        before, start = self.job_ids(), time.perf_counter()
+        at = self.rerun("open_analysis", self.open("pages/4_Analysis.py"))
+        self.widget(at.button, "Perform Test").click()
+        self.rerun("hypothesis_test", at)
+        self.wait_for_jobs("hypothesis_test", self.job_ids() - before, start)
+
+    def generate_report(self):
+        at = self.rerun("open_reports", self.open("pages/5_Reports.py"))
+        self.widget(at.button, "Generate Report").click()
+        before, start = self.job_ids(), time.perf_counter()
+        self.rerun("generate_report", at)
+        self.wait_for_jobs("generate_report", self.job_ids() - before, start)
+
+    def run_flow(self, iteration, citations, cells):
+        title = f"{self.username} project {iteration}"
+        self.login()
+        self.create_project(title)
+        self.add_citations(title, citations)
+        self.upload_dataset(cells)
+        self.run_analysis()
+        self.generate_report()
+
+
+def run_session(index, args, timings, errors):
+    driver = SessionDriver(f"loadtest_{index}", index, timings, errors, args.timeout)
+    for iteration in range(args.iterations):
+        try:
+            driver.run_flow(iteration, args.citations, args.cells)
+        except Exception:
+            with _lock:
+                errors['flow'] += 1
+
+
+def summarize(timings):
+    rows = {}
+    for step, values in timings.items():
+        values = np.array(values) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        rows[step] = {'reruns': len(values), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': values.max()}
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent simulated sessions")
+    parser.add_argument("--iterations", type=int, default=2, help="Flows replayed per session")
+    parser.add_argument("--citations", type=int, default=3, help="Citations added per flow")
+    parser.add_argument("--cells", type=int, default=50_000, help="Cells in each session's dataset")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-rerun timeout in seconds")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            rss_start = current_rss_mb()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+                for index in range(args.sessions):
+                    pool.submit(run_session, index, args, timings, errors)
+            elapsed = time.perf_counter() - start
+            rss_end = current_rss_mb()
+        finally:
+            # Jobs that outlived their polling must finish before the data directory is removed
+            parallel.reset_process_pool(wait=True)
+            os.chdir(previous_cwd)
+
+    summary = summarize(timings)
+    total_reruns = sum(row['reruns'] for row in summary.values())
+    print(f"{args.sessions} sessions x {args.iterations} flows in {elapsed:.1f} s "
+          f"({total_reruns / elapsed:.1f} reruns/s)")
+    print(f"{'step':<22} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for step, row in summary.items():
+        print(f"{step:<22} {row['reruns']:>7} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['max_ms']:>9.1f} {errors.get(step, 0):>7}")
+    if errors.get('flow'):
+        print(f"{errors['flow']} flow(s) aborted")
+    print(f"memory: {rss_start:.0f} MB -> {rss_end:.0f} MB ({rss_end - rss_start:+.0f} MB)")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            'sessions': args.sessions,
+            'iterations': args.iterations,
+            'elapsed_seconds': elapsed,
+            'steps': summary,
+            'errors': dict(errors),
+            'rss_start_mb': rss_start,
+            'rss_end_mb': rss_end
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
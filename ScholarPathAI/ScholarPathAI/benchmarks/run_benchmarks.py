@@ -0,0 +1,237 @@
+"""Benchmark suite for utils.storage, utils.analysis and utils.report_generator.
+
+Run from the app directory:
+
+    python benchmarks/run_benchmarks.py --scale small
+    python benchmarks/run_benchmarks.py --scale medium --update-baseline
+    python benchmarks/run_benchmarks.py --scale large --only storage
+
+Every case is timed over several repeats on seeded synthetic data and run
+once more under tracemalloc for peak memory. Median latencies are compared
+against ``benchmarks/baselines.json``; the script exits non-zero when a
+case is slower than its baseline by more than ``--tolerance``.
+
+Cases without a baseline are recorded instead of compared, so the first
+run of a scale (e.g. on a fresh checkout or a new reference machine)
+writes its baseline and succeeds; commit the file to compare later runs
+against it. ``--update-baseline`` re-records every case.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from benchmarks.synthetic import make_citations, make_numeric_dataset, make_projects  # noqa: E402
+from utils import analysis, report_generator, storage  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# Table rows for storage/report cases and cell counts for analysis cases
+SCALES = {
+    'small': {'rows': 1_000, 'cells': 100_000},
+    'medium': {'rows': 100_000, 'cells': 2_000_000},
+    'large': {'rows': 1_000_000, 'cells': 20_000_000}
+}
+
+
+# Projects are one file each, so their cases stop growing at this many
+MAX_PROJECT_ROWS = 10_000
+
+
+def _write_table(path, frame):
+    frame.to_csv(path, index=False)
+
+
+def _write_projects(rows):
+    """Replace the project records with `rows` synthetic projects; returns their ids"""
+    directory = storage.projects_dir()
+    for path in directory.glob("*.json"):
+        path.unlink()
+    index = {}
+    for i, record in enumerate(make_projects(rows).to_dict(orient="records")):
+        record['id'] = f"p{i:07d}"
+        storage._write_json(directory / f"{record['id']}.json", record)
+        index[record['id']] = record['title']
+    storage._write_project_index(index)
+    return list(index)
+
+
+def _storage_cases(rows):
+    project_rows = min(rows, MAX_PROJECT_ROWS)
+
+    def load_projects():
+        _write_projects(project_rows)
+        return ()
+
+    def save_project():
+        _write_projects(project_rows)
+        return (make_projects(1, seed=1).iloc[0].to_dict(),)
+
+    def get_project():
+        return (_write_projects(project_rows)[-1],)
+
+    def update_project():
+        return (_write_projects(project_rows)[-1], {'analysis_progress': 0.5})
+
+    def load_citations():
+        _write_table(storage.citations_path(), make_citations(rows))
+        return ()
+
+    def save_citation():
+        load_citations()
+        return (make_citations(1, seed=1).iloc[0].to_dict(),)
+
+    return [
+        ('storage.initialize_storage', 1, lambda: (), storage.initialize_storage),
+        ('storage.load_projects', project_rows, load_projects, storage.load_projects),
+        ('storage.save_project', project_rows, save_project, storage.save_project),
+        ('storage.get_project', project_rows, get_project, storage.get_project),
+        ('storage.update_project', project_rows, update_project, storage.update_project),
+        ('storage.load_citations', rows, load_citations, storage.load_citations),
+        ('storage.save_citation', rows, save_citation, storage.save_citation)
+    ]
+
+
+def _analysis_cases(cells):
+    data = make_numeric_dataset(cells)
+    numeric = data.drop(columns='group')
+    control = numeric.loc[data['group'] == "control", 'x0']
+    treatment = numeric.loc[data['group'] == "treatment", 'x0']
+    return [
+        ('analysis.perform_descriptive_statistics', cells, lambda: (numeric,), analysis.perform_descriptive_statistics),
+        ('analysis.perform_correlation_analysis', cells, lambda: (numeric,), analysis.perform_correlation_analysis),
+        ('analysis.perform_hypothesis_test[t-test]', len(data), lambda: (control, treatment, 't-test'), analysis.perform_hypothesis_test),
+        ('analysis.perform_hypothesis_test[mann-whitney]', len(data), lambda: (control, treatment, 'mann-whitney'), analysis.perform_hypothesis_test),
+        ('analysis.perform_hypothesis_test[permutation]', len(data), lambda: (control, treatment, 'permutation', 10_000, 0), analysis.perform_hypothesis_test),
+        ('analysis.perform_hypothesis_test[bootstrap]', len(data), lambda: (control, treatment, 't-test', 10_000, 0, True), analysis.perform_hypothesis_test),
+        ('analysis.normalize_data', cells, lambda: (numeric,), analysis.normalize_data)
+    ]
+
+
+def _report_cases(rows):
+    project = make_projects(1).iloc[0].to_dict()
+    project['research_questions'] = [f"Question {i}?" for i in range(5)]
+    citations = make_citations(rows)
+    results = {'summary': "Synthetic analysis summary\n" * 20}
+    return [
+        ('report.generate_research_report', rows, lambda: (project, results, citations), report_generator.generate_research_report)
+    ]
+
+
+def build_cases(scale, only=None):
+    """Return (name, units, setup, func) tuples for the selected groups"""
+    sizes = SCALES[scale]
+    groups = {
+        'storage': lambda: _storage_cases(sizes['rows']),
+        'analysis': lambda: _analysis_cases(sizes['cells']),
+        'report': lambda: _report_cases(sizes['rows'])
+    }
+    cases = []
+    for group, factory in groups.items():
+        if only and group not in only:
+            continue
+        cases.extend(factory())
+    return cases
+
+
+def run_case(units, setup, func, repeats):
+    """Time a case over `repeats` runs, then measure its peak memory once"""
+    timings = []
+    for _ in range(repeats):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        'units': units,
+        'median_ms': median * 1000,
+        'min_ms': min(timings) * 1000,
+        'max_ms': max(timings) * 1000,
+        'throughput_per_s': units / median if median else None,
+        'peak_memory_mb': peak / 2**20
+    }
+
+
+def load_baselines():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=["storage", "analysis", "report"])
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    scale_baseline = baselines.get(args.scale, {}).get('results', {})
+    results = {}
+    regressions = []
+    recorded = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Storage functions use paths relative to the working directory
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for name, units, setup, func in build_cases(args.scale, args.only):
+                result = run_case(units, setup, func, args.repeats)
+                results[name] = result
+
+                line = (f"{name:<48} {result['median_ms']:10.2f} ms"
+                        f"  {result['throughput_per_s'] or 0:14,.0f} /s"
+                        f"  {result['peak_memory_mb']:9.1f} MB")
+                baseline = scale_baseline.get(name)
+                if baseline:
+                    change = result['median_ms'] / baseline['median_ms'] - 1
+                    line += f"  {change:+7.1%} vs baseline"
+                    if change > args.tolerance:
+                        regressions.append(name)
+                        line += "  REGRESSION"
+                else:
+                    recorded.append(name)
+                    line += "  NEW BASELINE"
+                print(line)
+        finally:
+            os.chdir(previous_cwd)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.update_baseline or recorded:
+        baselines.setdefault(args.scale, {})
+        baselines[args.scale]['machine'] = f"{platform.machine()} / {platform.python_version()}"
+        new = results if args.update_baseline else {name: results[name] for name in recorded}
+        baselines[args.scale].setdefault('results', {}).update(new)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True))
+        print(f"Baseline for '{args.scale}' ({len(new)} cases) written to {BASELINE_PATH.relative_to(APP_DIR)}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Cold-start benchmark for the app entry point and each page.
+
+Run from the app directory:
+
+    python benchmarks/startup.py [--first-paint] [--output results.json]
+
+For every script the top-level imports are executed in a fresh interpreter
+under ``python -X importtime`` and the slowest modules are reported. With
+``--first-paint`` each page is also rendered once with Streamlit's
+``AppTest`` in a fresh interpreter to measure time to first paint.
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+FIRST_PAINT_SNIPPET = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout=120)
+at.session_state["logged_in"] = True
+at.session_state["username"] = "benchmark"
+at.run()
+print(time.perf_counter() - start)
+"""
+
+
+def discover_scripts():
+    """Return the app entry point followed by every page script"""
+    return [APP_DIR / "app.py"] + sorted((APP_DIR / "pages").glob("*.py"))
+
+
+def extract_imports(script):
+    """Return the source of the top-level import statements of a script"""
+    source = script.read_text()
+    tree = ast.parse(source)
+    statements = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.get_source_segment(source, node) for node in statements)
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_imports(script, top):
+    """Measure import cost of a script's top-level imports in a fresh interpreter"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", extract_imports(script)],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    rows = parse_importtime(result.stderr)
+    # Top-level packages are the rows without indentation in the module name
+    top_level = [row for row in rows if not row[0].startswith(" ")]
+    top_level.sort(key=lambda row: row[2], reverse=True)
+    return {
+        "wall_seconds": wall,
+        "import_seconds": sum(row[2] for row in top_level) / 1e6,
+        "modules_imported": len(rows),
+        "slowest": [
+            {"module": name.strip(), "cumulative_ms": cumulative / 1000}
+            for name, _, cumulative in top_level[:top]
+        ],
+        "error": result.stderr.strip().splitlines()[-1] if result.returncode else None
+    }
+
+
+def measure_first_paint(script):
+    """Render a script once with AppTest in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_PAINT_SNIPPET.format(path=str(script))],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    if result.returncode:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--first-paint", action="store_true", help="Also measure AppTest first render time")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest imports to list per script")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for script in discover_scripts():
+        name = script.relative_to(APP_DIR).as_posix()
+        entry = measure_imports(script, args.top)
+        if args.first_paint:
+            entry["first_paint_seconds"] = measure_first_paint(script)
+        results[name] = entry
+
+        line = f"{name:<28} imports {entry['import_seconds'] * 1000:8.1f} ms  process {entry['wall_seconds'] * 1000:8.1f} ms"
+        if args.first_paint:
+            paint = entry["first_paint_seconds"]
+            line += f"  first paint {paint * 1000:8.1f} ms" if paint is not None else "  first paint   failed"
+        print(line)
+        if entry["error"]:
+            print(f"    error: {entry['error']}")
+        for module in entry["slowest"]:
+            print(f"    {module['module']:<40} {module['cumulative_ms']:8.1f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
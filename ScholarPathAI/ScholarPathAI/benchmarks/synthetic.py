@@ -0,0 +1,76 @@
+"""Seeded synthetic data generators for the benchmark suite."""
+import numpy as np
+import pandas as pd
+
+STAGE_COLUMNS = [
+    'problem_formulation_progress',
+    'literature_review_progress',
+    'research_design_progress',
+    'data_collection_progress',
+    'analysis_progress',
+    'reporting_progress'
+]
+
+_WORDS = np.array([
+    "learning", "network", "analysis", "climate", "health", "model", "data",
+    "education", "policy", "urban", "protein", "quantum", "social", "energy",
+    "market", "language", "student", "genome", "sensor", "risk", "survey",
+    "memory", "behavior", "robust", "adaptive", "causal", "spatial", "deep"
+])
+_SURNAMES = np.array([
+    "Smith", "Garcia", "Chen", "Patel", "Kim", "Müller", "Rossi", "Silva",
+    "Nguyen", "Okafor", "Ivanova", "Haddad", "Tanaka", "Brown", "Novak"
+])
+_JOURNALS = np.array([
+    "Nature", "Science", "PLOS ONE", "IEEE Access", "The Lancet",
+    "Journal of Applied Statistics", "ACM Computing Surveys", "Cell"
+])
+
+
+def _titles(rng, n, words_per_title=6):
+    """Random titles assembled from a fixed vocabulary"""
+    picks = _WORDS[rng.integers(0, len(_WORDS), size=(n, words_per_title))]
+    return pd.Series([" ".join(row).capitalize() for row in picks])
+
+
+def make_projects(n, seed=0):
+    """Projects table with the columns written by the Projects page"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    projects = pd.DataFrame({
+        'title': [f"Project {i}: {t}" for i, t in enumerate(_titles(rng, n, 4))],
+        'description': _titles(rng, n, 12),
+        'status': rng.choice(["Active", "Completed", "On Hold"], n),
+        'created_date': start.strftime('%Y-%m-%d'),
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': (start + pd.to_timedelta(rng.integers(60, 720, n), unit="D")).strftime('%Y-%m-%d')
+    })
+    for column in STAGE_COLUMNS:
+        projects[column] = rng.random(n).round(2)
+    return projects
+
+
+def make_citations(n, seed=0, n_projects=50):
+    """Citations table with the columns written by the Citations page"""
+    rng = np.random.default_rng(seed)
+    authors = _SURNAMES[rng.integers(0, len(_SURNAMES), size=(n, 3))]
+    return pd.DataFrame({
+        'title': _titles(rng, n),
+        'authors': [", ".join(row) for row in authors],
+        'year': rng.integers(1990, 2026, n),
+        'journal': rng.choice(_JOURNALS, n),
+        'doi': [f"10.{1000 + i % 9000}/{i:08d}" for i in range(n)],
+        'project': [f"Project {i}" for i in rng.integers(0, n_projects, n)]
+    })
+
+
+def make_numeric_dataset(n_cells, n_columns=10, seed=0):
+    """Numeric dataset with about `n_cells` values plus a two-level group column"""
+    rng = np.random.default_rng(seed)
+    n_rows = max(1, n_cells // n_columns)
+    data = pd.DataFrame(
+        rng.standard_normal((n_rows, n_columns)),
+        columns=[f"x{i}" for i in range(n_columns)]
+    )
+    data['group'] = np.where(rng.random(n_rows) < 0.5, "control", "treatment")
+    return data
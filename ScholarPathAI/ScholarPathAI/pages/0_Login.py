@@ -3,6 +3,7 @@ import hashlib
 import psycopg2
 from urllib.parse import urlparse
 import os
+from utils.storage import validate_username
 
 # Database connection
 def get_db_connection():
@@ -133,7 +134,10 @@ def main():
         
         if st.button("Sign Up"):
             if new_username and new_password and confirm_password and email:
-                if new_password != confirm_password:
+                username_error = validate_username(new_username)
+                if username_error:
+                    st.error(username_error)
+                elif new_password != confirm_password:
                     st.error("Passwords do not match")
                 elif len(new_password) < 6:
                     st.error("Password must be at least 6 characters long")
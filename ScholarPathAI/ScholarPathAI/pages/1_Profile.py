@@ -1,29 +1,6 @@
 import streamlit as st
-import json
-from pathlib import Path
-from datetime import datetime
-
-# Initialize profile storage
-PROFILE_PATH = Path("data/profile.json")
-
-def load_profile():
-    if PROFILE_PATH.exists():
-        with open(PROFILE_PATH, "r") as f:
-            return json.load(f)
-    return {
-        "name": "",
-        "email": "",
-        "institution": "",
-        "research_interests": [],
-        "expertise": [],
-        "education": [],
-        "publications": []
-    }
-
-def save_profile(profile_data):
-    PROFILE_PATH.parent.mkdir(exist_ok=True)
-    with open(PROFILE_PATH, "w") as f:
-        json.dump(profile_data, f)
+from utils.instrumentation import profile_rerun
+from utils.settings import load_profile, save_profile
 
 def main():
     st.title("👤 Research Profile")
@@ -100,4 +77,9 @@ def main():
         st.success("Profile saved successfully!")
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun(
+        "profile",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
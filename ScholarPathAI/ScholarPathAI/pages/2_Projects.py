@@ -1,8 +1,18 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.storage import load_projects, save_project
-from utils.research_tools import create_problem_statement, generate_research_questions
+from utils.dashboard import STAGES
+from utils.db_storage import PAGE_SIZE, citation_titles, project_statuses, query_projects
+from utils.storage import delete_project, save_project, update_project
+from utils.research_tools import (
+    create_problem_statement,
+    create_research_timeline,
+    generate_research_questions,
+    overdue_projects,
+    schedule_projects,
+    timeline_figure
+)
+from utils.instrumentation import profile_rerun, timer
 
 def create_new_project():
     st.header("Create New Project")
@@ -27,7 +37,8 @@ def create_new_project():
     # Research Questions
     if st.checkbox("Generate Research Questions"):
         if 'problem_statement' in project_data:
-            questions = generate_research_questions(project_data['problem_statement'])
+            # The citation library is the background corpus for what counts as distinctive
+            questions = generate_research_questions(project_data['problem_statement'], citations=citation_titles())
             st.write("Suggested Research Questions:")
             project_data['research_questions'] = []
             for i, q in enumerate(questions):
@@ -38,6 +49,14 @@ def create_new_project():
     st.subheader("Project Timeline")
     project_data['start_date'] = st.date_input("Start Date")
     project_data['end_date'] = st.date_input("End Date")
+    if project_data['end_date'] <= project_data['start_date']:
+        st.caption("End date is not after the start date; stages use their nominal durations.")
+    st.dataframe(
+        pd.DataFrame.from_dict(
+            create_research_timeline(project_data['start_date'], project_data['end_date']), orient="index"
+        ),
+        use_container_width=True
+    )
     
     # Initial Progress
     project_data.update({
@@ -52,46 +71,129 @@ def create_new_project():
     })
     
     if st.button("Create Project"):
-        save_project(project_data)
-        st.success("Project created successfully!")
-        st.session_state.current_project = project_data['title']
+        project_id = save_project(project_data)
+        if project_id:
+            st.success("Project created successfully!")
+            st.session_state.current_project = project_id
+        else:
+            st.error("Failed to save project. Please try again.")
 
 def view_projects():
     st.header("My Projects")
     
-    projects = load_projects()
-    if projects.empty:
+    # Search, filters and pages are answered by the database; only the shown page is loaded
+    if not project_statuses():
         st.info("No projects found. Create your first project!")
         return
-    
-    for _, project in projects.iterrows():
+
+    col1, col2 = st.columns(2)
+    with col1:
+        search = st.text_input("Search project titles")
+    statuses = project_statuses(search)
+    with col2:
+        status = st.multiselect(
+            "Filter by Status",
+            options=list(statuses),
+            format_func=lambda value: f"{value or 'None'} ({statuses[value]:,})"
+        )
+
+    total = sum(count for value, count in statuses.items() if not status or value in status)
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1) - 1
+    projects, total = query_projects(status, search, page=page)
+    st.caption(f"Showing {min(page * PAGE_SIZE + 1, total):,}–{min((page + 1) * PAGE_SIZE, total):,} of {total:,} projects")
+
+    for project in projects.to_dict(orient="records"):
         with st.expander(f"📋 {project['title']}"):
             col1, col2 = st.columns([3, 1])
             
             with col1:
-                st.write("**Description:**", project['description'])
-                st.write("**Status:**", project['status'])
-                st.write("**Created:**", project['created_date'])
+                st.write("**Description:**", project.get('description', ''))
+                st.write("**Status:**", project.get('status', ''))
+                st.write("**Created:**", project.get('created_date', ''))
+                if st.button("🗑️ Delete project", key=f"delete_{project['id']}"):
+                    if delete_project(project['id']):
+                        st.rerun()
+                    else:
+                        st.error("Failed to delete project. Please try again.")
             
             with col2:
                 st.write("**Progress:**")
-                st.progress(float(project['problem_formulation_progress']), "Problem")
-                st.progress(float(project['literature_review_progress']), "Literature")
-                st.progress(float(project['research_design_progress']), "Design")
-                st.progress(float(project['data_collection_progress']), "Data")
-                st.progress(float(project['analysis_progress']), "Analysis")
-                st.progress(float(project['reporting_progress']), "Report")
+                # Each change rewrites only this project's record
+                for stage, column in STAGES:
+                    value = project.get(column)
+                    st.slider(
+                        stage,
+                        min_value=0.0,
+                        max_value=1.0,
+                        value=float(value) if pd.notna(value) else 0.0,
+                        step=0.05,
+                        key=f"{column}_{project['id']}",
+                        on_change=lambda project_id=project['id'], column=column: update_project(
+                            project_id, {column: st.session_state[f"{column}_{project_id}"]}
+                        )
+                    )
+
+def project_timeline():
+    st.header("Project Timeline")
+
+    projects, _ = query_projects(page_size=None)
+    if projects.empty:
+        st.info("No projects found. Create your first project!")
+        return
+
+    # All projects are scheduled at once; filtering only limits what is drawn
+    schedule = schedule_projects(projects)
+    overdue = overdue_projects(schedule)
+
+    col1, col2 = st.columns(2)
+    col1.metric("Projects", len(projects))
+    col2.metric("Projects with overdue stages", len(overdue))
+
+    if not overdue.empty:
+        st.subheader("Overdue")
+        st.dataframe(
+            overdue.drop(columns='project_id').rename(columns={
+                'title': "Project", 'overdue_stages': "Overdue stages", 'earliest_due': "Earliest due"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    titles = dict(zip(projects['id'], projects['title']))
+    show_overdue = st.toggle("Only projects with overdue stages", value=len(projects) > 20 and not overdue.empty)
+    options = list(overdue['project_id']) if show_overdue else list(titles)
+    selected = st.multiselect(
+        "Projects to show",
+        options=options,
+        default=options[:20],
+        format_func=titles.get
+    )
+    if selected:
+        with timer("projects.timeline_render"):
+            st.plotly_chart(
+                timeline_figure(schedule[schedule['project_id'].isin(selected)]),
+                use_container_width=True
+            )
 
 def main():
     st.title("📋 Projects")
     
-    tab1, tab2 = st.tabs(["My Projects", "Create New Project"])
+    tab1, tab2, tab3 = st.tabs(["My Projects", "Timeline", "Create New Project"])
     
     with tab1:
         view_projects()
     
     with tab2:
+        project_timeline()
+    
+    with tab3:
         create_new_project()
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun(
+        "projects",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
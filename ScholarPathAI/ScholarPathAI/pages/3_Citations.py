@@ -1,7 +1,14 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.storage import load_projects, load_citations, save_citation
+from utils.storage import list_projects, load_citations
+from utils.dedup import add_citation_checked, find_duplicate_groups, remove_duplicates
+from utils.citation_import import IMPORT_FORMATS, detect_format, import_citations
+from utils.citation_network import build_network, get_network, network_figure
+from utils.citation_styles import CITATION_STYLES, format_citations
+from utils.db_storage import PAGE_SIZE, citation_facets, count_citations, iter_citations, query_citations
+from utils.instrumentation import profile_rerun
+from utils.settings import get_setting
 
 def add_citation():
     st.header("Add New Citation")
@@ -15,100 +22,235 @@ def add_citation():
     citation_data['doi'] = st.text_input("DOI (if available)")
 
     # Project association
-    projects = load_projects()
-    if not projects.empty:
-        project_options = ['None'] + projects['title'].tolist()
-        citation_data['project'] = st.selectbox(
+    projects = list_projects()
+    if projects:
+        citation_data['project_id'] = st.selectbox(
             "Associate with Project",
-            options=project_options
+            options=[None] + list(projects),
+            format_func=lambda project_id: projects.get(project_id, 'None')
         )
+        citation_data['project'] = projects.get(citation_data['project_id'], 'None')
     else:
         citation_data['project'] = 'None'
+        citation_data['project_id'] = None
         st.info("No projects found. Create a project first to associate citations.")
 
+    force = st.checkbox("Add even if it looks like a duplicate")
+
     if st.button("Add Citation"):
         if citation_data['title'] and citation_data['authors'] and citation_data['year']:
-            if save_citation(citation_data):
+            saved, duplicates = add_citation_checked(citation_data, force=force)
+            if saved:
                 st.success("Citation added successfully!")
                 st.rerun()
+            elif duplicates:
+                st.warning("This citation appears to be in this project already:")
+                for duplicate in duplicates:
+                    match = "same DOI" if duplicate['reason'] == "doi" else f"{duplicate['score']:.0%} title match"
+                    st.write(f"- {duplicate['title']} ({match})")
             else:
                 st.error("Failed to save citation. Please try again.")
         else:
             st.error("Please fill in all required fields (Title, Authors, Year)")
 
+def import_citations_file():
+    st.header("Import Citations")
+
+    uploaded_file = st.file_uploader(
+        "Upload a BibTeX, RIS or CSL-JSON file",
+        type=[extension for spec in IMPORT_FORMATS.values() for extension in spec['extensions']]
+    )
+
+    projects = list_projects()
+    project_id = st.selectbox(
+        "Associate imported citations with Project",
+        options=[None] + list(projects),
+        format_func=lambda project_id: projects.get(project_id, 'None')
+    )
+    skip_duplicates = st.checkbox("Skip citations already in my library", value=True)
+
+    if uploaded_file and st.button("Import Citations"):
+        try:
+            source_format = detect_format(uploaded_file.name)
+        except ValueError as e:
+            st.error(str(e))
+            return
+
+        progress_bar = st.progress(0.0, text="Importing...")
+        try:
+            summary = import_citations(
+                uploaded_file,
+                source_format,
+                project=projects.get(project_id, 'None'),
+                project_id=project_id,
+                skip_duplicates=skip_duplicates,
+                progress=lambda fraction, imported: progress_bar.progress(
+                    fraction, text=f"Imported {imported:,} citations"
+                )
+            )
+        except Exception as e:
+            st.error(f"Import failed: {str(e)}")
+            return
+
+        st.success(
+            f"Imported {summary['imported']:,} citations from {IMPORT_FORMATS[source_format]['label']}."
+        )
+        if summary['duplicates']:
+            st.info(f"{summary['duplicates']:,} duplicates were skipped.")
+        if summary['rejected']:
+            st.warning(f"{summary['rejected']:,} entries were skipped.")
+            with st.expander("Skipped entries"):
+                for error in summary['errors']:
+                    st.write(f"- {error}")
+
 def view_citations():
     st.header("My Citations")
 
-    citations = load_citations()
-    if citations.empty:
+    # Filters, counts and pages are answered by the database, never the whole table
+    if not count_citations():
         st.info("No citations found. Add your first citation!")
         return
 
-    # Filter options
+    projects = list_projects()
+    search = st.text_input("Search titles and authors")
     col1, col2 = st.columns(2)
+    filters = {}
     with col1:
-        year_filter = st.multiselect(
+        years = dict(citation_facets('year', filters, search).itertuples(index=False))
+        filters['year'] = st.multiselect(
             "Filter by Year",
-            options=sorted(citations['year'].unique())
+            options=sorted(years, key=lambda year: (year is None, year)),
+            format_func=lambda year: f"{'Unknown' if year is None else year} ({years[year]:,})"
         )
     with col2:
-        project_filter = st.multiselect(
+        linked = dict(citation_facets('project_id', filters, search).itertuples(index=False))
+        filters['project_id'] = st.multiselect(
             "Filter by Project",
-            options=sorted(citations['project'].unique())
+            options=list(linked),
+            format_func=lambda project_id: f"{projects.get(project_id, 'None') if project_id else 'None'} ({linked[project_id]:,})"
         )
 
-    # Apply filters
-    filtered_citations = citations.copy()
-    if year_filter:
-        filtered_citations = filtered_citations[filtered_citations['year'].isin(year_filter)]
-    if project_filter:
-        filtered_citations = filtered_citations[filtered_citations['project'].isin(project_filter)]
+    total = count_citations(filters, search)
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1) - 1
+    st.caption(f"Showing {min(page * PAGE_SIZE + 1, total):,}–{min((page + 1) * PAGE_SIZE, total):,} of {total:,} citations")
+
+    show_duplicate_cleanup()
 
     # Display citations
-    for _, citation in filtered_citations.iterrows():
+    for _, citation in query_citations(filters, search, page=page).iterrows():
         with st.expander(f"📚 {citation['title']}"):
             st.write("**Authors:**", citation['authors'])
             st.write("**Year:**", citation['year'])
             st.write("**Journal/Conference:**", citation['journal'])
             if citation['doi']:
                 st.write("**DOI:**", citation['doi'])
-            if citation['project'] != 'None':
+            if citation['project'] and citation['project'] != 'None':
                 st.write("**Project:**", citation['project'])
 
+def show_duplicate_cleanup():
+    """Offer to merge entries that refer to the same work"""
+    with st.expander("🧹 Find duplicates"):
+        if st.button("Scan library for duplicates"):
+            # Scanning needs every title, so the library is only read on request
+            citations = load_citations()
+            st.session_state.duplicate_groups = [
+                [str(citations.iloc[position]['title']) for position in group]
+                for group in find_duplicate_groups(citations)
+            ]
+
+        groups = st.session_state.get("duplicate_groups")
+        if groups is None:
+            return
+        if not groups:
+            st.success("No duplicates found.")
+            return
+
+        st.write(f"Found {len(groups)} groups covering {sum(len(group) for group in groups)} citations.")
+        for group in groups[:50]:
+            st.write(" / ".join(group))
+        if st.button("Remove duplicates", help="Keeps the most complete entry of each group"):
+            removed = remove_duplicates()
+            st.session_state.pop("duplicate_groups", None)
+            if removed is None:
+                st.error("Failed to remove duplicates. Please try again.")
+            else:
+                st.success(f"Removed {removed} duplicate citations.")
+                st.rerun()
+
+def show_network():
+    st.header("Citation Network")
+
+    projects = list_projects()
+    scope = st.selectbox(
+        "Scope",
+        options=[None] + list(projects),
+        format_func=lambda project_id: "Whole library" if project_id is None else projects[project_id]
+    )
+    if scope is None:
+        # Kept up to date incrementally as citations are added
+        network = get_network()
+    else:
+        network = build_network(query_citations({'project_id': [scope]}, page_size=None))
+
+    if not network.papers:
+        st.info("No citations found. Add or import citations to see the network.")
+        return
+
+    analysis = network.analyze()
+    summary = analysis['summary']
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Papers", f"{summary['papers']:,}")
+    col2.metric("Authors", f"{summary['authors']:,}")
+    col3.metric("Collaboration clusters", f"{summary['components']:,}")
+    col4.metric("Largest cluster", f"{summary['largest_component']:,} authors")
+
+    if summary['authors']:
+        top = st.slider("Authors shown in graph", 10, 100, 40, 10)
+        st.plotly_chart(network_figure(analysis, network, top), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Key Authors")
+        st.dataframe(analysis['authors'].head(100), use_container_width=True, hide_index=True)
+    with col2:
+        st.subheader("Key Venues")
+        st.dataframe(analysis['venues'].head(100), use_container_width=True, hide_index=True)
+
+    st.subheader("Collaboration Clusters")
+    st.dataframe(analysis['components'].head(100), use_container_width=True)
+
 def export_citations():
     st.header("Export Citations")
 
-    citations = load_citations()
-    if citations.empty:
+    if not count_citations():
         st.info("No citations to export.")
         return
 
     export_format = st.selectbox(
         "Export Format",
-        ["APA", "MLA", "Chicago"]
+        CITATION_STYLES,
+        index=CITATION_STYLES.index(get_setting("citation_style", "APA"))
     )
 
     if st.button("Export"):
-        formatted_citations = []
-        if export_format == "APA":
-            # Format citations in APA style
-            for _, citation in citations.iterrows():
-                formatted = f"{citation['authors']} ({citation['year']}). {citation['title']}. {citation['journal']}."
-                if citation['doi']:
-                    formatted += f" https://doi.org/{citation['doi']}"
-                formatted_citations.append(formatted)
-
-            st.download_button(
-                "Download Citations",
-                "\n\n".join(formatted_citations),
-                f"citations_{datetime.now().strftime('%Y%m%d')}.txt",
-                "text/plain"
-            )
+        # Formatted batch by batch instead of loading the library at once
+        formatted_citations = [
+            citation
+            for batch in iter_citations()
+            for citation in format_citations(batch, export_format)
+        ]
+        st.download_button(
+            "Download Citations",
+            "\n\n".join(formatted_citations),
+            f"citations_{datetime.now().strftime('%Y%m%d')}.txt",
+            "text/plain"
+        )
 
 def main():
     st.title("📚 Citations Manager")
 
-    tabs = st.tabs(["View Citations", "Add Citation", "Export"])
+    tabs = st.tabs(["View Citations", "Add Citation", "Import", "Network", "Export"])
 
     with tabs[0]:
         view_citations()
@@ -117,7 +259,18 @@ def main():
         add_citation()
 
     with tabs[2]:
+        import_citations_file()
+
+    with tabs[3]:
+        show_network()
+
+    with tabs[4]:
         export_citations()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profile_rerun(
+        "citations",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
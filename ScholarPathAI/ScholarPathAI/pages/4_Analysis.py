@@ -1,28 +1,223 @@
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import numpy as np
-import plotly.express as px
+from pathlib import Path
 from utils.analysis import (
+    dataset_fingerprint,
     perform_descriptive_statistics,
     perform_correlation_analysis,
-    perform_hypothesis_test,
+    perform_grouped_hypothesis_test,
     normalize_data
 )
+from utils.analysis_store import compact_distribution_figure, save_analysis_result
+from utils.dashboard import record_activity
+from utils.data_io import DATASET_FORMATS, datasets_dir, list_datasets, load_dataset, read_schema, save_upload
+from utils.instrumentation import profile_rerun, timer
+from utils.jobs import cancel_job, find_job, get_job, get_job_result, submit_job
+from utils.modeling import MODEL_TYPES, fit_model, model_formula
+from utils.parallel import call_on_shared_frame, release_frame, release_owners, share_frame
+from utils.profiling import clean_categories, profile_dataset
+from utils.resampling import MAX_SUPPORT
+from utils.settings import get_setting
+from utils.research_tools import POWER_TESTS, power_curve, power_curve_figure, sample_size_grid
+from utils.storage import list_projects
+from utils.lazy_imports import lazy_import
+
+px = lazy_import("plotly.express")
+
+PLOT_TYPES = {'histogram': "Histogram", 'box': "Box Plot", 'violin': "Violin Plot"}
+
+def select_result_project():
+    """Choose the project that saved analysis results are attached to"""
+    projects = list_projects()
+    if not projects:
+        st.session_state.analysis_project = None
+        return
+    with st.sidebar:
+        st.session_state.analysis_project = st.selectbox(
+            "Save results to project",
+            options=list(projects),
+            format_func=projects.get,
+            help="Saved results can be embedded in this project's reports"
+        )
+
+def session_owner():
+    """Owner token under which this browser session holds its shared dataset"""
+    return f"session:{get_script_run_ctx().session_id}"
+
+def release_closed_sessions():
+    """Drop shared-dataset references held by sessions that have disconnected"""
+    if not runtime.exists():
+        return
+    instance = runtime.get_instance()
+    release_owners(lambda owner: owner.startswith("session:")
+                   and not instance.is_active_session(owner.split(":", 1)[1]))
+
+def share_session_data(data):
+    release_closed_sessions()
+    return share_frame(data, st.session_state.data_fingerprint, session_owner())
+
+def run_analysis_job(label, func, data, *args, columns=None, params=None, cancellable=True):
+    """Run `func(data[columns], *args)` in the background job pool and return its result once finished.
+
+    The dataset is placed in shared memory once and workers attach to it, so
+    only a small handle is pickled per job; the session and each job hold a
+    reference to it. Jobs are keyed by the dataset fingerprint and `params`,
+    so reruns and resubmissions of the same analysis reuse the running job
+    or cached result. Pass cancellable=False for functions that never call
+    report_progress once running; they can only be cancelled while queued.
+    """
+    fingerprint = st.session_state.data_fingerprint
+    key = f"{fingerprint}:{func.__name__}:{params!r}"
+    job = find_job(call_on_shared_frame, key)
+    if job is None or (job['status'] == "done" and not Path(job['result_path']).exists()):
+        handle = share_session_data(data)
+        job = get_job(submit_job(label, call_on_shared_frame, func, handle, columns, *args, key=key))
+
+    if job['status'] == "done":
+        return get_job_result(job['id'])
+    if job['status'] in ("pending", "running"):
+        show_job_progress(job['id'], label, cancellable)
+        return None
+
+    if job['status'] == "cancelled":
+        st.info(f"{label} was cancelled.")
+    else:
+        st.error(f"{label} failed: {job['error']}")
+    if st.button("Run again", key=f"retry_{job['id']}"):
+        handle = share_session_data(data)
+        submit_job(label, call_on_shared_frame, func, handle, columns, *args, key=key)
+        st.rerun()
+    return None
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id, label, cancellable=True):
+    """Poll a running job; rerun the page once it finishes"""
+    job = get_job(job_id)
+    if job is None or job['status'] not in ("pending", "running"):
+        st.rerun()
+    st.progress(job['progress'], text=f"{label}: {job['message']}")
+    if (cancellable or job['status'] == "pending") and st.button("Cancel", key=f"cancel_{job_id}"):
+        cancel_job(job_id)
+
+def save_result_button(key, kind, title, build_artifact):
+    """Offer to persist the current result for use in reports.
+
+    `build_artifact()` returns the tables, values and figures to store; it
+    only runs when the button is clicked, not on every rerun.
+    """
+    project_id = st.session_state.get("analysis_project")
+    if not project_id:
+        return
+    if st.button("💾 Save to project", key=f"save_{key}"):
+        if save_analysis_result(project_id, kind, title, **build_artifact()):
+            project = list_projects().get(project_id, project_id)
+            record_activity("analysis", f"Saved {title} to {project}")
+            st.success(f"Saved to {project}. It can now be added to the project's reports.")
+        else:
+            st.error("Failed to save the result. Please try again.")
 
 def data_upload():
     st.header("Data Upload")
     
-    uploaded_file = st.file_uploader("Upload your dataset (CSV)", type="csv")
-    if uploaded_file:
+    uploaded_file = st.file_uploader(
+        "Upload your dataset (CSV, compressed CSV, Parquet, Feather/Arrow or Excel)",
+        type=sorted(DATASET_FORMATS)
+    )
+    if uploaded_file and st.session_state.get("uploaded_dataset") != uploaded_file.file_id:
+        try:
+            save_upload(uploaded_file)
+            st.session_state.uploaded_dataset = uploaded_file.file_id
+        except Exception as e:
+            st.error(f"Error saving data: {str(e)}")
+
+    # Large files can also be copied into the datasets directory directly
+    datasets = list_datasets()
+    if not datasets:
+        st.caption(f"Files placed in {datasets_dir()} are listed here as well.")
+        return None
+
+    path = st.selectbox("Dataset", options=datasets, format_func=lambda path: path.name)
+    try:
+        schema = read_schema(path)
+    except Exception as e:
+        st.error(f"Error reading data: {str(e)}")
+        return None
+
+    columns = list(schema['columns'])
+    rows = f"{schema['rows']:,} rows, " if schema['rows'] is not None else ""
+    st.caption(f"{rows}{len(columns)} columns, {path.stat().st_size / 2**20:,.1f} MB")
+    selected_columns = st.multiselect(
+        "Columns to load",
+        options=columns,
+        default=columns if len(columns) <= 50 else columns[:50],
+        format_func=lambda column: f"{column} ({schema['columns'][column]})",
+        help="Only these columns are read; Parquet and Feather skip the rest on disk"
+    )
+
+    if selected_columns:
+        with st.expander("Preview"):
+            try:
+                st.dataframe(load_dataset(path, selected_columns, nrows=100), use_container_width=True)
+            except Exception as e:
+                st.error(f"Error reading data: {str(e)}")
+
+    if selected_columns and st.button("Load Data"):
         try:
-            data = pd.read_csv(uploaded_file)
+            data = load_dataset(path, selected_columns)
             st.session_state.data = data
+            st.session_state.data_fingerprint = dataset_fingerprint(data)
             st.success("Data uploaded successfully!")
             return data
         except Exception as e:
             st.error(f"Error loading data: {str(e)}")
     return None
 
+def data_quality(data):
+    st.header("Data Quality")
+
+    profile = run_analysis_job(
+        "Data profile",
+        profile_dataset,
+        data,
+        {column: str(dtype) for column, dtype in data.dtypes.items()},
+        params=("profile",)
+    )
+    if profile is None:
+        return
+
+    columns = profile['columns']
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Rows", f"{profile['rows']:,}")
+    col2.metric("Columns", len(columns))
+    col3.metric("Missing values", f"{columns['nulls'].sum() / max(profile['rows'] * len(columns), 1):.1%}")
+    col4.metric("Issues", len(profile['issues']))
+
+    for issue in profile['issues']:
+        st.warning(issue)
+
+    st.subheader("Column Profile")
+    st.dataframe(
+        columns,
+        use_container_width=True,
+        column_config={
+            'null_rate': st.column_config.ProgressColumn("Missing", format="%.2f", min_value=0, max_value=1),
+            'distinct_estimated': st.column_config.CheckboxColumn("Estimated (HLL)")
+        }
+    )
+
+    save_result_button(
+        "profile",
+        "data_profile",
+        "Data quality profile",
+        lambda: {
+            'tables': {'Column Profile': columns},
+            'values': {'rows': profile['rows'], 'issues': len(profile['issues'])}
+        }
+    )
+
 def descriptive_analysis(data):
     st.header("Descriptive Analysis")
     
@@ -39,7 +234,15 @@ def descriptive_analysis(data):
     )
     
     if selected_cols:
-        stats = perform_descriptive_statistics(data[selected_cols])
+        stats = run_analysis_job(
+            "Descriptive statistics",
+            perform_descriptive_statistics,
+            data,
+            columns=list(selected_cols),
+            params=("descriptive", tuple(selected_cols))
+        )
+        if stats is None:
+            return
         
         st.subheader("Summary Statistics")
         st.write(stats['description'])
@@ -55,9 +258,12 @@ def descriptive_analysis(data):
         
         # Visualization
         st.subheader("Visualizations")
+        defaults = [PLOT_TYPES[plot] for plot in get_setting("default_analysis_plots", []) if plot in PLOT_TYPES]
+        plot_options = list(PLOT_TYPES.values())
         plot_type = st.selectbox(
             "Select plot type",
-            ["Histogram", "Box Plot", "Violin Plot"]
+            plot_options,
+            index=plot_options.index(defaults[0]) if defaults else 0
         )
         
         for col in selected_cols:
@@ -67,7 +273,28 @@ def descriptive_analysis(data):
                 fig = px.box(data, y=col, title=f"Box Plot of {col}")
             else:  # Violin Plot
                 fig = px.violin(data, y=col, title=f"Violin Plot of {col}")
-            st.plotly_chart(fig)
+            with timer("analysis.plot_render"):
+                st.plotly_chart(fig)
+
+        save_result_button(
+            "descriptive",
+            "descriptive",
+            f"Descriptive statistics: {', '.join(selected_cols)}",
+            lambda: {
+                'tables': {
+                    'Summary Statistics': stats['description'],
+                    'Skewness': stats['skewness'].rename('skewness'),
+                    'Kurtosis': stats['kurtosis'].rename('kurtosis')
+                },
+                'figures': [
+                    {
+                        'title': f"{plot_type} of {col}",
+                        'spec': compact_distribution_figure(data[col], plot_type, f"{plot_type} of {col}")
+                    }
+                    for col in selected_cols
+                ]
+            }
+        )
 
 def correlation_analysis(data):
     st.header("Correlation Analysis")
@@ -84,22 +311,42 @@ def correlation_analysis(data):
     )
     
     if len(selected_cols) >= 2:
-        corr_matrix = perform_correlation_analysis(data[selected_cols])
+        corr_matrix = run_analysis_job(
+            "Correlation analysis",
+            perform_correlation_analysis,
+            data,
+            columns=list(selected_cols),
+            params=("correlation", tuple(selected_cols)),
+            cancellable=False
+        )
+        if corr_matrix is None:
+            return
         
         st.subheader("Correlation Matrix")
         fig = px.imshow(
             corr_matrix,
-            text=corr_matrix.round(2),
+            text_auto=".2f",
             aspect="auto",
             title="Correlation Heatmap"
         )
-        st.plotly_chart(fig)
+        with timer("analysis.plot_render"):
+            st.plotly_chart(fig)
+
+        save_result_button(
+            "correlation",
+            "correlation",
+            f"Correlation analysis: {', '.join(selected_cols)}",
+            lambda: {
+                'tables': {'Correlation Matrix': corr_matrix},
+                'figures': [{'title': "Correlation Heatmap", 'spec': fig.to_json()}]
+            }
+        )
 
 def hypothesis_testing(data):
     st.header("Hypothesis Testing")
     
     numerical_cols = data.select_dtypes(include=[np.number]).columns
-    categorical_cols = data.select_dtypes(include=['object']).columns
+    categorical_cols = data.select_dtypes(include=['object', 'string', 'category', 'bool']).columns
     
     if len(numerical_cols) == 0 or len(categorical_cols) == 0:
         st.warning("Need both numerical and categorical columns for hypothesis testing.")
@@ -107,23 +354,67 @@ def hypothesis_testing(data):
     
     test_type = st.selectbox(
         "Select test type",
-        ["t-test", "mann-whitney"]
+        ["t-test", "mann-whitney", "permutation"]
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        n_resamples = st.select_slider(
+            "Resamples (bootstrap CI and permutation test)",
+            options=[1_000, 2_000, 5_000, 10_000, 20_000, 50_000],
+            value=10_000
+        )
+    with col2:
+        seed = st.number_input("Random seed", min_value=0, value=0, step=1)
+    bootstrap = st.checkbox(
+        "Estimate effect sizes and a bootstrap confidence interval",
+        help="Resamples both groups; this can take several seconds on large datasets."
     )
     
     dependent_var = st.selectbox("Select dependent variable", numerical_cols)
     grouping_var = st.selectbox("Select grouping variable", categorical_cols)
     
     if st.button("Perform Test"):
-        groups = data[grouping_var].unique()
+        # Labels differing only in case or spacing are merged before counting groups
+        raw_groups = data[grouping_var].dropna().unique()
+        groups = clean_categories(data[grouping_var]).dropna().unique()
         if len(groups) != 2:
-            st.error("Grouping variable must have exactly 2 categories.")
+            st.error(f"Grouping variable must have exactly 2 categories (found {len(groups)} after cleaning).")
             return
+        if len(raw_groups) != len(groups):
+            st.info(f"Merged {len(raw_groups)} labels into {len(groups)} groups.")
         
-        group1_data = data[data[grouping_var] == groups[0]][dependent_var]
-        group2_data = data[data[grouping_var] == groups[1]][dependent_var]
-        
-        results = perform_hypothesis_test(group1_data, group2_data, test_type)
-        
+        st.session_state.hypothesis_request = {
+            'test': test_type,
+            'dependent_variable': dependent_var,
+            'grouping_variable': grouping_var,
+            'groups': [groups[0], groups[1]],
+            'n_resamples': n_resamples,
+            'seed': int(seed),
+            'bootstrap': bootstrap
+        }
+
+    # The request is kept in session state so the result survives later reruns
+    request = st.session_state.get("hypothesis_request")
+    if request:
+        groups = request['groups']
+        results = run_analysis_job(
+            "Hypothesis test",
+            perform_grouped_hypothesis_test,
+            data,
+            request['dependent_variable'],
+            request['grouping_variable'],
+            groups,
+            request['test'],
+            request['n_resamples'],
+            request['seed'],
+            request['bootstrap'],
+            columns=[request['dependent_variable'], request['grouping_variable']],
+            params=("hypothesis", request['test'], request['dependent_variable'], request['grouping_variable'], repr(groups),
+                    request['n_resamples'], request['seed'], request['bootstrap'])
+        )
+        if results is None:
+            return
+
         st.subheader("Test Results")
         st.write(f"Test statistic: {results['statistic']:.4f}")
         st.write(f"P-value: {results['p_value']:.4f}")
@@ -131,29 +422,200 @@ def hypothesis_testing(data):
                 "Significant difference found" if results['significant'] 
                 else "No significant difference found")
 
+        if 'ci_low' in results:
+            st.subheader("Effect Size")
+            col1, col2, col3 = st.columns(3)
+            col1.metric(
+                f"Difference in {results['difference_of']}s",
+                f"{results['difference']:.4g}",
+                help=f"{groups[0]} minus {groups[1]}"
+            )
+            col2.metric("Cohen's d", f"{results['cohens_d']:.3f}", help=f"Hedges' g: {results['hedges_g']:.3f}")
+            col3.metric("Rank-biserial r", f"{results['rank_biserial']:.3f}")
+            st.write(
+                f"95% bootstrap CI for the difference: [{results['ci_low']:.4g}, {results['ci_high']:.4g}] "
+                f"({results['n_resamples']:,} resamples)"
+            )
+        if not results.get('exact_support', True):
+            st.caption(
+                f"The groups have more than {MAX_SUPPORT:,} distinct values, so resampling used "
+                f"{MAX_SUPPORT:,} quantile bins: the interval and any permutation p-value are approximate. "
+                "The test statistic and difference are computed from the raw values."
+            )
+
+        save_result_button(
+            "hypothesis",
+            "hypothesis_test",
+            f"{request['test']}: {request['dependent_variable']} by {request['grouping_variable']}",
+            lambda: {'values': {**request, 'groups': f"{groups[0]} vs {groups[1]}", **results}}
+        )
+
+def modeling(data):
+    st.header("Regression Modeling")
+
+    model_type = st.radio("Model", options=list(MODEL_TYPES), format_func=MODEL_TYPES.get, horizontal=True)
+    numerical_cols = list(data.select_dtypes(include=[np.number]).columns)
+    # Logistic targets can be any two-class column
+    target_options = numerical_cols if model_type == "linear" else list(data.columns)
+    if not target_options or len(data.columns) < 2:
+        st.warning("Need a target column and at least one predictor for modeling.")
+        return
+
+    target = st.selectbox("Target variable", target_options)
+    predictors = st.multiselect(
+        "Predictors",
+        options=[column for column in data.columns if column != target],
+        help="Categorical predictors are one-hot encoded against their first level"
+    )
+
+    if predictors and st.button("Fit Model"):
+        st.session_state.model_request = {'model_type': model_type, 'target': target, 'predictors': predictors}
+
+    # Kept in session state like hypothesis requests; fits are cached per dataset and formula
+    request = st.session_state.get("model_request")
+    if not request:
+        return
+    formula = model_formula(request['target'], request['predictors'])
+    result = run_analysis_job(
+        "Model fit",
+        fit_model,
+        data,
+        request['target'],
+        request['predictors'],
+        request['model_type'],
+        columns=[request['target']] + request['predictors'],
+        params=("model", request['model_type'], formula)
+    )
+    if result is None:
+        return
+
+    st.subheader(f"{MODEL_TYPES[result['model_type']]}: {result['formula']}")
+    diagnostics = result['diagnostics']
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Observations", f"{diagnostics['observations']:,}")
+    if result['model_type'] == "linear":
+        col2.metric("R²", f"{diagnostics['r_squared']:.3f}")
+        col3.metric("Adjusted R²", f"{diagnostics['adj_r_squared']:.3f}")
+    else:
+        col2.metric("Accuracy", f"{diagnostics['accuracy']:.3f}")
+        col3.metric("ROC AUC", f"{diagnostics['roc_auc']:.3f}")
+        st.caption(f"Modeling P({request['target']} = {result['classes'][1]}) against {result['classes'][0]}.")
+    if result['dropped_rows']:
+        st.caption(f"{result['dropped_rows']:,} rows with missing values were left out.")
+    if result['method'] == "sgd":
+        st.info("Fit incrementally with stochastic gradient descent; standard errors are not available.")
+
+    st.subheader("Coefficients")
+    st.dataframe(result['coefficients'], use_container_width=True)
+
+    st.subheader("Diagnostics")
+    st.dataframe(pd.Series(diagnostics, name="value").astype(str), use_container_width=True)
+
+    fig = None
+    if 'residuals' in result:
+        fig = px.scatter(result['residuals'], x='fitted', y='residual', title="Residuals vs Fitted")
+        fig.add_hline(y=0, line_dash="dash")
+        with timer("analysis.plot_render"):
+            st.plotly_chart(fig)
+
+    save_result_button(
+        "model",
+        "regression",
+        f"{MODEL_TYPES[result['model_type']]}: {result['formula']}",
+        lambda: {
+            'tables': {'Coefficients': result['coefficients']},
+            'values': diagnostics,
+            'figures': [{'title': "Residuals vs Fitted", 'spec': fig.to_json()}] if fig is not None else []
+        }
+    )
+
+def power_analysis():
+    st.header("Power Analysis")
+    st.caption("Plan sample sizes before collecting data.")
+
+    test = st.selectbox(
+        "Test",
+        options=list(POWER_TESTS),
+        format_func=lambda name: f"{name} ({POWER_TESTS[name]})"
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        effect_size = st.slider(
+            f"Effect size ({POWER_TESTS[test]})", 0.05, 0.95 if test == 'correlation' else 2.0, 0.3, 0.05
+        )
+    with col2:
+        alpha = st.select_slider("Significance level (α)", options=[0.001, 0.005, 0.01, 0.05, 0.1], value=0.05)
+    with col3:
+        power = st.slider("Target power", 0.5, 0.99, 0.8, 0.01)
+    groups = st.number_input("Number of groups", 3, 20, 3) if test == 'anova' else 3
+    population = st.number_input("Population size (0 for unlimited)", min_value=0, value=0, step=100)
+
+    with timer("analysis.power_analysis"):
+        required = sample_size_grid(test, effect_size, alpha, power, population, groups).iloc[0]
+        col1, col2 = st.columns(2)
+        col1.metric("Total sample size", f"{required['n_total']:,}")
+        col2.metric("Per group", f"{required['n_per_group']:,}")
+
+        # Neighbouring effect sizes and power targets, solved in one grid
+        effect_sizes = sorted({round(effect_size * factor, 3) for factor in (0.5, 0.75, 1, 1.5, 2)})
+        effect_sizes = [e for e in effect_sizes if 0 < e < (1 if test == 'correlation' else 5)]
+        grid = sample_size_grid(test, effect_sizes, alpha, [0.7, 0.8, 0.9, 0.95], population, groups)
+        st.subheader("Sample size by effect size and power")
+        st.dataframe(
+            grid.pivot(index='effect_size', columns='power', values='n_total'),
+            use_container_width=True
+        )
+
+        curve = power_curve(test, effect_sizes, alpha, max_n=max(50, int(required['n_total']) * 3), groups=groups)
+        st.plotly_chart(power_curve_figure(curve, target_power=power), use_container_width=True)
+
 def main():
     st.title("📊 Data Analysis")
     
     if 'data' not in st.session_state:
         data = data_upload()
         if data is None:
+            st.divider()
+            power_analysis()
             return
     else:
         data = st.session_state.data
         if st.button("Upload Different Data"):
             del st.session_state.data
+            release_frame(st.session_state.pop("data_fingerprint", None), session_owner())
+            st.session_state.pop("hypothesis_request", None)
+            st.session_state.pop("model_request", None)
             st.rerun()
+
+    if "data_fingerprint" not in st.session_state:
+        st.session_state.data_fingerprint = dataset_fingerprint(data)
+
+    select_result_project()
     
-    tabs = st.tabs(["Descriptive Analysis", "Correlation Analysis", "Hypothesis Testing"])
+    tabs = st.tabs(["Data Quality", "Descriptive Analysis", "Correlation Analysis", "Hypothesis Testing", "Modeling", "Power Analysis"])
     
     with tabs[0]:
-        descriptive_analysis(data)
+        data_quality(data)
     
     with tabs[1]:
-        correlation_analysis(data)
+        descriptive_analysis(data)
     
     with tabs[2]:
+        correlation_analysis(data)
+    
+    with tabs[3]:
         hypothesis_testing(data)
 
+    with tabs[4]:
+        modeling(data)
+
+    with tabs[5]:
+        power_analysis()
+
 if __name__ == "__main__":
-    main()
+    with profile_rerun(
+        "analysis",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
@@ -1,29 +1,31 @@
 import streamlit as st
-from utils.report_generator import generate_research_report
-from utils.storage import load_projects, load_citations
+from utils.analysis_store import list_analysis_results, results_for_report
+from utils.dashboard import record_activity
+from utils.db_storage import query_citations
+from utils.jobs import cancel_job
+from utils.report_archive import delete_report, list_reports, load_report
+from utils.report_formats import REPORT_FORMATS, get_report_job, load_artifact, submit_report_render
+from utils.storage import get_project, list_projects
 from datetime import datetime
+from utils.instrumentation import profile_rerun
 
 def generate_report():
     st.header("Generate Research Report")
     
     # Load project data
-    projects = load_projects()
-    if projects.empty:
+    projects = list_projects()
+    if not projects:
         st.warning("No projects found. Create a project first!")
         return
     
     selected_project = st.selectbox(
         "Select Project",
-        options=projects['title'].tolist()
+        options=list(projects),
+        format_func=projects.get
     )
     
-    if selected_project:
-        project_data = projects[projects['title'] == selected_project].iloc[0].to_dict()
-        
-        # Load related citations
-        citations = load_citations()
-        project_citations = citations[citations['project'] == selected_project]
-        
+    project_data = get_project(selected_project)
+    if project_data:
         # Report sections
         st.subheader("Report Sections")
         
@@ -43,42 +45,141 @@ def generate_report():
             height=200
         )
         
-        # Results
+        # Results are pulled from analyses saved on the Analysis page
         st.write("Results")
-        results_text = st.text_area(
-            "Research Results",
-            value=project_data.get('results', ''),
-            height=200
+        saved_results = list_analysis_results(selected_project)
+        if saved_results:
+            selected_results = st.multiselect(
+                "Analysis Results to Include",
+                options=[entry['id'] for entry in saved_results],
+                default=[entry['id'] for entry in saved_results],
+                format_func=lambda result_id: next(
+                    f"{e['title']} ({e['created'][:10]})" for e in saved_results if e['id'] == result_id
+                )
+            )
+        else:
+            selected_results = []
+            st.info("No saved analysis results for this project. Save results from the Analysis page to include them.")
+
+        results_notes = st.text_area(
+            "Additional Notes on Results",
+            value=project_data.get('results', '') if isinstance(project_data.get('results'), str) else '',
+            height=100
         )
         
-        # Analysis Results
-        analysis_results = {
-            'summary': results_text
-        }
-        
+        report_format = st.selectbox(
+            "Output Format",
+            options=list(REPORT_FORMATS),
+            format_func=lambda key: REPORT_FORMATS[key]['label']
+        )
+
         if st.button("Generate Report"):
-            report = generate_research_report(
+            # Stored artifacts are read by reference; nothing is recomputed
+            analysis_results, figures = results_for_report(selected_project, selected_results)
+            # Only this project's citations are read, from the database mirror
+            project_citations = query_citations({'project_id': [selected_project]}, page_size=None).reset_index(drop=True)
+            if results_notes:
+                analysis_results['Notes'] = results_notes
+            st.session_state.report_job = submit_report_render(
+                report_format,
                 project_data,
                 analysis_results,
-                project_citations
+                project_citations,
+                figures
             )
-            
-            st.download_button(
-                "Download Report",
-                report,
-                f"research_report_{datetime.now().strftime('%Y%m%d')}.txt",
-                "text/plain"
-            )
-            
-            st.subheader("Preview")
-            st.text(report)
+            record_activity("report", f"Generated {REPORT_FORMATS[report_format]['label']} report for {project_data['title']}")
+
+        job = get_report_job(st.session_state.get("report_job"))
+        if job and job['status'] in ("pending", "running"):
+            show_report_progress()
+        elif job:
+            show_report_result(job)
+
+@st.fragment(run_every=1.0)
+def show_report_progress():
+    """Poll the background render job without rerunning the whole page"""
+    job = get_report_job(st.session_state.report_job)
+    if job is None or job['status'] not in ("pending", "running"):
+        st.rerun()
+    st.progress(job['progress'], text=job['message'])
+    if st.button("Cancel", key="cancel_report_job"):
+        cancel_job(job['id'])
+
+def show_report_result(job):
+    if job['status'] == "failed":
+        st.error(f"Failed to generate report: {job['error']}")
+        return
+    if job['status'] == "cancelled":
+        st.info("Report generation was cancelled.")
+        return
+
+    report_format = REPORT_FORMATS[job['format']]
+    content = load_artifact(job)
+    if content is None:
+        st.warning("This rendered report has expired. Click Generate Report to render it again.")
+        return
+    st.success(job['message'])
+    st.download_button(
+        "Download Report",
+        content,
+        f"research_report_{datetime.now().strftime('%Y%m%d')}.{report_format['extension']}",
+        report_format['mime']
+    )
+
+    if job['format'] in ("text", "markdown"):
+        st.subheader("Preview")
+        st.text(content.decode("utf-8"))
 
 def view_reports():
     st.header("My Reports")
-    st.info("This feature will show previously generated reports")
-    
-    # This would typically load from a reports database
-    st.write("No saved reports found")
+
+    reports = list_reports()
+    if not reports:
+        st.info("No saved reports found. Generate a report to see it here.")
+        return
+
+    project_filter = st.selectbox(
+        "Filter by Project",
+        options=["All"] + sorted({entry['project'] for entry in reports})
+    )
+    if project_filter != "All":
+        reports = [entry for entry in reports if entry['project'] == project_filter]
+
+    st.dataframe(
+        [{'Project': e['project'], 'Created': e['created'], 'Size (KB)': round(e['size'] / 1024, 1)} for e in reports],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    # Only the selected report is read from disk; the list comes from the index
+    entry = st.selectbox(
+        "Open Report",
+        options=reports,
+        format_func=lambda e: f"{e['project']} · {e['created']}"
+    )
+    report = load_report(entry)
+    if report is None:
+        st.error("Report file is missing.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Download",
+            report,
+            entry['file'],
+            "application/octet-stream",
+            key=f"download_{entry['id']}",
+            use_container_width=True
+        )
+    with col2:
+        if st.button("Delete", key=f"delete_{entry['id']}", use_container_width=True):
+            delete_report(entry['id'])
+            st.rerun()
+
+    if isinstance(report, str):
+        st.subheader("Preview")
+        st.text(report)
 
 def main():
     st.title("📄 Research Reports")
@@ -92,4 +193,9 @@ def main():
         view_reports()
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun(
+        "reports",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
@@ -1,20 +1,56 @@
 import streamlit as st
 from datetime import datetime
-from groq import Groq
 import logging
 import os
+from utils.chat_store import append_message, archive_chat, load_messages, load_recent_messages
+from utils.instrumentation import profile_rerun, timer
+from utils.lazy_imports import lazy_import
+
+groq = lazy_import("groq")
 
 logger = logging.getLogger(__name__)
 
+# Number of messages rendered initially and added by each "load more"
+CHAT_PAGE_SIZE = 20
+# Number of most recent messages sent to the model as conversation context
+CHAT_CONTEXT_MESSAGES = 20
+
+GREETING = "Hello! I'm your research assistant. How can I help you today? You can ask me to explain research papers or anything else you're curious about!"
+
+def get_chat_user():
+    """Return the user whose transcript is shown"""
+    return st.session_state.get("username", "anonymous")
+
+def add_message(role, content):
+    """Persist a message and add it to the loaded window, dropping the oldest beyond one page"""
+    append_message(get_chat_user(), role, content)
+    messages = st.session_state.messages
+    messages.append({"role": role, "content": content})
+    overflow = len(messages) - max(CHAT_PAGE_SIZE, CHAT_CONTEXT_MESSAGES)
+    if overflow > 0:
+        del messages[:overflow]
+        st.session_state.chat_start = st.session_state.get("chat_start", 0) + overflow
+
 def initialize_chat():
-    """Initialize chat session state"""
+    """Initialize chat session state from the persisted transcript"""
+    if st.session_state.get("chat_user") != get_chat_user():
+        st.session_state.pop("messages", None)
+        st.session_state.chat_user = get_chat_user()
+
     if "messages" not in st.session_state:
-        st.session_state.messages = [
-            {
-                "role": "assistant",
-                "content": "Hello! I'm your research assistant. How can I help you today? You can ask me to explain research papers or anything else you're curious about!"
-            }
-        ]
+        messages, start = load_recent_messages(get_chat_user(), CHAT_PAGE_SIZE)
+        st.session_state.messages = messages
+        st.session_state.chat_start = start
+        if not messages:
+            add_message("assistant", GREETING)
+
+def load_older_messages():
+    """Prepend the previous page of messages to the loaded window"""
+    stop = st.session_state.chat_start
+    start = max(0, stop - CHAT_PAGE_SIZE)
+    older = load_messages(get_chat_user(), start, stop)
+    st.session_state.messages = older + st.session_state.messages
+    st.session_state.chat_start = start
 
 def get_groq_key():
     """Safely retrieve Groq API key"""
@@ -37,7 +73,7 @@ def setup_groq_client():
             logger.error("Missing or invalid Groq API key")
             return None
 
-        client = Groq(api_key=api_key)
+        client = groq.Groq(api_key=api_key)
         logger.info("Groq client initialized successfully")
         return client
     except Exception as e:
@@ -54,6 +90,11 @@ def main():
         initialize_chat()
 
         # Display chat history
+        if st.session_state.chat_start > 0:
+            if st.button(f"Load earlier messages ({st.session_state.chat_start} more)", key="load_more"):
+                load_older_messages()
+                st.rerun()
+
         for message in st.session_state.messages:
             with st.chat_message(message["role"]):
                 st.write(message["content"])
@@ -70,7 +111,7 @@ def main():
             logger.info("Received user input")
 
             # Add user message to chat history
-            st.session_state.messages.append({"role": "user", "content": user_input})
+            add_message("user", user_input)
 
             # Display user message
             with st.chat_message("user"):
@@ -80,23 +121,27 @@ def main():
             with st.chat_message("assistant"):
                 with st.spinner("Thinking..."):
                     try:
-                        chat_completion = client.chat.completions.create(
-                            messages=[
-                                {
-                                    "role": "system",
-                                    "content": "You are a helpful research assistant. Provide clear, concise explanations about research topics and papers when asked."
-                                },
-                                *st.session_state.messages
-                            ],
-                            model="deepseek-r1-distill-qwen-32b",
-                            stream=False,
-                        )
+                        with timer("chat.completion"):
+                            chat_completion = client.chat.completions.create(
+                                messages=[
+                                    {
+                                        "role": "system",
+                                        "content": "You are a helpful research assistant. Provide clear, concise explanations about research topics and papers when asked."
+                                    },
+                                    *[
+                                        {"role": m["role"], "content": m["content"]}
+                                        for m in st.session_state.messages[-CHAT_CONTEXT_MESSAGES:]
+                                    ]
+                                ],
+                                model="deepseek-r1-distill-qwen-32b",
+                                stream=False,
+                            )
                         response = chat_completion.choices[0].message.content
                         st.write(response)
                         logger.info("Generated response successfully")
 
                         # Add assistant response to chat history
-                        st.session_state.messages.append({"role": "assistant", "content": response})
+                        add_message("assistant", response)
                     except Exception as e:
                         error_msg = f"Error generating response: {str(e)}"
                         logger.error(error_msg)
@@ -104,16 +149,14 @@ def main():
                         # Provide fallback response
                         fallback_msg = "I apologize, but I'm having trouble generating a response right now. Please try again in a moment."
                         st.write(fallback_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": fallback_msg})
+                        add_message("assistant", fallback_msg)
 
         # Clear chat button
         if st.button("Clear Chat", key="clear_chat"):
-            st.session_state.messages = [
-                {
-                    "role": "assistant",
-                    "content": "Conversation cleared! How can I assist you now?"
-                }
-            ]
+            archive_chat(get_chat_user())
+            st.session_state.messages = []
+            st.session_state.chat_start = 0
+            add_message("assistant", "Conversation cleared! How can I assist you now?")
             logger.info("Chat history cleared")
             st.rerun()
 
@@ -125,4 +168,9 @@ def main():
             st.rerun()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profile_rerun(
+        "chat",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
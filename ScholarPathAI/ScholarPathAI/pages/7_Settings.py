@@ -1,25 +1,7 @@
 import streamlit as st
-import json
-from pathlib import Path
-
-def load_settings():
-    settings_path = Path("data/settings.json")
-    if settings_path.exists():
-        with open(settings_path, "r") as f:
-            return json.load(f)
-    return {
-        "citation_style": "APA",
-        "date_format": "%Y-%m-%d",
-        "default_analysis_plots": ["histogram", "box"],
-        "auto_save": True,
-        "notifications": True
-    }
-
-def save_settings(settings):
-    settings_path = Path("data/settings.json")
-    settings_path.parent.mkdir(exist_ok=True)
-    with open(settings_path, "w") as f:
-        json.dump(settings, f)
+from utils.citation_styles import CITATION_STYLES
+from utils.instrumentation import profile_rerun
+from utils.settings import DEFAULT_SETTINGS, load_settings, save_settings
 
 def main():
     st.title("⚙️ Settings")
@@ -30,8 +12,8 @@ def main():
     st.header("Citation Settings")
     settings['citation_style'] = st.selectbox(
         "Default Citation Style",
-        options=["APA", "MLA", "Chicago"],
-        index=["APA", "MLA", "Chicago"].index(settings.get('citation_style', "APA"))
+        options=CITATION_STYLES,
+        index=CITATION_STYLES.index(settings.get('citation_style', "APA"))
     )
     
     # Date Format Settings
@@ -68,16 +50,14 @@ def main():
     
     # Reset Settings
     if st.button("Reset to Defaults"):
-        settings = {
-            "citation_style": "APA",
-            "date_format": "%Y-%m-%d",
-            "default_analysis_plots": ["histogram", "box"],
-            "auto_save": True,
-            "notifications": True
-        }
-        save_settings(settings)
+        save_settings(DEFAULT_SETTINGS)
         st.success("Settings reset to defaults!")
         st.rerun()
 
 if __name__ == "__main__":
-    main()
+    with profile_rerun(
+        "settings",
+        enabled=st.session_state.get("profile_reruns", False),
+        use_pyinstrument=st.session_state.get("profile_with_pyinstrument", False)
+    ):
+        main()
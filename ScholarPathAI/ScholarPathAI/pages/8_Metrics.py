@@ -0,0 +1,102 @@
+import streamlit as st
+import os
+from datetime import datetime
+from utils.instrumentation import (
+    export_metrics_csv,
+    get_metrics_summary,
+    get_profiles,
+    get_samples,
+    reset_metrics
+)
+from utils.lazy_imports import lazy_import
+
+px = lazy_import("plotly.express")
+
+def is_admin():
+    """Check that a logged-in user is on the SCHOLARPATH_ADMINS allow-list; nobody is without one"""
+    if not st.session_state.get("logged_in"):
+        return False
+    admins = [name.strip() for name in os.environ.get("SCHOLARPATH_ADMINS", "").split(",") if name.strip()]
+    return st.session_state.get("username") in admins
+
+def operation_metrics():
+    st.header("Operation Timings")
+
+    summary = get_metrics_summary()
+    if summary.empty:
+        st.info("No timings recorded yet. Use the app and come back here.")
+        return
+
+    st.dataframe(summary.round(2), use_container_width=True, hide_index=True)
+
+    operation = st.selectbox("Latency histogram", options=summary['operation'].tolist())
+    if operation:
+        samples = get_samples(operation) * 1000
+        fig = px.histogram(x=samples, nbins=40, title=f"{operation} latency", labels={'x': 'ms'})
+        st.plotly_chart(fig)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Export Metrics (CSV)",
+            export_metrics_csv(),
+            f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            "text/csv",
+            use_container_width=True
+        )
+    with col2:
+        if st.button("Reset Metrics", use_container_width=True):
+            reset_metrics()
+            st.rerun()
+
+def rerun_profiles():
+    st.header("Rerun Profiles")
+
+    st.session_state.profile_reruns = st.toggle(
+        "Profile every rerun in this session",
+        value=st.session_state.get("profile_reruns", False),
+        help="Captures a cProfile report of each page rerun. Adds overhead while enabled."
+    )
+    st.session_state.profile_with_pyinstrument = st.toggle(
+        "Use pyinstrument",
+        value=st.session_state.get("profile_with_pyinstrument", False),
+        disabled=not st.session_state.profile_reruns,
+        help="Statistical call-tree profiles with lower overhead; falls back to cProfile if pyinstrument is not installed."
+    )
+
+    profiles = get_profiles()
+    if not profiles:
+        st.info("No profiles captured yet.")
+        return
+
+    for i, profile in enumerate(profiles):
+        with st.expander(f"{profile['timestamp']} · {profile['label']} · {profile['duration_ms']:.1f} ms"):
+            st.code(profile['report'], language=None)
+            st.download_button(
+                "Download",
+                profile['report'],
+                f"profile_{profile['label']}_{profile['timestamp']}.txt",
+                "text/plain",
+                key=f"profile_download_{i}"
+            )
+
+def main():
+    st.title("⏱️ Performance Metrics")
+
+    if not st.session_state.get("logged_in"):
+        st.warning("Please log in to view performance metrics.")
+        return
+    if not is_admin():
+        st.error("You do not have access to this page. Admins are listed in SCHOLARPATH_ADMINS.")
+        return
+
+    tab1, tab2 = st.tabs(["Timings", "Profiles"])
+
+    with tab1:
+        operation_metrics()
+
+    with tab2:
+        rerun_profiles()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import pytest
+
+from utils import citation_network, dashboard, db_storage, dedup, settings
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run a test from an empty directory so the relative data/ paths land there"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(db_storage, "DATABASE_URL", "sqlite:///data/scholarpath.db")
+    monkeypatch.setattr(db_storage, "_schema_ready", False)
+    monkeypatch.setattr(db_storage, "_titles", {})
+    # Caches keyed by relative path would otherwise leak between tests
+    monkeypatch.setattr(citation_network, "_networks", {})
+    monkeypatch.setattr(dedup, "_indexes", {})
+    monkeypatch.setattr(dashboard, "_cache", {})
+    monkeypatch.setattr(settings, "_cache", {})
+    monkeypatch.setattr(settings, "_pending", {})
+    return tmp_path
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from utils.analysis import perform_grouped_hypothesis_test, perform_hypothesis_test
+
+
+@pytest.fixture
+def groups():
+    rng = np.random.default_rng(0)
+    return pd.Series(rng.normal(0, 1, 200)), pd.Series(rng.normal(0.5, 1, 150))
+
+
+def test_plain_test_skips_resampling(groups):
+    result = perform_hypothesis_test(*groups, 't-test')
+    expected = stats.ttest_ind(*groups)
+    assert result['statistic'] == pytest.approx(expected.statistic)
+    assert result['p_value'] == pytest.approx(expected.pvalue)
+    assert 'ci_low' not in result and 'cohens_d' not in result
+
+
+def test_bootstrap_adds_interval_and_effect_sizes(groups):
+    result = perform_hypothesis_test(*groups, 'mann-whitney', 2_000, 0, bootstrap=True)
+    assert result['difference_of'] == 'median'
+    assert result['difference'] == pytest.approx(groups[0].median() - groups[1].median())
+    assert result['ci_low'] <= result['difference'] <= result['ci_high']
+    assert result['exact_support']
+    assert {'cohens_d', 'hedges_g', 'rank_biserial'} <= set(result)
+
+
+def test_grouped_test_merges_label_variants():
+    data = pd.DataFrame({
+        'score': [1.0, 2.0, 3.0, 10.0, 11.0, 12.0],
+        'arm': ["Control", "control ", "Control", "treated", "Treated", "treated"]
+    })
+    result = perform_grouped_hypothesis_test(data, 'score', 'arm', ["Control", "treated"], 'permutation', 2_000, 0)
+    assert result['statistic'] == pytest.approx(-9.0)
+    # 2 of the 20 relabellings are as extreme
+    assert result['p_value'] == pytest.approx(0.1, abs=0.02)
+
+
+def test_unknown_test_type(groups):
+    with pytest.raises(ValueError):
+        perform_hypothesis_test(*groups, 'anova')
@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils import analysis_store
+from utils.analysis_store import (compact_distribution_figure, delete_analysis_result, list_analysis_results,
+                                  load_analysis_result, results_for_report, save_analysis_result)
+
+
+def test_saved_result_round_trips(workdir):
+    table = pd.DataFrame({'mean': [1.23456789, 2.0], 'n': [10, 12]}, index=["a", "b"])
+    result_id = save_analysis_result(
+        "p1", "descriptive", "Scores", tables={'Summary': table},
+        values={'p_value': np.float64(0.0123), 'n': np.int64(22)}, username="alice"
+    )
+
+    artifact = load_analysis_result("p1", result_id, "alice")
+    assert artifact['kind'] == "descriptive" and artifact['project'] == "p1"
+    assert artifact['values'] == {'p_value': 0.0123, 'n': 22}
+    expected = table.assign(mean=[1.234568, 2.0])
+    pd.testing.assert_frame_equal(artifact['tables']['Summary'], expected)
+    assert load_analysis_result("p1", "missing", "alice") is None
+
+
+def test_results_are_listed_newest_first_and_deleted(workdir):
+    ids = [save_analysis_result("p1", "test", f"Run {i}", username="alice") for i in range(3)]
+    assert [entry['id'] for entry in list_analysis_results("p1", "alice")] == ids[::-1]
+
+    assert delete_analysis_result("p1", ids[1], "alice")
+    assert [entry['id'] for entry in list_analysis_results("p1", "alice")] == [ids[2], ids[0]]
+    assert list_analysis_results("other", "alice") == []
+
+
+def test_results_for_report_formats_sections(workdir):
+    figure = {'title': "Histogram", 'spec': "{}"}
+    result_id = save_analysis_result(
+        "p1", "test", "t-test", tables={'Groups': pd.Series([1.5, 2.5], name="mean")},
+        values={'statistic': 2.5, 'significant': True}, figures=[figure], username="alice"
+    )
+    sections, figures = results_for_report("p1", [result_id, "missing"], "alice")
+
+    (name, text), = sections.items()
+    assert name.startswith("t-test (")
+    assert "statistic: 2.5000" in text and "significant: True" in text and "Groups:" in text
+    assert figures == [figure]
+
+
+def test_compact_figures_do_not_store_raw_values():
+    series = pd.Series(np.random.default_rng(0).normal(size=100_000), name="score")
+    for plot_type in ("Histogram", "Box Plot"):
+        spec = compact_distribution_figure(series, plot_type, "Score")
+        assert len(spec) < 20_000
+        assert json.loads(spec)['layout']['title']['text'] == "Score"
+
+    box = json.loads(compact_distribution_figure(pd.Series([1.0, 2.0, 3.0, 4.0, 100.0]), "Box Plot", "Box"))
+    assert box['data'][0]['median'] == [3.0] and box['data'][0]['upperfence'] == [4.0]
+    empty = json.loads(compact_distribution_figure(pd.Series([None], dtype=float), "Histogram", "Empty"))
+    assert empty['layout']['title']['text'] == "Empty (no values)"
+
+
+def test_project_ids_cannot_leave_the_results_dir(workdir):
+    assert analysis_store._project_dir("../../etc", "alice").parent == analysis_store.results_dir("alice")
@@ -0,0 +1,60 @@
+import json
+import sys
+
+import pytest
+
+from benchmarks import run_benchmarks
+from benchmarks.synthetic import make_citations, make_numeric_dataset, make_projects
+
+
+@pytest.fixture
+def tiny(tmp_path, monkeypatch):
+    """Run the suite at a tiny scale against a throwaway baseline file"""
+    monkeypatch.setitem(run_benchmarks.SCALES, 'tiny', {'rows': 20, 'cells': 2000})
+    monkeypatch.setattr(run_benchmarks, "BASELINE_PATH", tmp_path / "baselines.json")
+    monkeypatch.setattr(run_benchmarks, "APP_DIR", tmp_path)
+
+    def run(*options):
+        monkeypatch.setattr(sys, "argv", ["run_benchmarks.py", "--scale", "tiny", "--repeats", "1", *options])
+        run_benchmarks.main()
+        return json.loads(run_benchmarks.BASELINE_PATH.read_text())['tiny']['results']
+    return run
+
+
+def test_synthetic_data_is_seeded():
+    assert make_citations(50).equals(make_citations(50))
+    assert not make_citations(50).equals(make_citations(50, seed=1))
+    assert len(make_projects(7)) == 7
+    data = make_numeric_dataset(2000)
+    assert data.drop(columns='group').size == 2000
+    assert set(data['group']) == {"control", "treatment"}
+
+
+def test_first_run_records_baseline_then_flags_regressions(tiny, capsys):
+    results = tiny("--only", "report", "storage")
+    assert set(results) == {name for name, _, _, _ in run_benchmarks.build_cases('tiny', ["report", "storage"])}
+    assert "NEW BASELINE" in capsys.readouterr().out
+
+    # A baseline far faster than any real run makes every case a regression
+    baselines = json.loads(run_benchmarks.BASELINE_PATH.read_text())
+    for result in baselines['tiny']['results'].values():
+        result['median_ms'] = 1e-6
+    run_benchmarks.BASELINE_PATH.write_text(json.dumps(baselines))
+    with pytest.raises(SystemExit) as exit_info:
+        tiny("--only", "report")
+    assert exit_info.value.code == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+    # Re-recording still reports the regression but replaces the baseline for the cases that ran
+    with pytest.raises(SystemExit):
+        tiny("--only", "report", "--update-baseline")
+    results = json.loads(run_benchmarks.BASELINE_PATH.read_text())['tiny']['results']
+    assert results['report.generate_research_report']['median_ms'] > 1e-6
+    assert results['storage.load_citations']['median_ms'] == 1e-6
+
+
+def test_every_analysis_case_runs(tiny):
+    results = tiny("--only", "analysis")
+    assert len(results) == 7
+    for result in results.values():
+        assert result['median_ms'] > 0 and result['peak_memory_mb'] >= 0
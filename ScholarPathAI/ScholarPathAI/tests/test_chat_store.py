@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from utils import chat_store
+from utils.chat_store import append_message, archive_chat, count_messages, load_messages, load_recent_messages
+
+
+@pytest.fixture
+def chat(workdir):
+    for i in range(5):
+        append_message("alice", "user", f"message {i}")
+    return chat_store._chat_paths("alice")
+
+
+def _contents(messages):
+    return [message['content'] for message in messages]
+
+
+def test_paging(chat):
+    assert count_messages("alice") == 5
+    assert _contents(load_messages("alice", 1, 3)) == ["message 1", "message 2"]
+    assert _contents(load_messages("alice", 3, 100)) == ["message 3", "message 4"]
+    assert load_messages("alice", 5, 10) == []
+    messages, start = load_recent_messages("alice", 2)
+    assert start == 3 and _contents(messages) == ["message 3", "message 4"]
+
+
+def test_users_are_separate(chat):
+    assert count_messages("bob") == 0
+    assert load_messages("bob", 0, 10) == []
+
+
+def test_index_rebuilt_after_crash_before_index_write(chat):
+    log_path, _ = chat
+    with open(log_path, "ab") as log:
+        log.write(b'{"role": "user", "content": "unindexed"}\n')
+    assert _contents(load_messages("alice", 4, 6)) == ["message 4", "unindexed"]
+    assert count_messages("alice") == 6
+
+
+def test_partial_line_is_dropped(chat):
+    log_path, _ = chat
+    with open(log_path, "ab") as log:
+        log.write(b'{"role": "user", "cont')
+    append_message("alice", "user", "after crash")
+    assert _contents(load_messages("alice", 4, 10)) == ["message 4", "after crash"]
+
+
+def test_index_past_end_of_transcript(chat):
+    log_path, idx_path = chat
+    with open(idx_path, "ab") as idx:
+        idx.write(chat_store._OFFSET.pack(log_path.stat().st_size + 100))
+        idx.write(b"\0\0")
+    assert _contents(load_messages("alice", 0, 10)) == [f"message {i}" for i in range(5)]
+
+
+def test_concurrent_appends_keep_index_consistent(workdir):
+    def write(worker):
+        for i in range(25):
+            append_message("carol", "user", f"{worker}-{i}")
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert count_messages("carol") == 100
+    contents = _contents(load_messages("carol", 0, 100))
+    assert sorted(contents) == sorted(f"{w}-{i}" for w in range(4) for i in range(25))
+    assert _contents(load_messages("carol", 50, 51)) == [contents[50]]
+
+
+def test_archive_starts_a_new_conversation(chat):
+    assert archive_chat("alice")
+    assert count_messages("alice") == 0
+    append_message("alice", "assistant", "hello again")
+    assert _contents(load_messages("alice", 0, 10)) == ["hello again"]
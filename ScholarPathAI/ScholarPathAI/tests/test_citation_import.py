@@ -0,0 +1,157 @@
+import io
+import json
+
+import pytest
+
+from utils.citation_import import (detect_format, import_citations, normalize_citation, parse_bibtex,
+                                   parse_csl_json, parse_ris)
+from utils.storage import load_citations
+
+BIBTEX = r"""
+% A comment line outside any entry
+@comment{ignored}
+@article{lovelace1843,
+  author = {Lovelace, Ada and Charles Babbage},
+  title = {Notes on the {Analytical} Engine},
+  journal = "Scientific Memoirs",
+  year = 1843,
+  doi = {https://doi.org/10.1000/ABC}
+}
+@inproceedings{turing1950,
+  author = {Turing, Alan},
+  title = {Computing Machinery and Intelligence \& {\"U}ber},
+  booktitle = {Mind},
+  year = {1950}
+}
+@misc{untitled, year = {2001}}
+"""
+
+RIS = """TY  - JOUR
+AU  - Hopper, Grace
+AU  - Lovelace, Ada
+TI  - Compilers for everyone
+JO  - Computing Journal
+PY  - 1952/05/01
+DO  - doi:10.1000/XYZ
+ER  - 
+TY  - BOOK
+TI  - Second record
+"""
+
+CSL = [
+    {'id': "a", 'title': "Graph methods", 'author': [{'given': "Edsger", 'family': "Dijkstra"}, {'literal': "ACM"}],
+     'issued': {'date-parts': [[1959, 1]]}, 'container-title': ["Numerische Mathematik"], 'DOI': "10.1000/GRAPH"},
+    {'id': "b", 'title': "Raw year", 'issued': {'raw': "circa 1970"}, 'container-title': "Letters"},
+    {'id': "c"}
+]
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("refs.bib", 'bibtex'), ("REFS.BibTeX", 'bibtex'), ("export.ris", 'ris'), ("zotero.json", 'csl-json')
+])
+def test_detect_format(filename, expected):
+    assert detect_format(filename) == expected
+
+
+def test_detect_format_rejects_unknown_extension():
+    with pytest.raises(ValueError):
+        detect_format("refs.txt")
+
+
+def test_parse_bibtex_reads_entries_and_skips_comments():
+    entries = list(parse_bibtex(io.StringIO(BIBTEX)))
+    assert [entry['key'] for entry in entries] == ["lovelace1843", "turing1950", "untitled"]
+
+    first = entries[0]
+    assert first['type'] == "article"
+    assert first['title'] == "Notes on the Analytical Engine"
+    assert first['journal'] == "Scientific Memoirs"
+    assert first['year'] == "1843"
+    assert entries[1]['title'] == "Computing Machinery and Intelligence & Uber"
+
+
+def test_normalize_bibtex_citation():
+    entries = list(parse_bibtex(io.StringIO(BIBTEX)))
+    citation, error = normalize_citation(entries[0], 'bibtex', project="Thesis", project_id="p1")
+    assert error is None
+    assert citation == {
+        'title': "Notes on the Analytical Engine",
+        'authors': "Ada Lovelace, Charles Babbage",
+        'year': 1843,
+        'journal': "Scientific Memoirs",
+        'doi': "10.1000/abc",
+        'project': "Thesis",
+        'project_id': "p1"
+    }
+    # booktitle stands in for a missing journal
+    assert normalize_citation(entries[1], 'bibtex')[0]['journal'] == "Mind"
+
+    citation, error = normalize_citation(entries[2], 'bibtex')
+    assert citation is None and "untitled" in error
+
+
+def test_parse_ris_groups_records():
+    records = list(parse_ris(io.StringIO(RIS)))
+    assert len(records) == 2
+    assert records[0]['authors'] == ["Hopper, Grace", "Lovelace, Ada"]
+    # A trailing record without ER is still yielded
+    assert records[1] == {'type': "BOOK", 'title': "Second record"}
+
+    citation, error = normalize_citation(records[0], 'ris')
+    assert error is None
+    assert citation['authors'] == "Grace Hopper, Ada Lovelace"
+    assert citation['year'] == 1952
+    assert citation['journal'] == "Computing Journal"
+    assert citation['doi'] == "10.1000/xyz"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_parse_csl_json_streams_in_chunks(chunk_size):
+    items = list(parse_csl_json(io.StringIO(json.dumps(CSL)), chunk_size=chunk_size))
+    assert items == CSL
+
+
+def test_parse_csl_json_accepts_single_item():
+    assert list(parse_csl_json(io.StringIO(json.dumps(CSL[0])))) == [CSL[0]]
+
+
+def test_parse_csl_json_reports_truncated_input():
+    text = json.dumps(CSL)[:-40]
+    items = list(parse_csl_json(io.StringIO(text), chunk_size=16))
+    assert items[0] == CSL[0]
+    assert '_error' in items[-1]
+
+
+def test_normalize_csl_citation():
+    citation, error = normalize_citation(CSL[0], 'csl-json')
+    assert error is None
+    assert citation['authors'] == "Edsger Dijkstra, ACM"
+    assert citation['year'] == 1959
+    assert citation['journal'] == "Numerische Mathematik"
+    assert citation['doi'] == "10.1000/graph"
+
+    citation, _ = normalize_citation(CSL[1], 'csl-json')
+    assert citation['year'] == 1970 and citation['journal'] == "Letters"
+    assert normalize_citation(CSL[2], 'csl-json')[0] is None
+
+
+def test_import_citations_batches_and_skips_duplicates(workdir):
+    progress = []
+    stream = io.BytesIO(json.dumps(CSL + [CSL[0]]).encode("utf-8"))
+    summary = import_citations(stream, 'csl-json', project="Thesis", batch_size=1, username="alice",
+                               progress=lambda fraction, imported: progress.append((fraction, imported)))
+
+    assert summary['imported'] == 2
+    assert summary['duplicates'] == 1
+    assert summary['rejected'] == 1 and len(summary['errors']) == 1
+    assert progress[-1] == (1.0, 2)
+    assert not stream.closed
+
+    citations = load_citations("alice")
+    assert list(citations['title']) == ["Graph methods", "Raw year"]
+    assert set(citations['project']) == {"Thesis"}
+
+
+def test_import_citations_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        import_citations(io.BytesIO(b""), 'endnote')
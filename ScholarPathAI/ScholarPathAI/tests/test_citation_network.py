@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import citation_network, storage
+from utils.citation_network import build_network, get_network, split_authors
+
+CITATIONS = [
+    {'title': "P1", 'authors': "Ada Lovelace; Charles Babbage", 'journal': "Engines"},
+    {'title': "P2", 'authors': "Charles Babbage and Ada  Lovelace", 'journal': "Engines"},
+    {'title': "P3", 'authors': "Grace Hopper", 'journal': "Compilers"},
+    {'title': "P4", 'authors': "ada lovelace, Grace Hopper", 'journal': None}
+]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(citation_network, "_networks", {})
+
+
+def test_split_authors():
+    names = split_authors(pd.Series(["A One; B Two", "C Three and D Four", "E Five, F Six", None]))
+    assert names.tolist() == ["A One", "B Two", "C Three", "D Four", "E Five", "F Six"]
+    assert names.index.tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_analyze_counts_authors_and_collaborations():
+    network = build_network(pd.DataFrame(CITATIONS))
+    analysis = network.analyze()
+    assert analysis['summary'] == {
+        'papers': 4, 'authors': 3, 'venues': 2, 'collaborations': 2, 'components': 1, 'largest_component': 3
+    }
+    authors = analysis['authors'].set_index('author')
+    assert authors.loc["Ada Lovelace", 'papers'] == 3
+    assert authors.loc["Charles Babbage", 'collaborations'] == 2
+    assert analysis['authors']['pagerank'].sum() == pytest.approx(1.0)
+    venues = analysis['venues'].set_index('venue')
+    assert venues.loc["Engines", 'papers'] == 2 and venues.loc["Engines", 'authors'] == 2
+
+
+def test_appended_rows_match_a_full_build(workdir):
+    storage.save_citations_batch(CITATIONS[:2], "alice")
+    first = get_network("alice")
+    assert get_network("alice") is first
+
+    storage.save_citations_batch(CITATIONS[2:], "alice")
+    updated = get_network("alice")
+    # The cached network other sessions hold is left untouched
+    assert first.papers == 2 and len(first.authors) == 2
+    expected = build_network(pd.DataFrame(CITATIONS)).analyze()
+    analysis = updated.analyze()
+    assert analysis['summary'] == expected['summary']
+    pd.testing.assert_frame_equal(analysis['authors'], expected['authors'])
+
+
+def test_rows_appended_while_indexing_are_picked_up(workdir, monkeypatch):
+    storage.save_citations_batch(CITATIONS[:1], "alice")
+    build = citation_network.build_network
+
+    def build_then_append(citations):
+        network = build(citations)
+        # Another session appends after the file was read
+        storage.save_citations_batch(CITATIONS[1:2], "alice")
+        return network
+
+    monkeypatch.setattr(citation_network, "build_network", build_then_append)
+    assert get_network("alice").papers == 1
+    assert get_network("alice").papers == 2
+
+
+def test_rewritten_file_is_rebuilt(workdir):
+    storage.save_citations_batch(CITATIONS[:2], "alice")
+    assert get_network("alice").papers == 2
+    pd.DataFrame(CITATIONS[2:]).to_csv(storage.citations_path("alice"), index=False)
+    network = get_network("alice")
+    assert network.papers == 2
+    assert sorted(network.authors.names) == ["Grace Hopper", "ada lovelace"]
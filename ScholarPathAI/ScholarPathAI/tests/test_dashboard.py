@@ -0,0 +1,57 @@
+import json
+
+from utils import dashboard, storage
+
+
+def _without_activity(summary):
+    return {key: value for key, value in summary.items() if key != 'activity'}
+
+
+def test_incremental_updates_match_a_rebuild(workdir):
+    storage.initialize_storage("alice")
+    first = storage.save_project({'title': "First", 'status': "Active", 'analysis_progress': 0.5}, "alice")
+    second = storage.save_project({'title': "Second", 'status': "Planning"}, "alice")
+    storage.save_citations_batch([
+        {'title': "A", 'project_id': first}, {'title': "B", 'project_id': first}, {'title': "C", 'project_id': None}
+    ], "alice")
+    storage.update_project(second, {'reporting_progress': 2.0}, "alice")
+    storage.delete_project(first, "alice")
+
+    incremental = json.loads(json.dumps(dashboard.get_dashboard("alice")))
+    assert incremental['citations_total'] == 3
+    assert incremental['projects'][second]['progress']['reporting_progress'] == 1.0
+    assert first not in incremental['projects']
+
+    dashboard._cache.clear()
+    assert _without_activity(dashboard.rebuild_summary("alice")) == _without_activity(incremental)
+
+
+def test_citation_counts_per_project(workdir):
+    project_id = storage.save_project({'title': "Thesis"}, "alice")
+    storage.save_citations_batch([{'title': "A", 'project_id': project_id}], "alice")
+    storage.save_citation({'title': "B", 'project_id': project_id}, "alice")
+    assert dashboard.get_project_summary(project_id, "alice")['citations'] == 2
+    assert dashboard.get_project_summary("missing", "alice") is None
+
+
+def test_summary_is_read_from_disk_once(workdir):
+    storage.save_project({'title': "Thesis"}, "alice")
+    dashboard._cache.clear()
+    summary = dashboard.get_dashboard("alice")
+    assert summary['projects'] and dashboard.get_dashboard("alice") is summary
+
+
+def test_outdated_summary_is_rebuilt(workdir):
+    project_id = storage.save_project({'title': "Thesis"}, "alice")
+    path = dashboard._summary_path("alice")
+    path.write_text(json.dumps({'version': dashboard.SUMMARY_VERSION - 1, 'projects': {}}))
+    dashboard._cache.clear()
+    assert project_id in dashboard.get_dashboard("alice")['projects']
+
+
+def test_activity_feed_is_capped(workdir):
+    for i in range(dashboard.MAX_ACTIVITY + 5):
+        dashboard.record_activity("note", f"Entry {i}", "alice")
+    activity = dashboard.get_dashboard("alice")['activity']
+    assert len(activity) == dashboard.MAX_ACTIVITY
+    assert activity[0]['text'] == f"Entry {dashboard.MAX_ACTIVITY + 4}"
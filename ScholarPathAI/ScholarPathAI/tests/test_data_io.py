@@ -0,0 +1,74 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+from utils import data_io
+
+FRAME = pd.DataFrame({'id': range(10), 'score': [x / 2 for x in range(10)], 'group': list("ababababab")})
+
+
+def _write(path, file_format):
+    if file_format == "csv":
+        FRAME.to_csv(path, index=False)
+    elif file_format == "gz":
+        with gzip.open(path, "wt") as f:
+            FRAME.to_csv(f, index=False)
+    elif file_format == "parquet":
+        # Small row groups so reads have to cross group boundaries
+        FRAME.to_parquet(path, index=False, row_group_size=3)
+    elif file_format == "feather":
+        FRAME.to_feather(path)
+    else:
+        FRAME.to_excel(path, index=False)
+
+
+@pytest.mark.parametrize("name, file_format", [
+    ("data.csv", "csv"), ("data.csv.gz", "gz"), ("data.parquet", "parquet"),
+    ("data.feather", "feather"), ("data.xlsx", "excel")
+])
+def test_load_dataset_reads_selected_columns_and_rows(tmp_path, name, file_format):
+    path = tmp_path / name
+    _write(path, file_format)
+
+    pd.testing.assert_frame_equal(data_io.load_dataset(path), FRAME, check_dtype=False)
+    subset = data_io.load_dataset(path, columns=['score', 'id'], nrows=5)
+    assert sorted(subset.columns) == ['id', 'score']
+    assert list(subset['id']) == [0, 1, 2, 3, 4]
+
+    schema = data_io.read_schema(path)
+    assert list(schema['columns']) == ['id', 'score', 'group']
+    assert schema['rows'] == (10 if file_format in ("parquet", "feather") else None)
+
+
+def test_detect_format():
+    assert data_io.detect_format("survey.CSV") == "csv"
+    assert data_io.detect_format("survey.csv.zst") == "csv"
+    assert data_io.detect_format("survey.arrow") == "feather"
+    with pytest.raises(ValueError):
+        data_io.detect_format("survey.sav")
+
+
+def _upload(name, content):
+    uploaded = io.BytesIO(content)
+    uploaded.name = name
+    uploaded.read()
+    return uploaded
+
+
+def test_save_upload_keeps_existing_datasets(workdir):
+    first = data_io.save_upload(_upload("my survey.csv.gz", b"first"), "alice")
+    second = data_io.save_upload(_upload("my survey.csv.gz", b"second"), "alice")
+    assert first.name == "my_survey.csv.gz"
+    assert second.name == "my_survey-1.csv.gz"
+    assert first.read_bytes() == b"first" and second.read_bytes() == b"second"
+
+    assert set(data_io.list_datasets("alice")) == {first, second}
+    assert data_io.delete_dataset(first)
+    assert data_io.list_datasets("alice") == [second]
+
+
+def test_save_upload_cannot_leave_the_datasets_dir(workdir):
+    path = data_io.save_upload(_upload("../../escape.csv", b"x"), "alice")
+    assert path.parent == data_io.datasets_dir("alice")
@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+
+from utils import db_storage, storage
+
+
+def test_citation_titles_follow_the_library(workdir):
+    storage.save_citations_batch([{'title': "First"}, {'title': None}, {'title': "Second"}], "alice")
+    titles = db_storage.citation_titles("alice")
+    assert titles == ["First", "Second"]
+    # Unchanged library: served from the cache
+    assert db_storage.citation_titles("alice") is titles
+
+    storage.save_citations_batch([{'title': "Third"}], "alice")
+    assert db_storage.citation_titles("alice") == ["First", "Second", "Third"]
+    assert db_storage.citation_titles("bob") == []
+
+
+def test_query_citations_by_project(workdir):
+    storage.save_citations_batch([
+        {'title': "A", 'project_id': "p1"},
+        {'title': "B", 'project_id': "p2"},
+        {'title': "C", 'project_id': "p1"}
+    ], "alice")
+    rows = db_storage.query_citations({'project_id': ["p1"]}, page_size=None, username="alice")
+    assert rows['title'].tolist() == ["A", "C"]
+    assert db_storage.count_citations({'project_id': ["p2"]}, username="alice") == 1
+
+
+CITATIONS = [
+    {'title': "Deep learning", 'authors': "Ada Lovelace", 'year': 2020, 'journal': "Nature"},
+    {'title': "100% accuracy_claims", 'authors': "Alan Turing", 'year': 2021, 'journal': None},
+    {'title': "Shallow learning", 'authors': "Grace Hopper", 'year': 2020, 'journal': "Science"},
+    {'title': "Learning rates", 'authors': "Ada Byron", 'year': None, 'journal': "Nature"},
+    {'title': "Unrelated", 'authors': "Edsger Dijkstra", 'year': 2022, 'journal': "Nature"}
+]
+
+
+def test_filters_search_and_pages(workdir):
+    storage.save_citations_batch(CITATIONS, "alice")
+
+    assert db_storage.query_citations({'year': [2020]}, username="alice")['title'].tolist() == [
+        "Deep learning", "Shallow learning"
+    ]
+    # None matches missing values alongside the listed ones
+    assert db_storage.query_citations({'journal': ["Science", None]}, username="alice")['title'].tolist() == [
+        "100% accuracy_claims", "Shallow learning"
+    ]
+    assert db_storage.count_citations(search="ADA", username="alice") == 2
+    assert db_storage.count_citations(search="learning", username="alice") == 3
+    # LIKE wildcards in the search are matched literally
+    assert db_storage.count_citations(search="0%", username="alice") == 1
+    assert db_storage.count_citations(search="y_c", username="alice") == 1
+    assert db_storage.count_citations(search="g_r", username="alice") == 0
+
+    pages = [db_storage.query_citations(page=page, page_size=2, username="alice") for page in range(3)]
+    assert [list(page.index) for page in pages] == [[0, 1], [2, 3], [4]]
+    assert db_storage.count_citations(username="bob") == 0
+
+
+def test_facets_ignore_their_own_filter(workdir):
+    storage.save_citations_batch(CITATIONS, "alice")
+    facets = db_storage.citation_facets('journal', {'journal': ["Science"], 'year': [2020, 2022]}, username="alice")
+    assert facets.values.tolist() == [["Nature", 2], ["Science", 1]]
+    with pytest.raises(ValueError):
+        db_storage.citation_facets('title', username="alice")
+    with pytest.raises(ValueError):
+        db_storage.query_citations({'title': ["x"]}, username="alice")
+
+
+def test_iter_citations_uses_keyset_batches(workdir):
+    storage.save_citations_batch([{'title': f"Paper {i}"} for i in range(7)], "alice")
+    batches = list(db_storage.iter_citations(search="paper", batch_size=3, username="alice"))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [title for batch in batches for title in batch['title']] == [f"Paper {i}" for i in range(7)]
+
+
+def test_external_rewrites_are_reloaded(workdir):
+    storage.save_citations_batch(CITATIONS, "alice")
+    assert db_storage.count_citations(username="alice") == 5
+    pd.DataFrame(CITATIONS[:2]).to_csv(storage.citations_path("alice"), index=False)
+    assert db_storage.count_citations(username="alice") == 2
+    assert not db_storage.sync_citations("alice")
+    assert db_storage.sync_citations("alice", force=True)
+
+
+def test_query_projects(workdir):
+    ids = [
+        storage.save_project({'title': title, 'status': status, 'created_date': created}, "alice")
+        for title, status, created in [
+            ("Sleep study", "Active", "2024-01-01"),
+            ("Heat study", "Planning", "2024-03-01"),
+            ("Sleep follow-up", "Active", "2024-02-01")
+        ]
+    ]
+    projects, total = db_storage.query_projects(username="alice")
+    assert total == 3 and projects['title'].tolist() == ["Heat study", "Sleep follow-up", "Sleep study"]
+
+    projects, total = db_storage.query_projects(status=["Active"], search="sleep", page=1, page_size=1, username="alice")
+    assert total == 2 and projects['title'].tolist() == ["Sleep study"]
+    assert db_storage.project_statuses(username="alice") == {'Active': 2, 'Planning': 1}
+
+    storage.update_project(ids[1], {'status': "Completed"}, "alice")
+    storage.delete_project(ids[0], "alice")
+    assert db_storage.project_statuses(username="alice") == {'Active': 1, 'Completed': 1}
+    assert db_storage.project_statuses(search="heat", username="alice") == {'Completed': 1}
@@ -0,0 +1,82 @@
+import pandas as pd
+
+from utils import dedup
+from utils.dedup import (CitationIndex, add_citation_checked, find_duplicate_groups, normalize_doi, normalize_title,
+                         remove_duplicates, save_unique_citations)
+from utils.storage import load_citations
+
+
+def test_normalize_doi_and_title():
+    assert normalize_doi(" https://dx.doi.org/10.1000/ABC ") == "10.1000/abc"
+    assert normalize_doi("doi: 10.1/X") == "10.1/x"
+    assert normalize_doi(float("nan")) == ""
+    assert normalize_title("Deep   Learning: A Review!") == "deep learning a review"
+
+
+def test_index_matches_doi_and_similar_titles_within_a_project():
+    index = CitationIndex()
+    index.add({'title': "Attention is all you need", 'authors': "Ashish Vaswani", 'doi': "10.1/attn", 'project_id': "p1"})
+
+    by_doi = index.matches({'title': "Something else", 'doi': "https://doi.org/10.1/ATTN", 'project_id': "p1"})
+    assert [(position, reason) for position, reason, _ in by_doi] == [(0, "doi")]
+
+    by_title = index.matches({'title': "Attention Is All You Need.", 'authors': "A. Vaswani", 'project_id': "p1"})
+    assert [(position, reason) for position, reason, _ in by_title] == [(0, "title")]
+
+    # Same paper cited in another project, or by different authors, is not a duplicate
+    assert index.matches({'title': "Attention is all you need", 'project_id': "p2"}) == []
+    assert index.matches({'title': "Attention is all you need", 'authors': "Jane Doe", 'project_id': "p1"}) == []
+    assert index.matches({'title': "A survey of graph neural networks", 'project_id': "p1"}) == []
+
+
+def test_project_ids_read_back_as_numbers_share_a_scope():
+    index = CitationIndex()
+    index.add({'title': "Paper", 'doi': "10.1/x", 'project_id': 12.0})
+    assert index.matches({'title': "Paper", 'doi': "10.1/x", 'project_id': "12"})
+
+
+def test_find_duplicate_groups_is_transitive():
+    citations = pd.DataFrame([
+        {'title': "Graph neural networks: a review", 'doi': "10.1/gnn"},
+        {'title': "Unrelated work on proteins", 'doi': None},
+        {'title': "Graph Neural Networks - A Review", 'doi': None},
+        {'title': "Other title", 'doi': "10.1/GNN"}
+    ])
+    assert sorted(sorted(group) for group in find_duplicate_groups(citations)) == [[0, 2, 3]]
+
+
+def test_save_unique_citations_skips_library_and_batch_duplicates(workdir):
+    assert save_unique_citations([{'title': "First paper", 'doi': "10.1/a"}], "alice") == (1, 0)
+    saved, duplicates = save_unique_citations([
+        {'title': "First Paper", 'doi': None},
+        {'title': "Second paper", 'doi': "10.1/b"},
+        {'title': "Different", 'doi': "10.1/B"}
+    ], "alice")
+    assert (saved, duplicates) == (1, 2)
+    assert list(load_citations("alice")['title']) == ["First paper", "Second paper"]
+
+
+def test_add_citation_checked_reports_duplicates(workdir):
+    assert add_citation_checked({'title': "First paper"}, username="alice") == (True, [])
+    saved, duplicates = add_citation_checked({'title': "First paper"}, username="alice")
+    assert not saved and duplicates[0]['reason'] == "title"
+    saved, _ = add_citation_checked({'title': "First paper"}, force=True, username="alice")
+    assert saved and len(load_citations("alice")) == 2
+
+
+def test_index_follows_external_changes(workdir):
+    save_unique_citations([{'title': "First paper"}], "alice")
+    pd.DataFrame([{'title': "Replaced library"}]).to_csv(dedup.citations_path("alice"), index=False)
+    assert dedup.find_duplicates({'title': "First paper"}, "alice") == []
+
+
+def test_remove_duplicates_keeps_most_complete_entry(workdir):
+    add_citation_checked({'title': "Graph neural networks", 'doi': "10.1/gnn"}, username="alice")
+    add_citation_checked({'title': "Graph Neural Networks", 'doi': "10.1/gnn", 'journal': "Nature", 'year': 2020},
+                         force=True, username="alice")
+    add_citation_checked({'title': "Another paper"}, username="alice")
+
+    assert remove_duplicates("alice") == 1
+    citations = load_citations("alice")
+    assert list(citations['title']) == ["Graph Neural Networks", "Another paper"]
+    assert remove_duplicates("alice") == 0
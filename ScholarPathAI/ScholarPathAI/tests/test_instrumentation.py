@@ -0,0 +1,71 @@
+import pytest
+
+from utils import instrumentation
+from utils.instrumentation import (export_metrics_csv, get_metrics_summary, get_profiles, get_samples, profile_rerun,
+                                   record_timing, reset_metrics, timed, timer)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+def test_summary_percentiles():
+    for ms in range(1, 101):
+        record_timing("op", ms / 1000)
+    row = get_metrics_summary().set_index('operation').loc['op']
+    assert row['calls'] == 100
+    assert row['mean_ms'] == pytest.approx(50.5)
+    assert row['p50_ms'] == pytest.approx(50.5)
+    assert row['p95_ms'] == pytest.approx(95.05)
+    assert row['max_ms'] == pytest.approx(100)
+    assert export_metrics_csv().splitlines()[0] == "operation,calls,mean_ms,p50_ms,p95_ms,p99_ms,max_ms"
+
+
+def test_samples_are_capped_but_calls_are_counted():
+    for i in range(instrumentation.MAX_SAMPLES + 10):
+        record_timing("busy", 0.001)
+    assert len(get_samples("busy")) == instrumentation.MAX_SAMPLES
+    assert get_metrics_summary().loc[0, 'calls'] == instrumentation.MAX_SAMPLES + 10
+
+
+def test_timed_records_failures_too():
+    @timed("custom")
+    def fail():
+        raise RuntimeError("boom")
+
+    @timed()
+    def succeed(x):
+        return x + 1
+
+    with pytest.raises(RuntimeError):
+        fail()
+    assert succeed(1) == 2
+    assert len(get_samples("custom")) == 1
+    assert len(get_samples(f"{__name__}.succeed")) == 1
+    assert succeed.__name__ == "succeed"
+
+    with timer("block"):
+        pass
+    assert len(get_samples("block")) == 1
+
+
+def test_profile_rerun():
+    with profile_rerun("Home"):
+        pass
+    assert get_profiles() == []
+    assert len(get_samples("rerun.Home")) == 1
+
+    with profile_rerun("Home", enabled=True):
+        sum(range(1000))
+    (profile,) = get_profiles()
+    assert profile['label'] == "Home" and profile['profiler'] == "cprofile"
+    assert "function calls" in profile['report']
+
+
+def test_empty_summary_has_columns():
+    assert list(get_metrics_summary().columns) == [
+        'operation', 'calls', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'
+    ]
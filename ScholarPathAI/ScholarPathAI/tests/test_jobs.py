@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import jobs, parallel
+from utils.jobs import cancel_job, get_job, get_job_result, list_jobs, report_progress, submit_job
+
+
+def _square(x):
+    return x * x
+
+
+def _fail():
+    raise ValueError("bad input")
+
+
+def _wait_for_cancel():
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        report_progress(0.5, "Waiting")
+        time.sleep(0.05)
+    return "not cancelled"
+
+
+@pytest.fixture
+def pool(workdir):
+    yield
+    parallel.reset_process_pool(wait=True)
+
+
+def _wait(job_id, status=("pending", "running"), timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        if job['status'] not in status:
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_finished_jobs_are_reused_by_key(pool):
+    job_id = submit_job("square", _square, 7)
+    job = _wait(job_id)
+    assert job['status'] == "done" and job['progress'] == 1.0
+    assert get_job_result(job_id) == 49
+
+    assert submit_job("square", _square, 7) == job_id
+    assert submit_job("square", _square, 8) != job_id
+    assert submit_job("square", _square, 9, key="nine") == submit_job("square", _square, 10, key="nine")
+
+    # Without its result file the job runs again
+    jobs.discard_job_result(job_id)
+    assert get_job_result(job_id) is None
+    assert submit_job("square", _square, 7) != job_id
+
+
+def test_failed_job_records_the_error(pool):
+    job = _wait(submit_job("fail", _fail))
+    assert job['status'] == "failed"
+    assert job['error'] == "ValueError: bad input"
+    assert get_job_result(job['id']) is None
+
+
+def test_running_job_stops_at_its_next_progress_report(pool):
+    job_id = submit_job("wait", _wait_for_cancel)
+    _wait(job_id, status=("pending",))
+    assert cancel_job(job_id)
+    assert _wait(job_id, status=("pending", "running"))['status'] == "cancelled"
+    assert [job['id'] for job in list_jobs()] == [job_id]
+
+
+def test_report_progress_outside_a_job_does_nothing():
+    report_progress(0.5, "Inline")
+
+
+def _insert(db_path, job_id, status, submitted, owner_pid=None, result_path=None):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, key, status, result_path, submitted, owner_pid, owner_boot) "
+            "VALUES (?, 'test', ?, ?, ?, ?, ?, ?)",
+            (job_id, job_id, status, result_path, submitted.isoformat(), owner_pid, jobs.BOOT_ID)
+        )
+
+
+def test_jobs_of_a_dead_server_are_marked_interrupted(workdir):
+    db_path = jobs._db_path()
+    dead_pid = os.getpid() + 1_000_000
+    _insert(db_path, "orphan", "running", datetime.now(), owner_pid=dead_pid)
+    _insert(db_path, "queued", "pending", datetime.now(), owner_pid=os.getpid())
+
+    for job_id in ("orphan", "queued"):
+        job = get_job(job_id)
+        assert job['status'] == "failed" and job['error'] == "Server restarted"
+    assert get_job("missing") is None
+
+
+def test_purge_removes_expired_jobs_results_and_artifacts(workdir):
+    db_path = jobs._db_path()
+    old = datetime.now() - timedelta(days=jobs.JOB_TTL_DAYS + 1)
+    result = db_path.parent / "old.pkl"
+    result.write_bytes(b"result")
+    _insert(db_path, "old", "done", old, result_path=str(result))
+    _insert(db_path, "old-running", "running", old)
+    _insert(db_path, "recent", "done", datetime.now())
+    artifacts = db_path.parent / "artifacts"
+    artifacts.mkdir()
+    (artifacts / "stale.pdf").write_bytes(b"pdf")
+    os.utime(artifacts / "stale.pdf", (old.timestamp(), old.timestamp()))
+    (artifacts / "fresh.pdf").write_bytes(b"pdf")
+
+    assert jobs._purge_expired_jobs(db_path) == 1
+    with sqlite3.connect(db_path) as conn:
+        remaining = {row[0] for row in conn.execute("SELECT id FROM jobs")}
+    assert remaining == {"old-running", "recent"}
+    assert not result.exists()
+    assert [path.name for path in artifacts.iterdir()] == ["fresh.pdf"]
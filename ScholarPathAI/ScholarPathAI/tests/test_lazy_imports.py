@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+from utils.lazy_imports import is_loaded, lazy_import
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ["plotly", "scipy", "sklearn", "groq", "psycopg2"]
+
+
+def test_utils_import_without_heavy_dependencies():
+    # Run in a fresh interpreter: this test session has already imported them
+    modules = sorted(path.stem for path in (ROOT / "utils").glob("*.py") if path.stem != "__init__")
+    script = (
+        "import importlib, sys\n"
+        f"for name in {modules!r}:\n"
+        "    importlib.import_module('utils.' + name)\n"
+        f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONPATH': str(ROOT)}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_lazy_module_imports_on_first_use(monkeypatch):
+    name = "lazy_probe_module"
+    module = types.ModuleType(name)
+    module.answer = 42
+    proxy = lazy_import("lazy_probe_module")
+    assert not is_loaded(name)
+
+    monkeypatch.setitem(sys.modules, name, module)
+    assert proxy.answer == 42
+    assert "answer" in dir(proxy)
+
+
+def test_loaded_modules_are_returned_directly():
+    assert lazy_import("json") is sys.modules["json"]
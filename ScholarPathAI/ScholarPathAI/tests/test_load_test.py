@@ -0,0 +1,47 @@
+import argparse
+from collections import defaultdict
+
+import pytest
+
+from utils import parallel
+
+load_test = pytest.importorskip("benchmarks.load_test")
+
+
+@pytest.fixture
+def pool(workdir):
+    yield
+    parallel.reset_process_pool(wait=True)
+
+
+def test_one_session_completes_every_step(pool):
+    args = argparse.Namespace(iterations=1, citations=2, cells=2000, timeout=120)
+    timings, errors = defaultdict(list), defaultdict(int)
+
+    load_test.run_session(0, args, timings, errors)
+
+    assert dict(errors) == {}
+    assert len(timings['add_citation']) == 2
+    for step in ("login", "create_project", "hypothesis_test", "hypothesis_test_job", "generate_report_job"):
+        assert len(timings[step]) == 1, step
+
+
+def test_analysis_page_renders_finished_jobs(pool):
+    timings, errors = defaultdict(list), defaultdict(int)
+    driver = load_test.SessionDriver("smoke", 0, timings, errors, timeout=120)
+    driver.upload_dataset(2000)
+
+    at = driver.rerun("open_analysis", driver.open("pages/4_Analysis.py"))
+    driver.wait_for_jobs("open_analysis", driver.job_ids(), 0.0)
+    # The rerun after the tab jobs finish renders their results
+    driver.rerun("open_analysis", at)
+
+    assert not at.exception
+    assert dict(errors) == {}
+
+
+def test_summarize_percentiles():
+    summary = load_test.summarize({'step': [0.001 * ms for ms in range(1, 101)]})
+    assert summary['step']['reruns'] == 100
+    assert summary['step']['p50_ms'] == pytest.approx(50.5)
+    assert summary['step']['max_ms'] == pytest.approx(100)
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import modeling
+from utils.modeling import fit_model
+
+
+@pytest.fixture
+def regression_data():
+    rng = np.random.default_rng(7)
+    n = 500
+    data = pd.DataFrame({
+        'x1': rng.normal(size=n),
+        'x2': rng.uniform(0, 10, size=n),
+        'group': rng.choice(["a", "b", "c"], size=n)
+    })
+    effects = data['group'].map({'a': 0.0, 'b': 1.5, 'c': -2.0})
+    data['y'] = 3.0 + 2.0 * data['x1'] - 0.5 * data['x2'] + effects + rng.normal(scale=0.8, size=n)
+    return data
+
+
+def test_fit_linear_matches_least_squares(regression_data):
+    data = regression_data
+    result = fit_model(data, 'y', ['x1', 'x2', 'group'])
+
+    X = np.column_stack([
+        np.ones(len(data)), data['x1'], data['x2'],
+        (data['group'] == "b").astype(float), (data['group'] == "c").astype(float)
+    ])
+    coef, rss, _, _ = np.linalg.lstsq(X, data['y'], rcond=None)
+    df = len(data) - X.shape[1]
+    std_err = np.sqrt(np.diag(np.linalg.inv(X.T @ X)) * rss[0] / df)
+
+    table = result['coefficients']
+    assert list(table.index) == ["Intercept", "x1", "x2", "group[b]", "group[c]"]
+    np.testing.assert_allclose(table['coef'], coef, rtol=1e-9)
+    np.testing.assert_allclose(table['std_err'], std_err, rtol=1e-9)
+    tss = np.sum((data['y'] - data['y'].mean()) ** 2)
+    assert result['diagnostics']['r_squared'] == pytest.approx(1 - rss[0] / tss)
+    assert result['method'] == "ols"
+    assert result['formula'] == "y ~ x1 + x2 + group"
+
+
+def test_fit_linear_on_groups_returns_mean_differences():
+    data = pd.DataFrame({'group': ["a", "a", "b", "b", "c", "c"], 'y': [1.0, 3.0, 4.0, 6.0, 10.0, 12.0]})
+    table = fit_model(data, 'y', ['group'])['coefficients']
+    np.testing.assert_allclose(table['coef'], [2.0, 3.0, 9.0])
+    # Pooled residual variance 2 on 3 df; each difference of two means of size 2 has SE sqrt(2)
+    np.testing.assert_allclose(table['std_err'], [1.0, np.sqrt(2), np.sqrt(2)])
+
+
+def test_fit_linear_accumulates_chunks(regression_data, monkeypatch):
+    full = fit_model(regression_data, 'y', ['x1', 'x2', 'group'])
+    monkeypatch.setattr(modeling, "MODEL_CHUNK_ROWS", 37)
+    chunked = fit_model(regression_data, 'y', ['x1', 'x2', 'group'])
+    np.testing.assert_allclose(chunked['coefficients']['coef'], full['coefficients']['coef'], rtol=1e-9)
+    assert chunked['diagnostics']['durbin_watson'] == pytest.approx(full['diagnostics']['durbin_watson'])
+
+
+def test_fit_linear_drops_incomplete_rows(regression_data):
+    data = regression_data.copy()
+    data.loc[:9, 'x1'] = np.nan
+    data.loc[10:14, 'group'] = None
+    result = fit_model(data, 'y', ['x1', 'group'])
+    assert result['dropped_rows'] == 15
+    assert result['diagnostics']['observations'] == len(data) - 15
+
+
+def _logit(p):
+    return np.log(p / (1 - p))
+
+
+def test_fit_logistic_matches_closed_form_log_odds():
+    # 2x2 table: treated 30 of 40 succeed, control 10 of 40 succeed
+    data = pd.DataFrame({
+        'treated': [1] * 40 + [0] * 40,
+        'outcome': ["yes"] * 30 + ["no"] * 10 + ["yes"] * 10 + ["no"] * 30
+    })
+    result = fit_model(data, 'outcome', ['treated'], model_type="logistic")
+
+    table = result['coefficients']
+    np.testing.assert_allclose(table['coef'], [_logit(0.25), _logit(0.75) - _logit(0.25)], atol=1e-8)
+    np.testing.assert_allclose(table['std_err'], [np.sqrt(1 / 10 + 1 / 30), np.sqrt(2 / 10 + 2 / 30)], rtol=1e-6)
+    np.testing.assert_allclose(table['odds_ratio'], np.exp(table['coef']))
+    assert result['classes'] == ["no", "yes"]
+    assert result['method'] == "irls"
+    assert result['diagnostics']['converged']
+    assert result['diagnostics']['accuracy'] == pytest.approx(0.75)
+
+
+def test_fit_logistic_sgd_approximates_irls(monkeypatch):
+    rng = np.random.default_rng(3)
+    n = 40_000
+    data = pd.DataFrame({'x': rng.normal(2.0, 3.0, size=n), 'group': rng.choice(["a", "b"], size=n)})
+    linear = -1.0 + 0.8 * data['x'] + np.where(data['group'] == "b", 0.5, 0.0)
+    data['y'] = (rng.uniform(size=n) < 1 / (1 + np.exp(-linear))).astype(int)
+
+    exact = fit_model(data, 'y', ['x', 'group'], model_type="logistic")
+    monkeypatch.setattr(modeling, "INCREMENTAL_MIN_ROWS", 10_000)
+    monkeypatch.setattr(modeling, "MODEL_CHUNK_ROWS", 5_000)
+    approximate = fit_model(data, 'y', ['x', 'group'], model_type="logistic")
+
+    assert approximate['method'] == "sgd"
+    np.testing.assert_allclose(approximate['coefficients']['coef'], exact['coefficients']['coef'], atol=0.05)
+
+
+def test_fit_model_rejects_bad_input(regression_data):
+    with pytest.raises(ValueError):
+        fit_model(regression_data, 'y', ['x1'], model_type="poisson")
+    with pytest.raises(ValueError):
+        fit_model(regression_data, 'y', ['y'])
+    with pytest.raises(ValueError, match="exactly 2 classes"):
+        fit_model(regression_data, 'group', ['x1'], model_type="logistic")
+    with pytest.raises(ValueError, match="Not enough"):
+        fit_model(regression_data.head(3), 'y', ['x1', 'x2', 'group'])
@@ -0,0 +1,94 @@
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.parallel import _shared, call_on_shared_frame, release_frame, retain_frame, share_frame
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'f64': np.linspace(0, 1, 6),
+        'i32': np.arange(6, dtype=np.int32),
+        'u8': np.arange(6, dtype=np.uint8),
+        'flag': [True, False, True, True, False, False],
+        'text': ["a", "b", np.nan, "a", "c", "b"],
+        'label': pd.Categorical(["x", "y", "x", "x", "y", "x"], categories=["y", "x", "unused"]),
+        'nullable': pd.array([1, None, 3, 4, 5, 6], dtype="Int64"),
+        'when': pd.to_datetime(["2024-01-01", None, "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-06"]),
+        'i64': np.arange(6, dtype=np.int64)
+    })
+
+
+def _identity(frame):
+    return frame
+
+
+def test_share_frame_round_trip(frame):
+    handle = share_frame(frame, "round-trip", "test")
+    try:
+        restored = call_on_shared_frame(_identity, handle)
+        pd.testing.assert_frame_equal(restored, frame)
+        subset = call_on_shared_frame(_identity, handle, ['text', 'f64'])
+        pd.testing.assert_frame_equal(subset, frame[['text', 'f64']])
+    finally:
+        release_frame("round-trip", "test")
+
+
+def test_handle_does_not_carry_labels():
+    many = pd.DataFrame({'text': [f"label {i:06d}" for i in range(50_000)]})
+    handle = share_frame(many, "labels", "test")
+    try:
+        assert len(pickle.dumps(handle)) < 1_000
+        pd.testing.assert_frame_equal(call_on_shared_frame(_identity, handle), many)
+    finally:
+        release_frame("labels", "test")
+
+
+def test_shared_memory_is_reference_counted(frame):
+    handle = share_frame(frame, "counted", "session")
+    assert share_frame(frame, "counted", "job") is handle
+    assert retain_frame("counted", "other") is handle
+    release_frame("counted", "session")
+    release_frame("counted", "job")
+    assert "counted" in _shared
+    release_frame("counted", "other")
+    assert "counted" not in _shared
+    assert retain_frame("counted", "late") is None
+
+
+SCRIPT = """
+import pandas as pd
+from utils.parallel import call_on_shared_frame, get_process_pool, release_frame, reset_process_pool, share_frame
+
+
+def total(frame):
+    return float(frame['x'].sum())
+
+
+if __name__ == "__main__":
+    handle = share_frame(pd.DataFrame({'x': [1.0, 2.0], 't': ["a", "b"]}), "tracked", "main")
+    assert get_process_pool().submit(call_on_shared_frame, total, handle).result() == 3.0
+    reset_process_pool(wait=True)
+    release_frame("tracked", "main")
+"""
+
+
+def test_worker_attach_keeps_resource_tracker_registration(tmp_path):
+    script = tmp_path / "share.py"
+    script.write_text(SCRIPT)
+    app_dir = Path(__file__).resolve().parent.parent
+    result = subprocess.run(
+        [sys.executable, str(script)], cwd=app_dir, capture_output=True, text=True, timeout=120,
+        env={**os.environ, 'PYTHONPATH': str(app_dir)}
+    )
+    assert result.returncode == 0, result.stderr
+    # The parent's tracker complains when a worker dropped its registration
+    assert "KeyError" not in result.stderr
+    assert "leaked shared_memory" not in result.stderr
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import profiling
+from utils.profiling import clean_categories, hll_estimate, hll_update, profile_dataset
+
+
+@pytest.mark.parametrize("distinct", [10, 1000, 200_000])
+def test_hll_estimate_is_close(distinct):
+    registers = profiling._new_registers()
+    values = np.arange(distinct, dtype=np.float64)
+    # Repeated values must not change the estimate
+    hll_update(registers, pd.util.hash_array(np.concatenate([values, values[:distinct // 2]])))
+    assert hll_estimate(registers) == pytest.approx(distinct, rel=0.03)
+
+
+@pytest.fixture
+def survey():
+    return pd.DataFrame({
+        'age': [21, 35, 35, None, 42, 29, 31, 300],
+        'score': [0.5, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5, 7.5],
+        'group': ["Control", "control ", "Treatment", "N/A", "Treatment", "Control", "treatment", "Control"],
+        'income': ["100", "250", "300", "n/a", "410", "520", "600", "x"],
+        'joined': ["2024-01-05", "2024-02-10", "2024-03-01", "2024-03-15", None, "2024-04-20", "2024-05-01", "2024-06-30"],
+        'constant': ["yes"] * 8
+    })
+
+
+def test_profile_dataset_infers_types_and_issues(survey, monkeypatch):
+    monkeypatch.setattr(profiling, "TYPE_MATCH_SHARE", 0.8)
+    profile = profile_dataset(survey)
+    columns = profile['columns']
+    assert profile['rows'] == 8
+
+    assert columns.loc['age', 'inferred_type'] == "integer"
+    assert columns.loc['age', 'nulls'] == 1 and columns.loc['age', 'distinct'] == 6
+    assert columns.loc['age', 'iqr_outliers'] == 1
+    assert columns.loc['score', 'inferred_type'] == "float"
+    assert columns.loc['score', 'mean'] == pytest.approx(4.0)
+
+    # "N/A" counts as missing; "control " and "treatment" are dirty variants
+    assert columns.loc['group', 'nulls'] == 1
+    assert columns.loc['group', 'distinct'] == 4
+    assert columns.loc['group', 'dirty_labels'] == 2
+    assert columns.loc['group', 'inferred_type'] == "categorical"
+
+    assert columns.loc['income', 'inferred_type'] == "numeric"
+    assert columns.loc['income', 'invalid'] == 1
+    assert columns.loc['joined', 'inferred_type'] == "datetime"
+    assert columns.loc['constant', 'inferred_type'] == "boolean"
+
+    issues = profile['issues']
+    assert "income: numeric values stored as text (1 values don't parse)" in issues
+    assert "group: 2 labels differ from another only in case or spacing" in issues
+    assert "constant: has a single value" in issues
+    assert any(issue.startswith("age: 1 IQR outliers") for issue in issues)
+
+
+def test_chunked_text_profile_estimates_distinct(monkeypatch):
+    labels = pd.Series([f"label {i % 5000}" for i in range(20_000)] + ["null"] * 100)
+    exact = profile_dataset(pd.DataFrame({'label': labels}))['columns'].loc['label']
+
+    monkeypatch.setattr(profiling, "HLL_MIN_ROWS", 1000)
+    monkeypatch.setattr(profiling, "PROFILE_CHUNK_ROWS", 3000)
+    chunked = profile_dataset(pd.DataFrame({'label': labels}))['columns'].loc['label']
+
+    assert exact['distinct'] == 5000 and not exact['distinct_estimated']
+    assert chunked['distinct_estimated']
+    assert chunked['distinct'] == pytest.approx(5000, rel=0.03)
+    assert chunked['nulls'] == exact['nulls'] == 100
+
+
+def test_profile_empty_dataset():
+    profile = profile_dataset(pd.DataFrame())
+    assert profile['rows'] == 0 and profile['columns'].empty and profile['issues'] == []
+
+
+def test_clean_categories_merges_variants():
+    series = pd.Series(["Yes", "yes ", "YES", "No", "  no", "null", None, "No"])
+    cleaned = clean_categories(series)
+    assert list(cleaned[:5]) == ["Yes", "Yes", "Yes", "No", "No"]
+    assert cleaned[5:7].isna().all()
+    assert cleaned.value_counts().to_dict() == {'Yes': 3, 'No': 3}
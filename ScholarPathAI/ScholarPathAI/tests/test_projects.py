@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+
+from utils import storage
+
+
+def _write_legacy(workdir, username="alice"):
+    user_dir = storage.user_data_dir(username)
+    pd.DataFrame([
+        {'title': "Sleep & Memory", 'status': "Active", 'notes': "Pilot done"},
+        {'title': None, 'status': "Planning", 'notes': None},
+        {'title': "Sleep & Memory", 'status': "Completed", 'notes': "Duplicate title"}
+    ]).to_csv(user_dir / "projects.csv", index=False)
+    pd.DataFrame([
+        {'title': "Paper A", 'project': "Sleep & Memory"},
+        {'title': "Paper B", 'project': "Unknown project"}
+    ]).to_csv(user_dir / "citations.csv", index=False)
+    (user_dir / "analysis" / "Sleep_Memory").mkdir(parents=True)
+    (user_dir / "analysis" / "Sleep_Memory" / "results.pkl").write_bytes(b"saved")
+    return user_dir
+
+
+def test_migrate_projects_csv_writes_keyed_records(workdir):
+    user_dir = _write_legacy(workdir)
+
+    index = storage._migrate_projects_csv("alice")
+
+    assert list(index.values()) == ["Sleep & Memory", "Untitled project", "Sleep & Memory"]
+    assert len(set(index)) == 3
+    for project_id, title in index.items():
+        record = json.loads((storage.projects_dir("alice") / f"{project_id}.json").read_text())
+        assert record['id'] == project_id and record['title'] == title
+    # Blank cells are left out instead of stored as NaN
+    untitled = [project_id for project_id, title in index.items() if title == "Untitled project"][0]
+    assert 'notes' not in storage.get_project(untitled, "alice")
+
+    assert not (user_dir / "projects.csv").exists()
+    assert (user_dir / "projects.csv.migrated").exists()
+
+
+def test_migrate_projects_csv_moves_results_and_links_citations(workdir):
+    user_dir = _write_legacy(workdir)
+
+    index = storage._migrate_projects_csv("alice")
+    first_id = list(index)[0]
+
+    assert (user_dir / "analysis" / first_id / "results.pkl").read_bytes() == b"saved"
+    assert not (user_dir / "analysis" / "Sleep_Memory").exists()
+
+    citations = pd.read_csv(user_dir / "citations.csv")
+    assert citations.loc[0, 'project_id'] == first_id
+    assert pd.isna(citations.loc[1, 'project_id'])
+
+
+def test_project_index_migrates_only_once(workdir):
+    _write_legacy(workdir)
+
+    index = storage.list_projects("alice")
+    assert len(index) == 3
+    assert storage.list_projects("alice") == index
+    assert len(storage.load_projects("alice")) == 3
+
+
+def test_migrate_projects_csv_without_legacy_file(workdir):
+    assert storage._migrate_projects_csv("bob") == {}
+    assert storage.list_projects("bob") == {}
+
+
+def test_project_crud_keeps_index_in_sync(workdir):
+    project_id = storage.save_project({'title': "  ", 'status': "Planning"}, "alice")
+    assert storage.list_projects("alice") == {project_id: "Untitled project"}
+
+    assert storage.update_project(project_id, {'title': "Renamed", 'status': "Active"}, "alice")
+    assert storage.list_projects("alice") == {project_id: "Renamed"}
+    assert storage.get_project(project_id, "alice")['status'] == "Active"
+
+    assert storage.delete_project(project_id, "alice")
+    assert storage.list_projects("alice") == {}
+    assert storage.get_project(project_id, "alice") is None
+    assert not storage.delete_project(project_id, "alice")
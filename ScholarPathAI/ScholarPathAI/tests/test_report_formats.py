@@ -0,0 +1,93 @@
+import io
+import time
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pandas as pd
+import pytest
+
+from utils import parallel
+from utils.jobs import get_job_result
+from utils.report_formats import (RENDERERS, get_report_job, load_artifact, render_docx, render_html, render_markdown,
+                                  submit_report_render)
+
+
+@pytest.fixture
+def pool():
+    yield
+    parallel.reset_process_pool(wait=True)
+
+
+def _wait(job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_report_job(job_id)
+        if job['status'] not in ("pending", "running"):
+            return job
+        time.sleep(0.1)
+    raise TimeoutError(job_id)
+
+
+def _render():
+    project = {'title': "Test project", 'problem_statement': "Why?"}
+    citations = pd.DataFrame({'title': ["A paper"], 'authors': ["Doe"], 'year': [2020], 'journal': ["J"]})
+    return submit_report_render("text", project, {'Summary': "None"}, citations)
+
+
+def test_expired_artifact_is_rendered_again(workdir, pool):
+    job = _wait(_render())
+    assert job['status'] == "done", job['error']
+    assert b"Test project" in load_artifact(job)
+
+    # The jobs TTL purge removes artifacts independently of the job rows
+    Path(get_job_result(job['id'])).unlink()
+    assert load_artifact(job) is None
+
+    job_id = _render()
+    assert job_id != job['id']
+    assert b"Test project" in load_artifact(_wait(job_id))
+
+
+SECTIONS = [("Introduction", "Line one\nLine <two> & more\x07"), ("Results", "p = 0.01")]
+BROKEN_FIGURE = [{'title': "Scores", 'spec': "not a figure"}]
+
+
+def _progress_recorder():
+    calls = []
+    return calls, calls.append
+
+
+@pytest.mark.parametrize("report_format", sorted(RENDERERS))
+def test_renderers_report_progress(report_format):
+    calls, progress = _progress_recorder()
+    content = RENDERERS[report_format]("Title", "2024-01-01", SECTIONS, [], progress)
+    assert isinstance(content, bytes) and content
+    assert calls == [0.5, 1.0]
+
+
+def test_html_escapes_content_and_falls_back_for_broken_figures():
+    content = render_html("A <b>title</b>", "2024-01-01", SECTIONS, BROKEN_FIGURE, lambda fraction: None).decode()
+    assert "<b>title</b>" not in content and "A &lt;b&gt;title&lt;/b&gt;" in content
+    assert "<p>Line &lt;two&gt; &amp; more\x07</p>" in content
+    assert content.index("<em>Figure: Scores</em>") > content.index("2. Results")
+
+
+def test_markdown_keeps_line_breaks():
+    content = render_markdown("Title", "2024-01-01", SECTIONS, BROKEN_FIGURE, lambda fraction: None).decode()
+    assert content.startswith("# Research Report: Title")
+    assert "Line one  \nLine <two>" in content
+    assert "*Figure: Scores*" in content
+
+
+def test_docx_is_a_valid_package():
+    content = render_docx("Title & more", "2024-01-01", SECTIONS, BROKEN_FIGURE, lambda fraction: None)
+    with zipfile.ZipFile(io.BytesIO(content)) as docx:
+        assert {"[Content_Types].xml", "_rels/.rels", "word/document.xml"} <= set(docx.namelist())
+        document = ElementTree.fromstring(docx.read("word/document.xml"))
+    namespace = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    texts = [node.text for node in document.iter(f"{namespace}t")]
+    assert texts[0] == "Research Report: Title & more"
+    # Control characters are not allowed in XML and are dropped
+    assert "Line <two> & more" in texts
+    assert "Figure: Scores" in texts
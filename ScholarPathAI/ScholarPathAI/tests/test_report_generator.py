@@ -0,0 +1,107 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils import report_archive, report_generator
+from utils.report_generator import fingerprint, generate_research_report, iter_research_report, write_research_report
+
+PROJECT = {
+    'title': "Heat and health",
+    'problem_statement': "Heat waves harm older adults.",
+    'research_questions': "['Who is most at risk?', 'Which cooling measures work?']",
+    'methodology': float("nan")
+}
+
+CITATIONS = pd.DataFrame({
+    'authors': ["Doe, J."], 'year': [2020], 'title': ["Urban heat"], 'journal': [None]
+})
+
+
+def test_report_sections_in_order():
+    report = generate_research_report(PROJECT, {'t-test': "p = 0.01"}, CITATIONS)
+    assert "Title: Heat and health" in report
+    headings = ["1. Introduction", "2. Research Questions", "3. Methodology", "4. Results", "5. References"]
+    assert [report.index(heading) for heading in headings] == sorted(report.index(heading) for heading in headings)
+    assert "1. Who is most at risk?\n2. Which cooling measures work?" in report
+    assert "Methodology not specified" in report
+    assert "t-test:\np = 0.01" in report
+    assert "Doe, J. (2020). Urban heat. ." in report
+
+
+def test_streamed_report_matches_generated_report():
+    chunks = list(iter_research_report(PROJECT, {}, CITATIONS))
+    assert len(chunks) == 1 + len(report_generator.REPORT_SECTIONS)
+    buffer = io.StringIO()
+    write_research_report(buffer, PROJECT, {}, CITATIONS)
+    assert buffer.getvalue() == "".join(chunks) == generate_research_report(PROJECT, {}, CITATIONS)
+
+
+def test_empty_inputs():
+    report = generate_research_report({}, {}, pd.DataFrame())
+    assert "Title: Untitled project" in report
+    for text in ("No problem statement provided", "No research questions defined",
+                 "No analysis results available", "No citations"):
+        assert text in report
+
+
+def test_fingerprint_hashes_content():
+    large = pd.DataFrame({'x': np.arange(10_000)})
+    changed = large.copy()
+    # A change in the middle is hidden from a truncated repr
+    changed.loc[5000, 'x'] = -1
+    assert fingerprint(large) != fingerprint(changed)
+    assert fingerprint({'table': large}) != fingerprint({'table': changed})
+    assert fingerprint(large) == fingerprint(large.copy())
+    assert fingerprint({'a': 1, 'b': 2}) == fingerprint({'b': 2, 'a': 1})
+    assert fingerprint(np.arange(3)) != fingerprint(np.arange(3).astype(float))
+
+
+def test_sections_are_rendered_only_when_inputs_change(monkeypatch):
+    monkeypatch.setattr(report_generator, "_section_cache", report_generator.OrderedDict())
+    calls = []
+
+    def renderer(text):
+        calls.append(text)
+        return text.upper()
+
+    assert report_generator.render_section("Intro", "hello", renderer) == "HELLO"
+    assert report_generator.render_section("Intro", "hello", renderer) == "HELLO"
+    assert report_generator.render_section("Intro", "changed", renderer) == "CHANGED"
+    assert calls == ["hello", "changed"]
+
+    monkeypatch.setattr(report_generator, "MAX_CACHED_SECTIONS", 2)
+    report_generator.render_section("Other", "x", renderer)
+    assert len(report_generator._section_cache) == 2
+
+
+def test_report_archive_round_trip(workdir):
+    first = report_archive.save_report("Heat and health", iter_research_report(PROJECT, {}, CITATIONS), username="alice")
+    second = report_archive.save_report("Heat and health", b"%PDF-1.4", extension="pdf", username="alice")
+    other = report_archive.save_report("Other project", "Text", extension="md", username="alice")
+
+    assert [entry['id'] for entry in report_archive.list_reports(username="alice")] == [
+        other['id'], second['id'], first['id']
+    ]
+    assert [entry['id'] for entry in report_archive.list_reports("Heat and health", "alice")] == [
+        second['id'], first['id']
+    ]
+    assert report_archive.load_report(first, "alice") == generate_research_report(PROJECT, {}, CITATIONS)
+    assert report_archive.load_report(second, "alice") == b"%PDF-1.4"
+
+    assert report_archive.delete_report(first['id'], "alice")
+    assert not report_archive.delete_report(first['id'], "alice")
+    assert [entry['id'] for entry in report_archive.list_reports("Heat and health", "alice")] == [second['id']]
+    assert not (report_archive.reports_dir("alice") / first['file']).exists()
+    index = (report_archive.reports_dir("alice") / report_archive.REPORT_INDEX_NAME).read_text()
+    assert "\n\n" not in index and len(index.splitlines()) == 4
+
+
+def test_report_archive_skips_a_torn_index_line(workdir):
+    entry = report_archive.save_report("Heat and health", "Text", username="alice")
+    with open(report_archive.reports_dir("alice") / report_archive.REPORT_INDEX_NAME, "a") as f:
+        f.write('{"id": "partial", "proj')
+    assert [found['id'] for found in report_archive.list_reports(username="alice")] == [entry['id']]
+    # Later appends start on a fresh line
+    later = report_archive.save_report("Heat and health", "More", username="alice")
+    assert [found['id'] for found in report_archive.list_reports(username="alice")] == [later['id'], entry['id']]
@@ -0,0 +1,92 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.resampling import MAX_SUPPORT, bootstrap_ci, effect_sizes, permutation_test, weighted_support
+
+
+def test_weighted_support_is_exact_for_few_distinct_values():
+    support, (counts1, counts2), exact = weighted_support(np.array([1.0, 2.0, 2.0]), np.array([2.0, 5.0]))
+    assert exact
+    assert support.tolist() == [1.0, 2.0, 5.0]
+    assert counts1.tolist() == [1, 2, 0]
+    assert counts2.tolist() == [0, 1, 1]
+
+
+def test_weighted_support_bins_many_distinct_values():
+    values = np.random.default_rng(0).normal(size=3 * MAX_SUPPORT)
+    support, (counts,), exact = weighted_support(values)
+    assert not exact
+    assert len(support) <= MAX_SUPPORT
+    assert counts.sum() == len(values)
+    # Bin means preserve the total
+    assert counts @ support == pytest.approx(values.sum())
+
+
+def test_permutation_test_matches_exact_enumeration():
+    group1, group2 = np.array([1.0, 2.0, 3.0, 7.0]), np.array([4.0, 5.0, 6.0, 8.0])
+    pooled = np.concatenate([group1, group2])
+    observed = group1.mean() - group2.mean()
+    differences = []
+    for chosen in itertools.combinations(range(len(pooled)), len(group1)):
+        mask = np.zeros(len(pooled), dtype=bool)
+        mask[list(chosen)] = True
+        differences.append(pooled[mask].mean() - pooled[~mask].mean())
+    exact_p = np.mean(np.abs(differences) >= abs(observed) - 1e-12)
+
+    result = permutation_test(group1, group2, n_resamples=20_000, seed=0)
+    assert result['statistic'] == pytest.approx(observed)
+    assert result['exact_support']
+    assert result['p_value'] == pytest.approx(exact_p, abs=0.01)
+
+
+def test_permutation_test_alternatives():
+    group1, group2 = np.array([5.0, 6.0, 7.0]), np.array([1.0, 2.0, 3.0])
+    # Only 1 of the 20 splits is as large as the observed one
+    assert permutation_test(group1, group2, alternative="greater", seed=0)['p_value'] == pytest.approx(0.05, abs=0.01)
+    assert permutation_test(group1, group2, alternative="less", seed=0)['p_value'] == pytest.approx(1.0, abs=0.01)
+    with pytest.raises(ValueError):
+        permutation_test(group1, group2, alternative="sideways")
+
+
+def test_bootstrap_standard_error_matches_exact_value():
+    values = np.array([1.0, 2.0, 4.0, 9.0])
+    result = bootstrap_ci(values, n_resamples=20_000, seed=0)
+    # The bootstrap mean has variance (population variance) / n exactly
+    assert result['standard_error'] == pytest.approx(np.sqrt(values.var() / len(values)), rel=0.03)
+    assert result['estimate'] == pytest.approx(values.mean())
+    assert result['ci_low'] <= result['estimate'] <= result['ci_high']
+
+
+def test_bootstrap_median_interval_uses_data_values():
+    values = np.array([1.0, 2.0, 3.0, 10.0, 11.0])
+    result = bootstrap_ci(values, statistic="median", seed=0)
+    assert result['estimate'] == 3.0
+    assert result['ci_low'] in values and result['ci_high'] in values
+
+
+def test_resampling_is_seeded():
+    rng = np.random.default_rng(1)
+    group1, group2 = rng.normal(size=50), rng.normal(size=60)
+    assert bootstrap_ci(group1, group2, seed=3) == bootstrap_ci(group1, group2, seed=3)
+    assert permutation_test(group1, group2, seed=3) == permutation_test(group1, group2, seed=3)
+
+
+def test_binned_resampling_reports_raw_statistics():
+    rng = np.random.default_rng(2)
+    group1, group2 = rng.normal(size=3 * MAX_SUPPORT), rng.normal(0.05, size=3 * MAX_SUPPORT)
+    test = permutation_test(group1, group2, n_resamples=1_000, seed=0)
+    interval = bootstrap_ci(group1, group2, "median", n_resamples=1_000, seed=0)
+    assert not test['exact_support'] and not interval['exact_support']
+    assert test['statistic'] == group1.mean() - group2.mean()
+    assert interval['estimate'] == np.median(group1) - np.median(group2)
+    assert interval['ci_low'] <= interval['estimate'] <= interval['ci_high']
+
+
+def test_effect_sizes_known_values():
+    result = effect_sizes([1.0, 2.0, 3.0], [4.0, 5.0, 6.0])
+    assert result['cohens_d'] == pytest.approx(-3.0)
+    assert result['hedges_g'] == pytest.approx(-3.0 * (1 - 3 / 15))
+    assert result['rank_biserial'] == pytest.approx(-1.0)
+    assert result['common_language'] == pytest.approx(0.0)
@@ -0,0 +1,151 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import research_tools
+from utils.research_tools import (calculate_sample_size, create_research_timeline, overdue_projects, power_curve,
+                                  sample_size_grid, schedule_projects, statistical_power)
+
+
+def test_timeline_follows_the_critical_path():
+    timeline = create_research_timeline(date(2024, 1, 1))
+    # Nominal plan: 20 weeks, with Research Design finishing a week before Data Collection can start
+    assert timeline['Problem Formulation']['start'] == date(2024, 1, 1)
+    assert timeline['Literature Review']['start'] == date(2024, 1, 15)
+    assert timeline['Data Collection']['start'] == date(2024, 2, 12)
+    assert timeline['Report Writing']['end'] == date(2024, 5, 20)
+    assert [stage for stage, entry in timeline.items() if not entry['critical']] == ['Research Design']
+    assert timeline['Data Collection']['depends_on'] == ['Literature Review', 'Research Design']
+
+
+def test_timeline_is_stretched_to_the_project_window():
+    timeline = create_research_timeline(date(2024, 1, 1), date(2024, 1, 21))
+    assert timeline['Problem Formulation']['duration_days'] == 2
+    assert timeline['Data Collection']['duration_days'] == 6
+    assert timeline['Report Writing']['end'] == date(2024, 1, 21)
+
+
+def test_schedule_projects_flags_overdue_stages():
+    projects = pd.DataFrame([
+        {'id': "a", 'title': "Late", 'start_date': "2024-01-01", 'end_date': "2024-01-21",
+         'problem_formulation_progress': 1.0},
+        {'id': "b", 'title': "Future", 'start_date': "2030-01-01", 'end_date': None},
+        {'id': "c", 'title': "Undated", 'created_date': None}
+    ])
+    schedule = schedule_projects(projects, today="2024-01-10")
+    assert len(schedule) == 3 * len(research_tools.TIMELINE_STAGES)
+
+    late = schedule[schedule['project_id'] == "a"].set_index('stage')
+    assert not late.loc['Problem Formulation', 'overdue']
+    assert late.loc['Literature Review', 'overdue'] and late.loc['Research Design', 'overdue']
+    assert not late.loc['Data Collection', 'overdue']
+    assert not schedule[schedule['project_id'] != "a"]['overdue'].any()
+    # Projects without dates start today
+    assert schedule[schedule['project_id'] == "c"]['start'].min() == pd.Timestamp("2024-01-10")
+
+    summary = overdue_projects(schedule)
+    assert summary.to_dict(orient="records") == [{
+        'project_id': "a", 'title': "Late", 'overdue_stages': 2, 'earliest_due': pd.Timestamp("2024-01-06")
+    }]
+
+
+def test_schedule_projects_handles_no_projects():
+    assert schedule_projects(pd.DataFrame()).empty
+
+
+@pytest.mark.parametrize("test, effect_size, expected", [
+    # Textbook values (Cohen 1988; G*Power) at alpha 0.05 and power 0.8
+    ('t-test', 0.2, 394),
+    ('t-test', 0.5, 64),
+    ('t-test', 0.8, 26),
+    ('anova', 0.25, 53),
+    ('correlation', 0.3, 85),
+    ('proportions', 0.2, 393)
+])
+def test_sample_sizes_match_reference_tables(test, effect_size, expected):
+    grid = sample_size_grid(test, [effect_size])
+    assert grid.loc[0, 'n_per_group'] == expected
+
+
+def test_solved_sample_size_is_the_smallest_with_enough_power():
+    grid = sample_size_grid('t-test', [0.3, 0.5], powers=[0.8, 0.9])
+    n = grid['n_per_group'].to_numpy()
+    assert np.all(statistical_power('t-test', grid['effect_size'], n) >= grid['power'])
+    assert np.all(statistical_power('t-test', grid['effect_size'], n - 1) < grid['power'])
+
+
+def test_finite_population_correction():
+    grid = sample_size_grid('t-test', [0.5], populations=[np.inf, 100, None])
+    assert list(grid['n_total']) == [128, 57, 128]
+
+
+def test_sample_size_grid_rejects_invalid_effects():
+    with pytest.raises(ValueError):
+        sample_size_grid('t-test', [0.0])
+    with pytest.raises(ValueError):
+        sample_size_grid('correlation', [1.0])
+    with pytest.raises(ValueError):
+        statistical_power('chi-square', 0.3, 100)
+
+
+def test_power_curve_increases_with_n():
+    curve = power_curve('anova', [0.1, 0.4], max_n=300)
+    for _, power in curve.groupby('effect_size')['power']:
+        assert np.all(np.diff(power.to_numpy()) >= 0)
+    assert curve['n'].min() == 4
+
+
+def test_calculate_sample_size_for_a_proportion():
+    assert calculate_sample_size(0.95, 0.05) == 384
+    assert calculate_sample_size(0.95, 0.05, 1000) == 278
+    assert list(calculate_sample_size(np.array([0.9, 0.99]), 0.05)) == [271, 663]
+
+
+STATEMENT = research_tools.create_problem_statement(
+    "urban heat islands in coastal cities",
+    "green roof adoption",
+    "rising summer mortality among elderly residents"
+)
+
+
+def test_extract_phrases_splits_on_stop_words():
+    scores = research_tools.extract_phrases("Green roof adoption in coastal cities, and the heat.")
+    assert set(scores) == {"green roof adoption", "coastal cities", "heat"}
+    # RAKE scores a phrase as the sum of degree / frequency of its words
+    assert scores["green roof adoption"] == 9
+    assert scores["heat"] == 1
+
+
+def test_rank_key_phrases_prefers_topic_phrases():
+    phrases = research_tools.rank_key_phrases(STATEMENT)
+    assert phrases[0] in {"green roof adoption", "urban heat islands", "rising summer mortality"}
+    assert len(phrases) == 5 and len(set(phrases)) == 5
+    assert not set(phrases) & research_tools._TEMPLATE_WORDS
+
+
+def test_rank_key_phrases_skips_only_whole_word_overlaps():
+    phrases = research_tools.rank_key_phrases("Smart grids; grid stability models; art; grid stability.")
+    assert "grid stability" not in phrases
+    # 'art' is inside 'smart' but is not one of its words
+    assert set(phrases) == {"smart grids", "grid stability models", "art"}
+
+
+def test_vectorizers_are_reused_per_corpus(monkeypatch):
+    monkeypatch.setattr(research_tools, "_vectorizers", research_tools.OrderedDict())
+    corpus = ["Green roofs reduce urban heat", "Heat mortality in elderly populations"]
+    research_tools.rank_key_phrases(STATEMENT, corpus)
+    research_tools.rank_key_phrases(STATEMENT + " Extra sentence.", corpus)
+    assert len(research_tools._vectorizers) == 1
+
+    for i in range(research_tools.MAX_CACHED_VECTORIZERS + 2):
+        research_tools.rank_key_phrases(STATEMENT, [f"corpus {i} title"])
+    assert len(research_tools._vectorizers) == research_tools.MAX_CACHED_VECTORIZERS
+
+
+def test_generate_research_questions():
+    questions = research_tools.generate_research_questions(STATEMENT, num_questions=5)
+    assert len(questions) == 5 and len(set(questions)) == 5
+    assert not set(questions) & set(research_tools._GENERIC_QUESTIONS)
+    assert research_tools.generate_research_questions("", num_questions=2) == research_tools._GENERIC_QUESTIONS[:2]
@@ -0,0 +1,48 @@
+import json
+
+from utils import settings
+from utils.storage import user_file
+
+
+def test_defaults_without_a_file(workdir):
+    assert settings.load_settings("alice") == settings.DEFAULT_SETTINGS
+    assert settings.load_profile("alice") == settings.DEFAULT_PROFILE
+    assert settings.get_setting("missing", "fallback", username="alice") == "fallback"
+
+
+def test_loaded_documents_are_copies(workdir):
+    loaded = settings.load_settings("alice")
+    loaded['default_analysis_plots'].append("scatter")
+    assert settings.load_settings("alice")['default_analysis_plots'] == ["histogram", "box"]
+    assert settings.DEFAULT_SETTINGS['default_analysis_plots'] == ["histogram", "box"]
+
+
+def test_saves_are_debounced_into_one_write(workdir, monkeypatch):
+    writes = []
+    write_document = settings._write_document
+    monkeypatch.setattr(settings, "_write_document", lambda path: (writes.append(path), write_document(path)))
+    monkeypatch.setattr(settings, "WRITE_DELAY", 60)
+
+    for style in ["MLA", "Chicago", "IEEE"]:
+        settings.save_settings({**settings.load_settings("alice"), 'citation_style': style}, "alice")
+
+    path = user_file("settings.json", "alice")
+    assert not path.exists()
+    # Reads are served from memory before the write lands
+    assert settings.get_setting("citation_style", username="alice") == "IEEE"
+
+    settings.flush()
+    assert writes == [path]
+    assert json.loads(path.read_text())['citation_style'] == "IEEE"
+
+
+def test_saved_file_is_read_back_with_new_defaults(workdir):
+    path = user_file("profile.json", "alice")
+    path.write_text(json.dumps({'name': "Alice"}))
+    profile = settings.load_profile("alice")
+    assert profile['name'] == "Alice" and profile['publications'] == []
+
+
+def test_unreadable_file_falls_back_to_defaults(workdir):
+    user_file("settings.json", "alice").write_text("{not json")
+    assert settings.load_settings("alice") == settings.DEFAULT_SETTINGS
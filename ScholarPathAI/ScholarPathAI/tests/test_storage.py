@@ -0,0 +1,62 @@
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from utils import db_storage, storage
+from utils.storage import user_data_dir, user_slug, validate_username
+
+
+@pytest.mark.parametrize("username", ["alice", "Alice_B-2"])
+def test_user_slug_keeps_plain_names(username):
+    assert user_slug(username) == username
+
+
+@pytest.mark.parametrize("username", [".", "..", "../etc", "a/b", "a\\b"])
+def test_user_slug_cannot_leave_users_dir(username):
+    slug = user_slug(username)
+    assert "/" not in slug and "\\" not in slug and "." not in slug
+    assert (storage.USERS_DIR / slug).parent == storage.USERS_DIR
+
+
+def test_user_slug_is_injective():
+    names = ["alice smith", "alice_smith", "alice%20smith", "alice.smith", "alice-smith", "ålice", "alice"]
+    assert len({user_slug(name) for name in names}) == len(names)
+
+
+def test_user_slug_defaults_to_anonymous():
+    assert user_slug(None) == user_slug("") == storage.ANONYMOUS_USER
+
+
+@pytest.mark.parametrize("username", ["", "  ", ".", "..", "anonymous", "Anonymous", " bob"])
+def test_validate_username_rejects(username):
+    assert validate_username(username)
+
+
+def test_validate_username_accepts():
+    assert validate_username("alice smith") is None
+
+
+def test_user_data_dir_stays_inside_users_dir(workdir):
+    path = user_data_dir("..")
+    assert path.resolve().parent == (workdir / storage.USERS_DIR).resolve()
+    assert not Path("data/projects").exists()
+
+
+def _mirror_in_sync(username):
+    with closing(db_storage._connect()) as conn:
+        stored = db_storage._stored_state(conn, user_slug(username), "citations")
+    return stored == db_storage.source_state(storage.citations_path(username))
+
+
+def test_save_citations_batch_writes_through_to_database(workdir):
+    storage.save_citations_batch([{'title': "First", 'year': 2020}], "alice")
+    db_storage.sync_citations("alice")
+    storage.save_citations_batch([{'title': "Second", 'year': 2021}], "alice")
+    assert _mirror_in_sync("alice")
+
+    # A new field rewrites the CSV but must still reach the database
+    storage.save_citations_batch([{'title': "Third", 'year': 2022, 'abstract': "New field"}], "alice")
+    assert _mirror_in_sync("alice")
+    assert db_storage.count_citations(username="alice") == 3
+    assert storage.load_citations("alice")['abstract'].tolist()[-1] == "New field"
@@ -1,41 +1,107 @@
+import hashlib
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from scipy import stats
+from utils.instrumentation import timed
+from utils.jobs import report_progress
+from utils.lazy_imports import lazy_import
+from utils.profiling import clean_categories
+from utils.resampling import N_RESAMPLES, bootstrap_ci, effect_sizes, permutation_test
 
+stats = lazy_import("scipy.stats")
+preprocessing = lazy_import("sklearn.preprocessing")
+
+def dataset_fingerprint(data):
+    """Digest of a dataset's columns and values, used to key cached results"""
+    digest = hashlib.sha1(",".join(map(str, data.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    return digest.hexdigest()
+
+@timed("analysis.perform_descriptive_statistics")
 def perform_descriptive_statistics(data):
-    """Calculate descriptive statistics for numerical data"""
-    description = data.describe()
-    skewness = data.skew()
-    kurtosis = data.kurtosis()
+    """Calculate descriptive statistics for numerical data, one column at a time so jobs can report progress"""
+    description, skewness, kurtosis = {}, {}, {}
+    for i, column in enumerate(data.columns):
+        report_progress(i / len(data.columns), f"Describing {column}")
+        description[column] = data[column].describe()
+        skewness[column] = data[column].skew()
+        kurtosis[column] = data[column].kurtosis()
     
     return {
-        'description': description,
-        'skewness': skewness,
-        'kurtosis': kurtosis
+        'description': pd.DataFrame(description, columns=data.columns),
+        'skewness': pd.Series(skewness, dtype=float),
+        'kurtosis': pd.Series(kurtosis, dtype=float)
     }
 
+@timed("analysis.perform_correlation_analysis")
 def perform_correlation_analysis(data):
     """Calculate correlation matrix"""
+    # A single pairwise pass; jobs can only be cancelled before it starts
+    report_progress(0.0, "Computing correlations")
     return data.corr()
 
-def perform_hypothesis_test(group1, group2, test_type='t-test'):
-    """Perform statistical hypothesis testing"""
+@timed("analysis.perform_hypothesis_test")
+def perform_hypothesis_test(group1, group2, test_type='t-test', n_resamples=N_RESAMPLES, seed=None, bootstrap=False):
+    """Perform statistical hypothesis testing.
+
+    'permutation' tests the mean difference by resampling. With
+    `bootstrap`, results also include effect sizes and a bootstrap
+    confidence interval for the difference in means (medians for
+    Mann-Whitney); 'exact_support' is False when resampling had to bin
+    the values.
+    """
+    exact_support = True
     if test_type == 't-test':
         statistic, p_value = stats.ttest_ind(group1, group2)
     elif test_type == 'mann-whitney':
         statistic, p_value = stats.mannwhitneyu(group1, group2)
+    elif test_type == 'permutation':
+        result = permutation_test(group1, group2, 'mean', n_resamples, seed=seed)
+        statistic, p_value, exact_support = result['statistic'], result['p_value'], result['exact_support']
     else:
         raise ValueError("Unsupported test type")
-    
-    return {
+
+    results = {
         'statistic': statistic,
         'p_value': p_value,
-        'significant': p_value < 0.05
+        'significant': p_value < 0.05,
+        'n_resamples': n_resamples,
+        'exact_support': exact_support
     }
+    if bootstrap:
+        statistic_name = 'median' if test_type == 'mann-whitney' else 'mean'
+        interval = bootstrap_ci(group1, group2, statistic_name, n_resamples, seed=seed)
+        results.update({
+            'difference': interval['estimate'],
+            'difference_of': statistic_name,
+            'ci_low': interval['ci_low'],
+            'ci_high': interval['ci_high'],
+            'exact_support': exact_support and interval['exact_support'],
+            **effect_sizes(group1, group2)
+        })
+    return results
+
+@timed("analysis.perform_grouped_hypothesis_test")
+def perform_grouped_hypothesis_test(data, dependent_variable, grouping_variable, groups, test_type='t-test',
+                                    n_resamples=N_RESAMPLES, seed=None, bootstrap=False):
+    """Compare a numerical column between two groups of a grouping column.
+
+    Group labels are cleaned first, so variants like "Male " and "male"
+    fall into the same group; missing values are left out.
+    """
+    column = pd.to_numeric(data[dependent_variable], errors="coerce")
+    grouping = clean_categories(data[grouping_variable])
+    return perform_hypothesis_test(
+        column[grouping == groups[0]].dropna(),
+        column[grouping == groups[1]].dropna(),
+        test_type,
+        n_resamples,
+        seed,
+        bootstrap
+    )
 
+@timed("analysis.normalize_data")
 def normalize_data(data):
     """Normalize numerical data"""
-    scaler = StandardScaler()
+    scaler = preprocessing.StandardScaler()
     normalized_data = scaler.fit_transform(data)
     return pd.DataFrame(normalized_data, columns=data.columns)
@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import re
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import timed
+from utils.lazy_imports import lazy_import
+from utils.storage import user_data_dir
+
+logger = logging.getLogger(__name__)
+
+go = lazy_import("plotly.graph_objects")
+
+# Decimal places kept in stored tables; enough for reporting, keeps files small
+TABLE_PRECISION = 6
+HISTOGRAM_BINS = 40
+
+
+def results_dir(username=None):
+    """Return the directory holding a user's saved analysis results"""
+    return user_data_dir(username) / "analysis"
+
+
+def _project_dir(project_id, username=None):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", str(project_id)).strip("_")[:60] or "project"
+    return results_dir(username) / slug
+
+
+def _read_index(project_id, username=None):
+    path = _project_dir(project_id, username) / "index.json"
+    if not path.exists():
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _write_index(project_id, entries, username=None):
+    path = _project_dir(project_id, username) / "index.json"
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, path)
+
+
+def _json_value(value):
+    """Convert numpy scalars so results serialize as plain JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def compact_distribution_figure(series, plot_type, title):
+    """Build a Plotly figure spec from summaries instead of raw values.
+
+    Histograms are binned and box plots use precomputed quartiles, so the
+    stored spec stays a few KB regardless of the dataset size.
+    """
+    values = pd.Series(series).dropna().to_numpy(dtype=float)
+    if not len(values):
+        fig = go.Figure()
+        fig.update_layout(title=f"{title} (no values)")
+        return fig.to_json()
+    if plot_type == "Box Plot":
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        iqr = q3 - q1
+        # Whiskers end at the most extreme values within 1.5 IQR of the box
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        fig = go.Figure(go.Box(
+            name=str(series.name),
+            q1=[q1], median=[median], q3=[q3],
+            lowerfence=[inside.min()],
+            upperfence=[inside.max()],
+            mean=[values.mean()]
+        ))
+    else:
+        counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+        fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+        fig.update_layout(bargap=0)
+    fig.update_layout(title=title)
+    return fig.to_json()
+
+
+@timed("analysis_store.save_analysis_result")
+def save_analysis_result(project_id, kind, title, tables=None, values=None, figures=None, username=None):
+    """Persist an analysis run as a compact artifact attached to a project.
+
+    tables: name -> DataFrame/Series, values: name -> scalar,
+    figures: list of {'title', 'spec'} with Plotly JSON specs.
+    """
+    try:
+        project_dir = _project_dir(project_id, username)
+        project_dir.mkdir(exist_ok=True, parents=True)
+        result_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+        artifact = {
+            'id': result_id,
+            'project': project_id,
+            'kind': kind,
+            'title': title,
+            'created': datetime.now().isoformat(timespec="seconds"),
+            'tables': {
+                name: pd.DataFrame(table).round(TABLE_PRECISION).to_dict(orient="split")
+                for name, table in (tables or {}).items()
+            },
+            'values': {name: _json_value(value) for name, value in (values or {}).items()},
+            'figures': figures or []
+        }
+        with open(project_dir / f"{result_id}.json", "w") as f:
+            json.dump(artifact, f)
+
+        entries = _read_index(project_id, username)
+        entries.append({key: artifact[key] for key in ('id', 'kind', 'title', 'created')})
+        _write_index(project_id, entries, username)
+        logger.info(f"Saved {kind} result for {project_id}")
+        return result_id
+    except Exception as e:
+        logger.error(f"Error saving analysis result: {str(e)}", exc_info=True)
+        return None
+
+
+def list_analysis_results(project_id, username=None):
+    """List a project's saved analysis results, newest first"""
+    try:
+        entries = _read_index(project_id, username)
+    except Exception as e:
+        logger.error(f"Error reading analysis index: {str(e)}", exc_info=True)
+        return []
+    # Entries are appended in save order; 'created' only has one-second resolution
+    return entries[::-1]
+
+
+@timed("analysis_store.load_analysis_result")
+def load_analysis_result(project_id, result_id, username=None):
+    """Load one stored result with its tables rebuilt as DataFrames"""
+    path = _project_dir(project_id, username) / f"{result_id}.json"
+    try:
+        with open(path, "r") as f:
+            artifact = json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading analysis result {result_id}: {str(e)}", exc_info=True)
+        return None
+    artifact['tables'] = {
+        name: pd.DataFrame(**table) for name, table in artifact['tables'].items()
+    }
+    return artifact
+
+
+def delete_analysis_result(project_id, result_id, username=None):
+    """Remove a stored result and its index entry"""
+    try:
+        (_project_dir(project_id, username) / f"{result_id}.json").unlink(missing_ok=True)
+        entries = [entry for entry in _read_index(project_id, username) if entry['id'] != result_id]
+        _write_index(project_id, entries, username)
+        return True
+    except Exception as e:
+        logger.error(f"Error deleting analysis result {result_id}: {str(e)}", exc_info=True)
+        return False
+
+
+def format_result_for_report(artifact):
+    """Render a stored result as report text"""
+    parts = []
+    for name, value in artifact['values'].items():
+        parts.append(f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}")
+    for name, table in artifact['tables'].items():
+        parts.append(f"{name}:\n{table.to_string()}")
+    return "\n".join(parts)
+
+
+def results_for_report(project_id, result_ids, username=None):
+    """Collect stored results as report sections and figure specs, without recomputing"""
+    analysis_results = {}
+    figures = []
+    for result_id in result_ids:
+        artifact = load_analysis_result(project_id, result_id, username)
+        if artifact is None:
+            continue
+        analysis_results[f"{artifact['title']} ({artifact['created'][:10]})"] = format_result_for_report(artifact)
+        figures.extend(artifact['figures'])
+    return analysis_results, figures
@@ -0,0 +1,166 @@
+import fcntl
+import json
+import logging
+import os
+import struct
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from utils.instrumentation import timed
+from utils.storage import user_slug
+
+logger = logging.getLogger(__name__)
+
+CHAT_DIR = Path("data/chats")
+
+# Each index entry is the byte offset of one message line in the transcript,
+# so any slice of the conversation can be read with a single seek.
+_OFFSET = struct.Struct("<Q")
+
+
+def _chat_paths(username):
+    """Return the transcript and offset index paths for a user"""
+    slug = user_slug(username)
+    return CHAT_DIR / f"{slug}.jsonl", CHAT_DIR / f"{slug}.idx"
+
+
+@contextmanager
+def _locked_chat(username):
+    """Hold the user's chat lock and yield (transcript, index) paths with a consistent index.
+
+    The lock file serializes writers across sessions and server processes.
+    """
+    log_path, idx_path = _chat_paths(username)
+    CHAT_DIR.mkdir(exist_ok=True, parents=True)
+    with open(log_path.with_suffix(".lock"), "ab") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if not _index_matches(log_path, idx_path):
+                _rebuild_index(log_path, idx_path)
+            yield log_path, idx_path
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _index_matches(log_path, idx_path):
+    """Check that the last index entry points at the last complete line of the transcript"""
+    log_size = log_path.stat().st_size if log_path.exists() else 0
+    idx_size = idx_path.stat().st_size if idx_path.exists() else 0
+    if idx_size % _OFFSET.size:
+        return False
+    if not idx_size:
+        return log_size == 0
+    with open(idx_path, "rb") as idx:
+        idx.seek(idx_size - _OFFSET.size)
+        (last,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+    if last >= log_size:
+        return False
+    with open(log_path, "rb") as log:
+        log.seek(max(last - 1, 0))
+        tail = log.read()
+    if last:
+        if tail[:1] != b"\n":
+            return False
+        tail = tail[1:]
+    # Exactly one complete line after the last indexed offset
+    return tail.endswith(b"\n") and tail.count(b"\n") == 1
+
+
+def _rebuild_index(log_path, idx_path):
+    """Rewrite the index from the transcript, dropping a partially written last line"""
+    offsets = []
+    position = 0
+    if log_path.exists():
+        with open(log_path, "rb") as log:
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break
+                offsets.append(position)
+                position += len(line)
+        if log_path.stat().st_size > position:
+            os.truncate(log_path, position)
+    temporary = idx_path.with_suffix(".idx.tmp")
+    temporary.write_bytes(b"".join(_OFFSET.pack(offset) for offset in offsets))
+    os.replace(temporary, idx_path)
+    logger.warning(f"Rebuilt chat index {idx_path.name} ({len(offsets)} messages)")
+
+
+@timed("chat.append_message")
+def append_message(username, role, content):
+    """Append a message to the user's chat transcript"""
+    try:
+        record = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(timespec="seconds")
+        }
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with _locked_chat(username) as (log_path, idx_path):
+            with open(log_path, "ab") as log:
+                offset = log.seek(0, os.SEEK_END)
+                log.write(line)
+            with open(idx_path, "ab") as idx:
+                idx.write(_OFFSET.pack(offset))
+        return True
+    except Exception as e:
+        logger.error(f"Error appending chat message: {str(e)}", exc_info=True)
+        return False
+
+
+def count_messages(username):
+    """Return the number of messages stored for a user"""
+    _, idx_path = _chat_paths(username)
+    if not idx_path.exists():
+        return 0
+    return idx_path.stat().st_size // _OFFSET.size
+
+
+@timed("chat.load_messages")
+def load_messages(username, start, stop):
+    """Load messages [start, stop) from the user's transcript"""
+    try:
+        with _locked_chat(username) as (log_path, idx_path):
+            total = count_messages(username)
+            start, stop = max(0, start), min(stop, total)
+            if start >= stop:
+                return []
+
+            with open(idx_path, "rb") as idx:
+                idx.seek(start * _OFFSET.size)
+                (begin,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+                end = None
+                if stop < total:
+                    idx.seek(stop * _OFFSET.size)
+                    (end,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+
+            with open(log_path, "rb") as log:
+                log.seek(begin)
+                chunk = log.read() if end is None else log.read(end - begin)
+
+        return [json.loads(line) for line in chunk.decode("utf-8").splitlines() if line]
+    except Exception as e:
+        logger.error(f"Error loading chat messages: {str(e)}", exc_info=True)
+        return []
+
+
+def load_recent_messages(username, limit):
+    """Load the last `limit` messages and the index of the first one returned"""
+    with _locked_chat(username):
+        total = count_messages(username)
+    start = max(0, total - limit)
+    return load_messages(username, start, total), start
+
+
+def archive_chat(username):
+    """Move the current transcript aside so a new conversation can start"""
+    suffix = datetime.now().strftime("%Y%m%d%H%M%S")
+    try:
+        with _locked_chat(username) as paths:
+            for path in paths:
+                if path.exists():
+                    path.rename(path.with_name(f"{path.stem}.{suffix}{path.suffix}.archived"))
+        logger.info(f"Archived chat history for {username}")
+        return True
+    except Exception as e:
+        logger.error(f"Error archiving chat history: {str(e)}", exc_info=True)
+        return False
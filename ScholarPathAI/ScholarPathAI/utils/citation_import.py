@@ -0,0 +1,327 @@
+import io
+import json
+import logging
+import re
+
+from utils.dedup import save_unique_citations
+from utils.storage import save_citations_batch
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = {
+    'bibtex': {'label': "BibTeX", 'extensions': ["bib", "bibtex"]},
+    'ris': {'label': "RIS", 'extensions': ["ris"]},
+    'csl-json': {'label': "CSL-JSON", 'extensions': ["json"]}
+}
+
+# Citations written per append
+IMPORT_BATCH_SIZE = 5000
+
+# Rejected entries reported back to the user
+MAX_REPORTED_ERRORS = 20
+
+# Characters read per chunk when streaming CSL-JSON
+JSON_CHUNK_SIZE = 1 << 16
+
+_BIBTEX_FIELD = re.compile(r"\s*,?\s*([A-Za-z][\w-]*)\s*=\s*")
+# Accents such as \"{u} are dropped; escaped characters such as \& are kept
+_LATEX_COMMAND = re.compile(r"\\[A-Za-z]+\s*|\\[\"'`^~=.]|\\(.)")
+_YEAR = re.compile(r"(1[5-9]\d\d|20\d\d|21\d\d)")
+_DOI_PREFIX = re.compile(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+_RIS_LINE = re.compile(r"^([A-Z][A-Z0-9])  -\s?(.*)$")
+
+_RIS_FIELDS = {
+    'TI': 'title', 'T1': 'title',
+    'AU': 'authors', 'A1': 'authors',
+    'PY': 'year', 'Y1': 'year', 'DA': 'year',
+    'JO': 'journal', 'JF': 'journal', 'T2': 'journal', 'JA': 'journal',
+    'DO': 'doi'
+}
+
+
+def detect_format(filename):
+    """Guess the import format from a file name"""
+    extension = filename.rsplit(".", 1)[-1].lower()
+    for name, spec in IMPORT_FORMATS.items():
+        if extension in spec['extensions']:
+            return name
+    raise ValueError(f"Unsupported citation file: {filename}")
+
+
+def _strip_latex(text):
+    text = _LATEX_COMMAND.sub(lambda m: m.group(1) or "", text)
+    return re.sub(r"\s+", " ", text.replace("{", "").replace("}", "")).strip()
+
+
+def _bibtex_value(body, start):
+    """Read one field value starting at `start`; returns (value, end)"""
+    if start >= len(body):
+        return "", start
+    opener = body[start]
+    if opener == "{":
+        depth = 0
+        for i in range(start, len(body)):
+            char = body[i]
+            if char == "{" and body[i - 1] != "\\":
+                depth += 1
+            elif char == "}" and body[i - 1] != "\\":
+                depth -= 1
+                if depth == 0:
+                    return body[start + 1:i], i + 1
+        return body[start + 1:], len(body)
+    if opener == '"':
+        depth = 0
+        for i in range(start + 1, len(body)):
+            char = body[i]
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+            elif char == '"' and depth == 0 and body[i - 1] != "\\":
+                return body[start + 1:i], i + 1
+        return body[start + 1:], len(body)
+    end = start
+    while end < len(body) and body[end] not in ",}\n":
+        end += 1
+    return body[start:end].strip(), end
+
+
+def _bibtex_entry(text):
+    """Parse one complete '@type{key, field = value, ...}' entry"""
+    brace = text.find("{")
+    entry_type = text[1:brace].strip().lower()
+    if entry_type in ("comment", "preamble", "string"):
+        return None
+    body = text[brace + 1:text.rfind("}")]
+    comma = body.find(",")
+    fields = {'type': entry_type, 'key': body[:comma].strip()}
+    position = comma + 1
+    while True:
+        match = _BIBTEX_FIELD.match(body, position)
+        if not match:
+            break
+        value, position = _bibtex_value(body, match.end())
+        fields[match.group(1).lower()] = _strip_latex(value)
+    return fields
+
+
+def parse_bibtex(lines):
+    """Yield raw field dicts from BibTeX lines, one entry at a time"""
+    buffer = []
+    depth = 0
+    opened = False
+    for line in lines:
+        if not buffer:
+            stripped = line.lstrip()
+            if not stripped.startswith("@"):
+                continue
+            line = stripped
+        buffer.append(line)
+        depth += line.count("{") - line.count("\\{") - line.count("}") + line.count("\\}")
+        opened = opened or "{" in line
+        if opened and depth <= 0:
+            entry = "".join(buffer)
+            buffer = []
+            depth = 0
+            opened = False
+            try:
+                fields = _bibtex_entry(entry)
+            except Exception as e:
+                yield {'_error': f"Unreadable BibTeX entry: {str(e)}"}
+                continue
+            if fields is not None:
+                yield fields
+
+
+def _bibtex_authors(value):
+    """Turn 'Last, First and First Last' into 'First Last, First Last'"""
+    names = []
+    for name in re.split(r"\s+and\s+", value):
+        parts = [part.strip() for part in name.split(",")]
+        names.append(" ".join(reversed(parts)) if len(parts) == 2 else name.strip())
+    return names
+
+
+def parse_ris(lines):
+    """Yield raw field dicts from RIS lines, one record at a time"""
+    record = {}
+    for line in lines:
+        match = _RIS_LINE.match(line.rstrip("\r\n"))
+        if not match:
+            continue
+        tag, value = match.group(1), match.group(2).strip()
+        if tag == "ER":
+            if record:
+                yield record
+            record = {}
+        elif tag == "TY":
+            record = {'type': value}
+        elif tag in _RIS_FIELDS:
+            field = _RIS_FIELDS[tag]
+            if field == 'authors':
+                record.setdefault('authors', []).append(value)
+            else:
+                record.setdefault(field, value)
+    if record:
+        yield record
+
+
+def _ris_author(name):
+    parts = [part.strip() for part in name.split(",")]
+    return " ".join(reversed(parts[:2])) if len(parts) >= 2 else name
+
+
+def parse_csl_json(stream, chunk_size=JSON_CHUNK_SIZE):
+    """Yield items of a CSL-JSON array while reading it in chunks"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    exhausted = False
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,")
+        if not started and buffer:
+            if buffer[0] != "[":
+                # A single item rather than an array
+                buffer = "[" + buffer
+            buffer = buffer[1:]
+            started = True
+            continue
+        if started and buffer.startswith("]"):
+            return
+        if buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if exhausted:
+                    yield {'_error': "Unreadable CSL-JSON item"}
+                    return
+            else:
+                buffer = buffer[end:]
+                yield item
+                continue
+        if exhausted:
+            return
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            exhausted = True
+        buffer += chunk
+
+
+def _csl_authors(item):
+    names = []
+    for author in item.get('author', []):
+        if 'literal' in author:
+            names.append(author['literal'])
+        else:
+            names.append(" ".join(filter(None, [author.get('given'), author.get('family')])))
+    return names
+
+
+def _csl_year(item):
+    issued = item.get('issued') or {}
+    parts = issued.get('date-parts') or [[]]
+    if parts and parts[0]:
+        return str(parts[0][0])
+    return issued.get('raw', "")
+
+
+def normalize_citation(raw, source_format, project="None", project_id=None):
+    """Map a parsed entry onto the citation columns; returns (citation, error)"""
+    if '_error' in raw:
+        return None, raw['_error']
+
+    if source_format == 'bibtex':
+        authors = _bibtex_authors(raw.get('author', ""))
+        journal = raw.get('journal') or raw.get('booktitle') or raw.get('publisher', "")
+        year, doi, title = raw.get('year', ""), raw.get('doi', ""), raw.get('title', "")
+    elif source_format == 'ris':
+        authors = [_ris_author(name) for name in raw.get('authors', [])]
+        journal = raw.get('journal', "")
+        year, doi, title = raw.get('year', ""), raw.get('doi', ""), raw.get('title', "")
+    else:
+        authors = _csl_authors(raw)
+        container = raw.get('container-title', "")
+        journal = container[0] if isinstance(container, list) and container else container or ""
+        year, doi, title = _csl_year(raw), raw.get('DOI', ""), raw.get('title', "")
+
+    title = re.sub(r"\s+", " ", str(title)).strip().rstrip(".")
+    if not title:
+        return None, f"Missing title ({raw.get('key') or raw.get('id') or 'unknown entry'})"
+
+    year_match = _YEAR.search(str(year))
+    doi = _DOI_PREFIX.sub("", str(doi).strip()).lower()
+
+    return {
+        'title': title,
+        'authors': ", ".join(name for name in authors if name),
+        'year': int(year_match.group(1)) if year_match else None,
+        'journal': str(journal).strip(),
+        'doi': doi,
+        'project': project,
+        'project_id': project_id
+    }, None
+
+
+def import_citations(stream, source_format, project="None", project_id=None, batch_size=IMPORT_BATCH_SIZE, progress=None,
+                     skip_duplicates=True, username=None):
+    """Stream a citation file into the user's library in batches.
+
+    `stream` is a binary file object; `progress(fraction, imported)` is
+    called after each batch. With `skip_duplicates`, entries already in the
+    library or repeated in the file are left out. Returns counts of
+    imported, duplicate and rejected entries.
+    """
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell() or 1
+    stream.seek(0)
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+
+    if source_format == 'bibtex':
+        entries = parse_bibtex(text)
+    elif source_format == 'ris':
+        entries = parse_ris(text)
+    elif source_format == 'csl-json':
+        entries = parse_csl_json(text)
+    else:
+        raise ValueError(f"Unsupported import format: {source_format}")
+
+    summary = {'imported': 0, 'duplicates': 0, 'rejected': 0, 'errors': []}
+    batch = []
+
+    def flush():
+        if skip_duplicates:
+            saved, duplicates = save_unique_citations(batch, username)
+            summary['duplicates'] += duplicates
+        elif save_citations_batch(batch, username):
+            saved = len(batch)
+        else:
+            raise IOError("Failed to write imported citations")
+        summary['imported'] += saved
+        batch.clear()
+        if progress:
+            progress(min(stream.tell() / size, 1.0), summary['imported'])
+
+    try:
+        for raw in entries:
+            citation, error = normalize_citation(raw, source_format, project, project_id)
+            if error:
+                summary['rejected'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append(error)
+                continue
+            batch.append(citation)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        # Leave the caller's stream open
+        text.detach()
+
+    if progress:
+        progress(1.0, summary['imported'])
+    logger.info(
+        f"Imported {summary['imported']} citations ({summary['duplicates']} duplicates, "
+        f"{summary['rejected']} rejected) from {source_format}"
+    )
+    return summary
@@ -0,0 +1,323 @@
+import copy
+import csv
+import io
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import timed
+from utils.lazy_imports import lazy_import
+from utils.storage import citations_path
+
+logger = logging.getLogger(__name__)
+
+sparse = lazy_import("scipy.sparse")
+csgraph = lazy_import("scipy.sparse.csgraph")
+go = lazy_import("plotly.graph_objects")
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-10
+PAGERANK_MAX_ITERATIONS = 100
+
+# Bytes before the indexed end of the file that must be unchanged for an append
+APPEND_MARKER_SIZE = 256
+
+# path -> (file state, CitationNetwork, append marker); cached networks are never
+# modified, appended rows are indexed into a copy that replaces the entry
+_networks = {}
+_lock = threading.Lock()
+
+
+def split_authors(authors):
+    """Split author strings into one row per author, indexed by paper position.
+
+    Names are separated by ';', '&' or 'and' when present, otherwise by commas.
+    """
+    text = authors.fillna("").astype(str).reset_index(drop=True)
+    text = text.str.replace(r"\s*;\s*|\s+and\s+|\s*&\s*", "|", regex=True)
+    text = text.where(text.str.contains("|", regex=False), text.str.replace(",", "|", regex=False))
+    names = text.str.split("|").explode().str.strip()
+    return names[names.str.len() > 0]
+
+
+def _name_keys(names):
+    return names.str.casefold().str.replace(".", " ", regex=False).str.split().str.join(" ")
+
+
+class _Vocabulary:
+    """Stable ids for normalized names; the first spelling seen is kept for display"""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def copy(self):
+        vocabulary = _Vocabulary()
+        vocabulary.ids = dict(self.ids)
+        vocabulary.names = list(self.names)
+        return vocabulary
+
+    def lookup(self, names):
+        keys = _name_keys(names)
+        codes, uniques = pd.factorize(keys)
+        display = names.to_numpy()[np.unique(codes, return_index=True)[1]]
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for i, (key, name) in enumerate(zip(uniques, display)):
+            if key not in self.ids:
+                self.ids[key] = len(self.names)
+                self.names.append(name)
+            ids[i] = self.ids[key]
+        return ids[codes]
+
+    def __len__(self):
+        return len(self.names)
+
+
+class CitationNetwork:
+    """Author-paper and venue-paper incidence matrices over a citation library.
+
+    Papers are columns in library order, so appended citations only add
+    columns; the sparse matrices and statistics are rebuilt lazily when
+    first needed after a change.
+    """
+
+    def __init__(self):
+        self.papers = 0
+        self.authors = _Vocabulary()
+        self.venues = _Vocabulary()
+        self._author_pairs = []
+        self._venue_pairs = []
+        self._matrices = None
+        self._analysis = None
+
+    def copy(self):
+        """Return a network that can be extended without changing this one"""
+        network = copy.copy(self)
+        network.authors = self.authors.copy()
+        network.venues = self.venues.copy()
+        network._author_pairs = list(self._author_pairs)
+        network._venue_pairs = list(self._venue_pairs)
+        return network
+
+    @timed("citation_network.add")
+    def add(self, citations):
+        """Index a DataFrame of citations appended after the ones already added"""
+        first = self.papers
+        if 'authors' in citations:
+            names = split_authors(citations['authors'])
+            if len(names):
+                self._author_pairs.append((self.authors.lookup(names), first + names.index.to_numpy()))
+        if 'journal' in citations:
+            venues = citations['journal'].fillna("").astype(str).str.strip().reset_index(drop=True)
+            venues = venues[venues.str.len() > 0]
+            if len(venues):
+                self._venue_pairs.append((self.venues.lookup(venues), first + venues.index.to_numpy()))
+        self.papers += len(citations)
+        self._matrices = None
+        self._analysis = None
+
+    def _incidence(self, pairs, n_rows):
+        rows = np.concatenate([r for r, _ in pairs]) if pairs else np.empty(0, dtype=np.int64)
+        cols = np.concatenate([c for _, c in pairs]) if pairs else np.empty(0, dtype=np.int64)
+        matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_rows, self.papers))
+        # An author listed twice on one paper still counts once
+        matrix.data[:] = 1.0
+        return matrix
+
+    def matrices(self):
+        """Return (author-paper, venue-paper, co-author) sparse matrices"""
+        if self._matrices is None:
+            author_paper = self._incidence(self._author_pairs, len(self.authors))
+            venue_paper = self._incidence(self._venue_pairs, len(self.venues))
+            coauthors = (author_paper @ author_paper.T).tocsr()
+            coauthors.setdiag(0)
+            coauthors.eliminate_zeros()
+            self._matrices = (author_paper, venue_paper, coauthors)
+        return self._matrices
+
+    @timed("citation_network.analyze")
+    def analyze(self):
+        """Degree, PageRank and component tables for authors, plus venue statistics.
+
+        Returns {'summary', 'authors', 'components', 'venues'}; the result is
+        cached until more citations are added.
+        """
+        if self._analysis is not None:
+            return self._analysis
+        author_paper, venue_paper, coauthors = self.matrices()
+        n_authors = len(self.authors)
+
+        n_components, labels = csgraph.connected_components(coauthors, directed=False)
+        sizes = np.bincount(labels, minlength=n_components)
+        # Number components from the largest down
+        rank = np.empty(n_components, dtype=np.int64)
+        rank[np.argsort(-sizes, kind="stable")] = np.arange(1, n_components + 1)
+
+        authors = pd.DataFrame({
+            'author': self.authors.names,
+            'papers': np.asarray(author_paper.sum(axis=1)).ravel().astype(int),
+            'coauthors': coauthors.getnnz(axis=1),
+            'collaborations': np.asarray(coauthors.sum(axis=1)).ravel().astype(int),
+            'degree_centrality': coauthors.getnnz(axis=1) / max(n_authors - 1, 1),
+            'pagerank': _pagerank(coauthors),
+            'component': rank[labels]
+        }).sort_values('pagerank', ascending=False, ignore_index=True)
+
+        components = authors.groupby('component').agg(
+            authors=('author', "size"),
+            collaborations=('collaborations', "sum"),
+            top_author=('author', "first")
+        )
+        components['collaborations'] //= 2
+        # Papers per component: papers with at least one of its authors
+        membership = sparse.csr_matrix(
+            (np.ones(n_authors), (rank[labels] - 1, np.arange(n_authors))), shape=(n_components, n_authors)
+        )
+        components['papers'] = np.asarray(((membership @ author_paper) > 0).sum(axis=1)).ravel()[components.index - 1]
+        components = components.sort_values('authors', ascending=False)
+
+        venue_authors = (venue_paper @ author_paper.T) > 0
+        venues = pd.DataFrame({
+            'venue': self.venues.names,
+            'papers': np.asarray(venue_paper.sum(axis=1)).ravel().astype(int),
+            'authors': np.asarray(venue_authors.sum(axis=1)).ravel().astype(int)
+        }).sort_values('papers', ascending=False, ignore_index=True)
+        venues['share'] = venues['papers'] / max(self.papers, 1)
+
+        self._analysis = {
+            'summary': {
+                'papers': self.papers,
+                'authors': n_authors,
+                'venues': len(self.venues),
+                'collaborations': coauthors.nnz // 2,
+                'components': n_components,
+                'largest_component': int(sizes.max()) if n_components else 0
+            },
+            'authors': authors,
+            'components': components,
+            'venues': venues
+        }
+        return self._analysis
+
+
+def _pagerank(graph):
+    """Weighted PageRank by power iteration; isolated authors share the teleport mass"""
+    n = graph.shape[0]
+    if n == 0:
+        return np.empty(0)
+    out_weight = np.asarray(graph.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transition = (sparse.diags(inverse) @ graph).T.tocsr()
+    scores = np.full(n, 1.0 / n)
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        updated = PAGERANK_DAMPING * (transition @ scores + scores[dangling].sum() / n) + (1 - PAGERANK_DAMPING) / n
+        if np.abs(updated - scores).sum() < PAGERANK_TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def build_network(citations):
+    """Build a network from a citations DataFrame"""
+    network = CitationNetwork()
+    network.add(citations)
+    return network
+
+
+def _file_state(path):
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read_appended(path, indexed):
+    """Read rows appended since `indexed` = (header, offset, marker); None if the file was rewritten"""
+    header, offset, marker = indexed
+    with open(path, "rb") as f:
+        if f.readline() != header:
+            return None
+        f.seek(offset - len(marker))
+        if f.read(len(marker)) != marker:
+            return None
+        data = f.read()
+    columns = next(csv.reader([header.decode("utf-8")]))
+    rows = pd.read_csv(io.BytesIO(data), header=None, names=columns) if data.strip() else pd.DataFrame(columns=columns)
+    return rows, offset + len(data)
+
+
+@timed("citation_network.get_network")
+def get_network(username=None):
+    """Return the user's library network, indexing only rows appended since the last call"""
+    path = citations_path(username)
+    # Taken before reading, so rows appended meanwhile are picked up next time
+    state = _file_state(path)
+    with _lock:
+        cached = _networks.get(path)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    if state is None:
+        return CitationNetwork()
+
+    network = None
+    if cached is not None:
+        appended = _read_appended(path, cached[2])
+        if appended is not None:
+            rows, offset = appended
+            # Other sessions may be reading the cached network
+            network = cached[1].copy()
+            network.add(rows)
+    if network is None:
+        data = path.read_bytes()
+        offset = len(data)
+        network = build_network(pd.read_csv(io.BytesIO(data)) if data.strip() else pd.DataFrame())
+        logger.info(f"Built citation network for {network.papers} papers")
+
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = max(offset - APPEND_MARKER_SIZE, 0)
+        f.seek(start)
+        marker = f.read(offset - start)
+    with _lock:
+        _networks[path] = (state, network, (header, offset, marker))
+    return network
+
+
+def network_figure(analysis, network, top=40):
+    """Plot the co-author graph of the most central authors, grouped by component"""
+    authors = analysis['authors'].head(top)
+    _, _, coauthors = network.matrices()
+    ids = [network.authors.ids[key] for key in _name_keys(authors['author'])]
+    order = np.argsort(authors['component'].to_numpy(), kind="stable")
+    angles = np.linspace(0, 2 * np.pi, len(authors), endpoint=False)
+    x = np.empty(len(authors))
+    y = np.empty(len(authors))
+    x[order], y[order] = np.cos(angles), np.sin(angles)
+
+    edges = coauthors[ids][:, ids].tocoo()
+    edge_x, edge_y = [], []
+    for i, j in zip(edges.row, edges.col):
+        if i < j:
+            edge_x += [x[i], x[j], None]
+            edge_y += [y[i], y[j], None]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=edge_x, y=edge_y, mode="lines", line=dict(width=0.5, color="#bbb"), hoverinfo="none"))
+    fig.add_trace(go.Scatter(
+        x=x, y=y, mode="markers+text", text=authors['author'], textposition="top center",
+        marker=dict(size=8 + 40 * authors['pagerank'] / max(authors['pagerank'].max(), 1e-12),
+                    color=authors['component'], colorscale="Viridis"),
+        hovertext=[f"{a}: {p} papers, {c} co-authors" for a, p, c in
+                   zip(authors['author'], authors['papers'], authors['coauthors'])],
+        hoverinfo="text"
+    ))
+    fig.update_layout(
+        title=f"Co-author network (top {len(authors)} authors by PageRank)",
+        showlegend=False,
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False)
+    )
+    return fig
@@ -0,0 +1,37 @@
+import pandas as pd
+
+CITATION_STYLES = ["APA", "MLA", "Chicago"]
+
+
+def _field(citation, name):
+    value = citation.get(name)
+    if value is None or pd.isna(value):
+        return ""
+    return str(value).strip()
+
+
+def format_citation(citation, style="APA"):
+    """Format one citation record in the given style"""
+    authors = _field(citation, 'authors')
+    year = _field(citation, 'year')
+    title = _field(citation, 'title')
+    journal = _field(citation, 'journal')
+    doi = _field(citation, 'doi')
+
+    if style == "APA":
+        formatted = f"{authors} ({year}). {title}. {journal}."
+    elif style == "MLA":
+        formatted = f"{authors}. \"{title}.\" {journal}, {year}."
+    elif style == "Chicago":
+        formatted = f"{authors}. {year}. \"{title}.\" {journal}."
+    else:
+        raise ValueError(f"Unsupported citation style: {style}")
+
+    if doi:
+        formatted += f" https://doi.org/{doi}"
+    return formatted
+
+
+def format_citations(citations, style="APA"):
+    """Format every row of a citations DataFrame"""
+    return [format_citation(citation, style) for citation in citations.to_dict(orient="records")]
@@ -0,0 +1,181 @@
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+
+# storage imports this module to report writes; attributes are only used at call time
+from utils import storage
+
+logger = logging.getLogger(__name__)
+
+# Dashboard stage labels and the project columns that hold their progress
+STAGES = [
+    ('Problem Formulation', 'problem_formulation_progress'),
+    ('Literature Review', 'literature_review_progress'),
+    ('Research Design', 'research_design_progress'),
+    ('Data Collection', 'data_collection_progress'),
+    ('Analysis', 'analysis_progress'),
+    ('Reporting', 'reporting_progress')
+]
+
+MAX_ACTIVITY = 20
+
+# Bumped when the summary layout changes; older files are rebuilt
+SUMMARY_VERSION = 2
+
+# path -> summary; the file is only read when a process first needs it
+_cache = {}
+_lock = threading.Lock()
+
+
+def _summary_path(username):
+    return storage.user_file("dashboard.json", username)
+
+
+def _progress(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else max(0.0, min(1.0, value))
+
+
+def _project_entry(project):
+    return {
+        'title': project.get('title'),
+        'status': project.get('status'),
+        'progress': {column: _progress(project.get(column)) for _, column in STAGES},
+        'citations': 0
+    }
+
+
+def _project_key(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(value)
+
+
+def rebuild_summary(username=None):
+    """Recompute the dashboard summary from the user's projects and citations"""
+    summary = {'version': SUMMARY_VERSION, 'projects': {}, 'citations_total': 0, 'activity': []}
+    path = _summary_path(username)
+    with _lock:
+        previous = _cache.get(path)
+    if previous is not None:
+        summary['activity'] = previous['activity']
+
+    for project in storage.load_projects(username).to_dict(orient="records"):
+        summary['projects'][project['id']] = _project_entry(project)
+
+    citations = storage.load_citations(username)
+    if not citations.empty:
+        if 'project_id' in citations:
+            for project_id, count in citations['project_id'].dropna().astype(str).value_counts().items():
+                if project_id in summary['projects']:
+                    summary['projects'][project_id]['citations'] = int(count)
+        summary['citations_total'] = len(citations)
+
+    with _lock:
+        _cache[path] = summary
+        _write(path, summary)
+    return summary
+
+
+def _write(path, summary):
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, path)
+
+
+def _load(username):
+    """Return (path, summary, rebuilt); rebuilt summaries already include the latest writes"""
+    path = _summary_path(username)
+    with _lock:
+        summary = _cache.get(path)
+    if summary is not None:
+        return path, summary, False
+    if path.exists():
+        try:
+            with open(path, "r") as f:
+                summary = json.load(f)
+            if summary.get('version') == SUMMARY_VERSION:
+                with _lock:
+                    summary = _cache.setdefault(path, summary)
+                return path, summary, False
+        except Exception as e:
+            logger.error(f"Error reading dashboard summary: {str(e)}", exc_info=True)
+    return path, rebuild_summary(username), True
+
+
+def _update(username, change):
+    """Apply `change(summary, rebuilt)` to the cached summary and persist it"""
+    try:
+        path, summary, rebuilt = _load(username)
+        with _lock:
+            change(summary, rebuilt)
+            _write(path, summary)
+    except Exception as e:
+        logger.error(f"Error updating dashboard summary: {str(e)}", exc_info=True)
+
+
+def _activity(summary, kind, text):
+    summary['activity'].insert(0, {
+        'time': datetime.now().isoformat(timespec="seconds"),
+        'kind': kind,
+        'text': text
+    })
+    del summary['activity'][MAX_ACTIVITY:]
+
+
+def record_activity(kind, text, username=None):
+    """Add an entry to the recent activity feed"""
+    _update(username, lambda summary, rebuilt: _activity(summary, kind, text))
+
+
+def record_project(project_data, username=None, created=True):
+    """Add or refresh one project's entry"""
+    def change(summary, rebuilt):
+        key = project_data['id']
+        entry = _project_entry(project_data)
+        entry['citations'] = summary['projects'].get(key, {}).get('citations', 0)
+        summary['projects'][key] = entry
+        if created:
+            _activity(summary, "project", f"Created project {entry['title']}")
+    _update(username, change)
+
+
+def remove_project(project_id, username=None):
+    """Drop a deleted project's entry"""
+    def change(summary, rebuilt):
+        entry = summary['projects'].pop(project_id, None)
+        if entry is not None:
+            _activity(summary, "project", f"Deleted project {entry['title']}")
+    _update(username, change)
+
+
+def record_citations(records, username=None):
+    """Count newly saved citations towards their projects"""
+    def change(summary, rebuilt):
+        if not rebuilt:
+            for record in records:
+                project = summary['projects'].get(_project_key(record.get('project_id')))
+                if project is not None:
+                    project['citations'] += 1
+            summary['citations_total'] += len(records)
+        text = f"Added citation {records[0].get('title')}" if len(records) == 1 else f"Added {len(records):,} citations"
+        _activity(summary, "citation", text)
+    if records:
+        _update(username, change)
+
+
+def get_dashboard(username=None):
+    """Return the user's dashboard summary; treat it as read-only"""
+    return _load(username)[1]
+
+
+def get_project_summary(project_id, username=None):
+    """Return one project's progress and citation count, or None"""
+    return get_dashboard(username)['projects'].get(project_id)
@@ -0,0 +1,143 @@
+import logging
+import re
+import shutil
+
+import pandas as pd
+
+from utils.instrumentation import timed
+from utils.lazy_imports import lazy_import
+from utils.storage import user_data_dir
+
+logger = logging.getLogger(__name__)
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+feather = lazy_import("pyarrow.feather")
+
+# Extension -> format; compressed CSVs are decompressed by pandas on the fly
+DATASET_FORMATS = {
+    'csv': "csv", 'txt': "csv",
+    'gz': "csv", 'bz2': "csv", 'zip': "csv", 'xz': "csv", 'zst': "csv",
+    'parquet': "parquet", 'pq': "parquet",
+    'feather': "feather", 'arrow': "feather", 'ipc': "feather",
+    'xlsx': "excel", 'xlsm': "excel", 'xls': "excel"
+}
+
+# Columnar formats can be read column by column from a memory map
+COLUMNAR_FORMATS = {"parquet", "feather"}
+
+# Bytes copied at a time when saving an upload
+UPLOAD_CHUNK_SIZE = 8 << 20
+
+
+def datasets_dir(username=None):
+    path = user_data_dir(username) / "datasets"
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def detect_format(name):
+    """Return the dataset format for a file name"""
+    extension = str(name).rsplit(".", 1)[-1].lower()
+    if extension not in DATASET_FORMATS:
+        raise ValueError(f"Unsupported dataset file: {name}")
+    return DATASET_FORMATS[extension]
+
+
+def _create_unique(directory, name):
+    """Create a new file for `name`, numbering it (data-1.csv.gz, ...) if the name is taken"""
+    base, dot, extension = name.partition(".")
+    candidate = name
+    suffix = 0
+    while True:
+        try:
+            return directory / candidate, open(directory / candidate, "xb")
+        except FileExistsError:
+            suffix += 1
+            candidate = f"{base}-{suffix}{dot}{extension}"
+
+
+def save_upload(uploaded_file, username=None):
+    """Stream an uploaded file into the user's datasets directory and return its path.
+
+    An existing dataset with the same name is kept; the upload gets a numbered name.
+    """
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", uploaded_file.name)
+    path, f = _create_unique(datasets_dir(username), name)
+    uploaded_file.seek(0)
+    with f:
+        shutil.copyfileobj(uploaded_file, f, UPLOAD_CHUNK_SIZE)
+    logger.info(f"Saved dataset {path.name} ({path.stat().st_size} bytes)")
+    return path
+
+
+def list_datasets(username=None):
+    """List readable dataset files in the user's datasets directory, newest first"""
+    paths = [path for path in datasets_dir(username).iterdir()
+             if path.is_file() and path.suffix.lstrip(".").lower() in DATASET_FORMATS]
+    return sorted(paths, key=lambda path: path.stat().st_mtime, reverse=True)
+
+
+@timed("data_io.read_schema")
+def read_schema(path):
+    """Return {'columns': {name: dtype}, 'rows': int or None} without loading the data.
+
+    Parquet and Feather read only their footers; CSV and Excel read the
+    header row (their row count is unknown until loaded).
+    """
+    file_format = detect_format(path)
+    if file_format == "parquet":
+        parquet = pq.ParquetFile(path, memory_map=True)
+        schema = parquet.schema_arrow
+        return {
+            'columns': {field.name: str(field.type) for field in schema},
+            'rows': parquet.metadata.num_rows
+        }
+    if file_format == "feather":
+        with pa.memory_map(str(path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            return {
+                'columns': {field.name: str(field.type) for field in reader.schema},
+                'rows': sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+            }
+    if file_format == "excel":
+        header = pd.read_excel(path, nrows=0, engine="openpyxl" if str(path).endswith(("xlsx", "xlsm")) else None)
+        return {'columns': {name: "unknown" for name in header.columns}, 'rows': None}
+    sample = pd.read_csv(path, nrows=1000, compression="infer")
+    return {'columns': {name: str(dtype) for name, dtype in sample.dtypes.items()}, 'rows': None}
+
+
+@timed("data_io.load_dataset")
+def load_dataset(path, columns=None, nrows=None):
+    """Load a dataset, reading only `columns` (all when None).
+
+    Parquet and Feather are memory-mapped so unselected columns are never
+    read from disk; CSV and Excel are parsed with the column filter applied.
+    """
+    file_format = detect_format(path)
+    columns = list(columns) if columns else None
+    if file_format == "parquet":
+        if nrows is not None:
+            parquet = pq.ParquetFile(path, memory_map=True)
+            batch = next(parquet.iter_batches(batch_size=nrows, columns=columns), None)
+            return batch.to_pandas() if batch is not None else pd.DataFrame(columns=columns)
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if file_format == "feather":
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        if nrows is not None:
+            table = table.slice(0, nrows)
+        return table.to_pandas()
+    if file_format == "excel":
+        engine = "openpyxl" if str(path).endswith(("xlsx", "xlsm")) else None
+        return pd.read_excel(path, usecols=columns, nrows=nrows, engine=engine)
+    return pd.read_csv(path, usecols=columns, nrows=nrows, compression="infer")
+
+
+def delete_dataset(path):
+    """Remove a stored dataset file"""
+    try:
+        path.unlink(missing_ok=True)
+        return True
+    except Exception as e:
+        logger.error(f"Error deleting dataset {path}: {str(e)}", exc_info=True)
+        return False
@@ -0,0 +1,263 @@
+import logging
+import re
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from utils.dashboard import rebuild_summary
+from utils.instrumentation import timed
+from utils.storage import citations_path, load_citations, save_citations_batch
+
+logger = logging.getLogger(__name__)
+
+# MinHash signature length, split into LSH bands of BAND_ROWS values.
+# 16 bands of 4 rows make titles with shingle similarity above ~0.5 collide.
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+
+# Candidate pairs are confirmed when their title shingles overlap this much
+TITLE_SIMILARITY = 0.8
+
+SHINGLE_SIZE = 4
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240101)
+_A = _rng.integers(1, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+_DOI_PREFIX = re.compile(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+
+# path -> ((mtime_ns, size), CitationIndex)
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _text(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value)
+
+
+def _project_key(citation):
+    """Citations only duplicate others in the same project; unassigned ones share one scope"""
+    value = citation.get('project_id')
+    # Numeric-looking ids come back from the CSV as numbers
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return _text(value).strip()
+
+
+def normalize_doi(value):
+    return _DOI_PREFIX.sub("", _text(value).strip()).lower()
+
+
+def normalize_title(value):
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", _text(value).lower()).split())
+
+
+def _shingles(title):
+    if len(title) <= SHINGLE_SIZE:
+        return frozenset([title]) if title else frozenset()
+    return frozenset(title[i:i + SHINGLE_SIZE] for i in range(len(title) - SHINGLE_SIZE + 1))
+
+
+def _author_tokens(value):
+    return {token for token in re.findall(r"[a-z]+", _text(value).lower()) if len(token) > 1}
+
+
+def _signature(shingles):
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) % _PRIME for shingle in shingles), dtype=np.uint64, count=len(shingles)
+    )
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def _band_keys(project, signature):
+    return [
+        (project, band, signature[band * BAND_ROWS:(band + 1) * BAND_ROWS].tobytes())
+        for band in range(NUM_PERMUTATIONS // BAND_ROWS)
+    ]
+
+
+class CitationIndex:
+    """Exact DOI index plus MinHash/LSH buckets over title shingles, per project.
+
+    Lookups only compare a citation against the few entries of the same
+    project that share an LSH bucket, so checking one insert stays fast for
+    large libraries and the same paper can be cited in several projects.
+    """
+
+    def __init__(self):
+        self.dois = {}
+        self.buckets = {}
+        self.shingles = []
+        self.authors = []
+        self.titles = []
+
+    def add(self, citation):
+        """Index a citation and return its position"""
+        position = len(self.shingles)
+        project = _project_key(citation)
+        doi = normalize_doi(citation.get('doi'))
+        if doi:
+            self.dois.setdefault((project, doi), position)
+        shingles = _shingles(normalize_title(citation.get('title')))
+        self.shingles.append(shingles)
+        self.authors.append(_author_tokens(citation.get('authors')))
+        self.titles.append(_text(citation.get('title')))
+        if shingles:
+            for key in _band_keys(project, _signature(shingles)):
+                self.buckets.setdefault(key, []).append(position)
+        return position
+
+    def matches(self, citation):
+        """Return (position, reason, score) for indexed citations of the same project that duplicate `citation`"""
+        found = []
+        project = _project_key(citation)
+        doi = normalize_doi(citation.get('doi'))
+        if doi and (project, doi) in self.dois:
+            found.append((self.dois[(project, doi)], "doi", 1.0))
+
+        shingles = _shingles(normalize_title(citation.get('title')))
+        if not shingles:
+            return found
+        authors = _author_tokens(citation.get('authors'))
+        candidates = set()
+        for key in _band_keys(project, _signature(shingles)):
+            candidates.update(self.buckets.get(key, ()))
+        seen = {position for position, _, _ in found}
+        for position in sorted(candidates - seen):
+            other = self.shingles[position]
+            score = len(shingles & other) / len(shingles | other)
+            if score < TITLE_SIMILARITY:
+                continue
+            if authors and self.authors[position] and not authors & self.authors[position]:
+                continue
+            found.append((position, "title", score))
+        return found
+
+
+def _file_state(path):
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def build_index(citations):
+    """Index every row of a citations DataFrame"""
+    index = CitationIndex()
+    for citation in citations.to_dict(orient="records"):
+        index.add(citation)
+    return index
+
+
+@timed("dedup.get_index")
+def get_index(username=None):
+    """Return the user's citation index, rebuilding it only when the library changed on disk"""
+    path = citations_path(username)
+    state = _file_state(path)
+    with _lock:
+        cached = _indexes.get(path)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    index = build_index(load_citations(username))
+    with _lock:
+        _indexes[path] = (state, index)
+    return index
+
+
+def find_duplicates(citation, username=None):
+    """List entries of the citation's project that duplicate it, as {'title', 'reason', 'score'} dicts"""
+    index = get_index(username)
+    return [
+        {'title': index.titles[position], 'reason': reason, 'score': score}
+        for position, reason, score in index.matches(citation)
+    ]
+
+
+@timed("dedup.save_unique_citations")
+def save_unique_citations(records, username=None):
+    """Append only the records that are not already in the library or earlier in the batch.
+
+    Returns (saved, duplicates) counts; the cached index is updated in
+    place instead of being rebuilt.
+    """
+    index = get_index(username)
+    unique = []
+    for record in records:
+        if index.matches(record):
+            continue
+        index.add(record)
+        unique.append(record)
+
+    path = citations_path(username)
+    if not save_citations_batch(unique, username):
+        # The index now holds records that were never written
+        with _lock:
+            _indexes.pop(path, None)
+        raise IOError("Failed to write citations")
+    with _lock:
+        _indexes[path] = (_file_state(path), index)
+    return len(unique), len(records) - len(unique)
+
+
+def add_citation_checked(citation, force=False, username=None):
+    """Save one citation unless it duplicates the library; returns (saved, duplicates)"""
+    duplicates = find_duplicates(citation, username)
+    if duplicates and not force:
+        return False, duplicates
+    index = get_index(username)
+    path = citations_path(username)
+    if not save_citations_batch([citation], username):
+        return False, duplicates
+    index.add(citation)
+    with _lock:
+        _indexes[path] = (_file_state(path), index)
+    return True, duplicates
+
+
+@timed("dedup.find_duplicate_groups")
+def find_duplicate_groups(citations):
+    """Group row positions of a citations DataFrame that refer to the same work within one project"""
+    parent = list(range(len(citations)))
+
+    def find(position):
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = parent[position]
+        return position
+
+    index = CitationIndex()
+    for position, citation in enumerate(citations.to_dict(orient="records")):
+        for match, _, _ in index.matches(citation):
+            parent[find(position)] = find(match)
+        index.add(citation)
+
+    groups = {}
+    for position in range(len(parent)):
+        groups.setdefault(find(position), []).append(position)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def remove_duplicates(username=None):
+    """Keep the most complete entry of each duplicate group and rewrite the library once"""
+    try:
+        citations = load_citations(username)
+        groups = find_duplicate_groups(citations)
+        if not groups:
+            return 0
+        filled = citations.notna().sum(axis=1).to_numpy()
+        drop = []
+        for group in groups:
+            keep = max(group, key=lambda position: (filled[position], -position))
+            drop.extend(position for position in group if position != keep)
+        citations.drop(index=citations.index[drop]).to_csv(citations_path(username), index=False)
+        rebuild_summary(username)
+        logger.info(f"Removed {len(drop)} duplicate citations")
+        return len(drop)
+    except Exception as e:
+        logger.error(f"Error removing duplicate citations: {str(e)}", exc_info=True)
+        return None
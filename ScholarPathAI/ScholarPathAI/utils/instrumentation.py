@@ -0,0 +1,151 @@
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Most recent timings kept per operation; percentiles are computed over these
+MAX_SAMPLES = 2000
+# Most recent rerun profiles kept for the metrics page
+MAX_PROFILES = 20
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_calls = defaultdict(int)
+_profiles = deque(maxlen=MAX_PROFILES)
+
+
+def record_timing(operation, seconds):
+    """Record one timing sample for an operation"""
+    with _lock:
+        _samples[operation].append(seconds)
+        _calls[operation] += 1
+
+
+@contextmanager
+def timer(operation):
+    """Time the enclosed block and record it under `operation`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(operation, time.perf_counter() - start)
+
+
+def timed(operation=None):
+    """Decorator recording the wall time of every call to a function"""
+    def decorator(func):
+        name = operation or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_samples(operation):
+    """Return the recorded timings of an operation in seconds"""
+    with _lock:
+        return np.array(_samples.get(operation, ()), dtype=float)
+
+
+def get_metrics_summary():
+    """Summarize recorded timings per operation with latency percentiles"""
+    with _lock:
+        snapshot = {name: np.array(values, dtype=float) for name, values in _samples.items()}
+        calls = dict(_calls)
+
+    rows = []
+    for name, values in sorted(snapshot.items()):
+        if not len(values):
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        rows.append({
+            'operation': name,
+            'calls': calls.get(name, len(values)),
+            'mean_ms': values.mean() * 1000,
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'max_ms': values.max() * 1000
+        })
+    return pd.DataFrame(rows, columns=['operation', 'calls', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+
+
+def export_metrics_csv():
+    """Export the metrics summary as CSV text"""
+    return get_metrics_summary().to_csv(index=False)
+
+
+def reset_metrics():
+    """Discard all recorded timings and profiles"""
+    with _lock:
+        _samples.clear()
+        _calls.clear()
+        _profiles.clear()
+
+
+def _start_profiler(use_pyinstrument):
+    """Start a pyinstrument profiler if requested and installed, else cProfile"""
+    if use_pyinstrument:
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return "pyinstrument", profiler
+        except ImportError:
+            logger.warning("pyinstrument not installed, falling back to cProfile")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return "cprofile", profiler
+
+
+def _stop_profiler(kind, profiler):
+    """Stop a profiler and return its report as text"""
+    if kind == "pyinstrument":
+        profiler.stop()
+        return profiler.output_text(unicode=True)
+    profiler.disable()
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(40)
+    return output.getvalue()
+
+
+@contextmanager
+def profile_rerun(label, enabled=False, use_pyinstrument=False):
+    """Time a script rerun and optionally capture a profile of it"""
+    profiler = _start_profiler(use_pyinstrument) if enabled else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        record_timing(f"rerun.{label}", duration)
+        if profiler:
+            report = _stop_profiler(*profiler)
+            with _lock:
+                _profiles.append({
+                    'label': label,
+                    'timestamp': datetime.now().isoformat(timespec="seconds"),
+                    'duration_ms': duration * 1000,
+                    'profiler': profiler[0],
+                    'report': report
+                })
+
+
+def get_profiles():
+    """Return captured rerun profiles, newest first"""
+    with _lock:
+        return list(reversed(_profiles))
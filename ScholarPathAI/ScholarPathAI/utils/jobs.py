@@ -0,0 +1,349 @@
+import hashlib
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from utils.parallel import SharedFrame, get_process_pool, release_frame, reset_process_pool, retain_frame
+from utils.storage import user_data_dir
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes from a running job
+PROGRESS_INTERVAL = 0.25
+
+ACTIVE_STATUSES = ("pending", "running")
+
+# Finished jobs, their pickled results and rendered artifacts are deleted after this many days
+JOB_TTL_DAYS = float(os.environ.get("SCHOLARPATH_JOB_TTL_DAYS", 7))
+
+# Minimum seconds between expiry sweeps of one job database
+PURGE_INTERVAL = 3600
+
+_futures = {}
+_lock = threading.Lock()
+_ready_dbs = set()
+_last_purge = {}
+
+# Set inside a worker process while a job runs: (job_id, db_path, last_write)
+_current_job = None
+
+
+def _boot_id():
+    """Identify this host and boot, so jobs from before a reboot are recognised as orphaned"""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            boot = f.read().strip()
+    except OSError:
+        boot = ""
+    return f"{socket.gethostname()}:{boot}"
+
+
+BOOT_ID = _boot_id()
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancellation was requested"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def jobs_dir(username=None):
+    """Return the directory holding a user's job database, results and artifacts"""
+    return user_data_dir(username) / "jobs"
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _db_path(username=None):
+    """Return the user's job database, creating the job table on first use"""
+    path = (jobs_dir(username) / "jobs.db").resolve()
+    if path in _ready_dbs:
+        _maybe_purge(path)
+        return path
+    path.parent.mkdir(exist_ok=True, parents=True)
+    with closing(_connect(path)) as conn, conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL DEFAULT 0,
+                message TEXT,
+                error TEXT,
+                result_path TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                submitted TEXT,
+                started TEXT,
+                finished TEXT,
+                owner_pid INTEGER,
+                owner_boot TEXT
+            )
+        """)
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner_pid", "INTEGER"), ("owner_boot", "TEXT")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, submitted)")
+    _ready_dbs.add(path)
+    _maybe_purge(path)
+    return path
+
+
+def _maybe_purge(db_path):
+    now = time.monotonic()
+    with _lock:
+        if now - _last_purge.get(db_path, -PURGE_INTERVAL) < PURGE_INTERVAL:
+            return
+        _last_purge[db_path] = now
+    try:
+        _purge_expired_jobs(db_path)
+    except Exception as e:
+        logger.error(f"Error purging expired jobs: {str(e)}", exc_info=True)
+
+
+def _purge_expired_jobs(db_path, max_age_days=JOB_TTL_DAYS):
+    """Delete finished jobs older than `max_age_days` with their results, and stale report artifacts"""
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    with closing(_connect(db_path)) as conn, conn:
+        rows = conn.execute(
+            "SELECT id, result_path FROM jobs WHERE status NOT IN (?, ?) AND submitted < ?",
+            (*ACTIVE_STATUSES, cutoff.isoformat())
+        ).fetchall()
+        conn.executemany("DELETE FROM jobs WHERE id = ?", [(row['id'],) for row in rows])
+    for row in rows:
+        if row['result_path']:
+            Path(row['result_path']).unlink(missing_ok=True)
+
+    artifacts = 0
+    artifacts_dir = Path(db_path).parent / "artifacts"
+    if artifacts_dir.exists():
+        for path in artifacts_dir.iterdir():
+            if path.stat().st_mtime < cutoff.timestamp():
+                path.unlink(missing_ok=True)
+                artifacts += 1
+    if rows or artifacts:
+        logger.info(f"Purged {len(rows)} expired jobs and {artifacts} report artifacts")
+    return len(rows)
+
+
+def _update(db_path, job_id, **fields):
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with closing(_connect(db_path)) as conn, conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _job_key(func, args, kwargs, key):
+    """Jobs with the same function and inputs share a key and a cached result"""
+    digest = hashlib.sha1(f"{func.__module__}.{func.__qualname__}".encode())
+    if key is not None:
+        digest.update(str(key).encode())
+    else:
+        digest.update(pickle.dumps((args, sorted(kwargs.items())), protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+def _run_job(job_id, db_path, result_path, func, args, kwargs):
+    """Worker-side wrapper: run the job, store its result and final status"""
+    global _current_job
+    _current_job = [job_id, db_path, 0.0]
+    try:
+        _update(db_path, job_id, status="running", started=_now(), message="Running")
+        result = func(*args, **kwargs)
+        with open(result_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _update(db_path, job_id, status="done", progress=1.0, message="Done", finished=_now())
+    except JobCancelled:
+        _update(db_path, job_id, status="cancelled", message="Cancelled", finished=_now())
+    except Exception as e:
+        _update(
+            db_path, job_id, status="failed", message="Failed", finished=_now(),
+            error="".join(traceback.format_exception_only(type(e), e)).strip()
+        )
+    finally:
+        _current_job = None
+
+
+def _on_done(job_id, db_path, frames, future):
+    """Release the job's shared datasets and record jobs whose worker died without reporting a final status"""
+    with _lock:
+        _futures.pop(job_id, None)
+    for key in frames:
+        release_frame(key, f"job:{job_id}")
+    error = None if future.cancelled() else future.exception()
+    if error is not None:
+        logger.error(f"Job {job_id} worker failed: {error}")
+        _update(db_path, job_id, status="failed", message="Worker crashed", error=str(error), finished=_now())
+        reset_process_pool()
+
+
+def _owner_alive(job):
+    """Whether the server process that submitted a job may still be running it"""
+    if job['owner_pid'] is None:
+        return False
+    if job['owner_pid'] == os.getpid() and job['owner_boot'] == BOOT_ID:
+        return job['id'] in _futures
+    host, _, boot = (job['owner_boot'] or "").partition(":")
+    if host != socket.gethostname():
+        # Processes on other hosts sharing this directory can't be checked
+        return True
+    if boot and BOOT_ID.partition(":")[2] and boot != BOOT_ID.partition(":")[2]:
+        return False
+    try:
+        os.kill(job['owner_pid'], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def report_progress(fraction, message=None):
+    """Report progress from inside a job; raises JobCancelled if cancellation was requested.
+
+    Outside a job (e.g. when a function is called inline) this does nothing.
+    """
+    if _current_job is None:
+        return
+    job_id, db_path, last_write = _current_job
+    if fraction < 1 and time.monotonic() - last_write < PROGRESS_INTERVAL:
+        return
+    _current_job[2] = time.monotonic()
+
+    fields = {'progress': max(0.0, min(1.0, fraction))}
+    if message:
+        fields['message'] = message
+    _update(db_path, job_id, **fields)
+    with closing(_connect(db_path)) as conn:
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row and row['cancel_requested']:
+        raise JobCancelled()
+
+
+def find_job(func, key, username=None):
+    """Return the user's latest job submitted for a function and key, or None"""
+    job_key = _job_key(func, (), {}, key)
+    with closing(_connect(_db_path(username))) as conn:
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE key = ? ORDER BY submitted DESC LIMIT 1", (job_key,)
+        ).fetchone()
+    return get_job(row['id'], username) if row else None
+
+
+def submit_job(kind, func, *args, key=None, **kwargs):
+    """Submit `func(*args, **kwargs)` to the process pool as a job of the current user and return its id.
+
+    `func` must be an importable module-level function. If a job with the
+    same function and key (by default, the pickled arguments) already
+    finished, its id is returned and the cached result is reused; if one is
+    still running, that job is returned instead of starting another.
+    Shared datasets passed as arguments are kept in memory until the job ends.
+    """
+    db_path = _db_path()
+    job_key = _job_key(func, args, kwargs, key)
+
+    with _lock:
+        with closing(_connect(db_path)) as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE key = ? ORDER BY submitted DESC LIMIT 1", (job_key,)
+            ).fetchone()
+        if row:
+            if row['status'] == "done" and row['result_path'] and Path(row['result_path']).exists():
+                return row['id']
+            if row['status'] in ACTIVE_STATUSES and _owner_alive(dict(row)):
+                return row['id']
+
+        job_id = uuid.uuid4().hex
+        frames = [arg.key for arg in args if isinstance(arg, SharedFrame)]
+        for frame_key in frames:
+            if retain_frame(frame_key, f"job:{job_id}") is None:
+                raise ValueError(f"Shared dataset {frame_key[:12]} has already been released")
+        result_path = db_path.parent / f"{job_id}.pkl"
+        with closing(_connect(db_path)) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, key, status, message, result_path, submitted, owner_pid, owner_boot) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, job_key, "pending", "Queued", str(result_path), datetime.now().isoformat(),
+                 os.getpid(), BOOT_ID)
+            )
+        try:
+            future = get_process_pool().submit(
+                _run_job, job_id, str(db_path), str(result_path), func, args, kwargs
+            )
+        except Exception:
+            for frame_key in frames:
+                release_frame(frame_key, f"job:{job_id}")
+            raise
+        _futures[job_id] = future
+
+    future.add_done_callback(lambda f: _on_done(job_id, db_path, frames, f))
+    logger.info(f"Submitted {kind} job {job_id}")
+    return job_id
+
+
+def get_job(job_id, username=None):
+    """Return one of the user's jobs as a dict, or None if unknown"""
+    if job_id is None:
+        return None
+    db_path = _db_path(username)
+    with closing(_connect(db_path)) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    # An active job whose server process is gone was lost in a restart
+    if job['status'] in ACTIVE_STATUSES and not _owner_alive(job):
+        _update(db_path, job_id, status="failed", message="Interrupted", error="Server restarted", finished=_now())
+        job.update(status="failed", message="Interrupted", error="Server restarted")
+    return job
+
+
+def get_job_result(job_id, username=None):
+    """Load a finished job's result, or None if it is unfinished or its result was purged"""
+    job = get_job(job_id, username)
+    if job is None or job['status'] != "done" or not Path(job['result_path']).exists():
+        return None
+    with open(job['result_path'], "rb") as f:
+        return pickle.load(f)
+
+
+def discard_job_result(job_id, username=None):
+    """Drop a finished job's cached result so the next submission with the same key runs again"""
+    job = get_job(job_id, username)
+    if job is not None and job['result_path']:
+        Path(job['result_path']).unlink(missing_ok=True)
+
+
+def cancel_job(job_id, username=None):
+    """Cancel a queued job, or ask a running one to stop at its next progress report"""
+    db_path = _db_path(username)
+    with _lock:
+        future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        _update(db_path, job_id, status="cancelled", message="Cancelled", finished=_now())
+        return True
+    _update(db_path, job_id, cancel_requested=1, message="Cancelling")
+    return future is not None
+
+
+def list_jobs(limit=50, username=None):
+    """Return the user's most recently submitted jobs"""
+    with closing(_connect(_db_path(username))) as conn:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY submitted DESC LIMIT ?", (limit,)).fetchall()
+    return [dict(row) for row in rows]
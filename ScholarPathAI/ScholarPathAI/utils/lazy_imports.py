@@ -0,0 +1,39 @@
+import importlib
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Return a module that is only imported when first used.
+
+    Heavy optional dependencies (plotly, scipy, scikit-learn, groq) are
+    bound through this at module level so pages that never touch them do
+    not pay their import cost on cold start or page switch.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
+
+
+def is_loaded(name):
+    """Check whether a module has actually been imported"""
+    return name in sys.modules
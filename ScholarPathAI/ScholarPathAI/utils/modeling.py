@@ -0,0 +1,338 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import timed
+from utils.jobs import report_progress
+from utils.lazy_imports import lazy_import
+from utils.profiling import clean_categories
+
+logger = logging.getLogger(__name__)
+
+sparse = lazy_import("scipy.sparse")
+stats = lazy_import("scipy.stats")
+linear_model = lazy_import("sklearn.linear_model")
+metrics = lazy_import("sklearn.metrics")
+
+MODEL_TYPES = {'linear': "Linear regression", 'logistic': "Logistic regression"}
+
+# Rows per design-matrix chunk; only one chunk is materialized at a time
+MODEL_CHUNK_ROWS = 250_000
+
+# Logistic models on more rows than this are fit with SGD over chunks
+INCREMENTAL_MIN_ROWS = 1_000_000
+SGD_EPOCHS = 5
+SGD_STEP_SIZE = 0.01
+
+IRLS_MAX_ITERATIONS = 25
+IRLS_TOLERANCE = 1e-8
+
+# Points kept for the residual plot
+MAX_PLOT_POINTS = 2000
+
+
+def model_formula(target, predictors):
+    """Describe a model as 'target ~ a + b'; used to key cached fits"""
+    return f"{target} ~ {' + '.join(predictors)}"
+
+
+def _encode_predictors(data, predictors):
+    """Encode predictors once for the whole dataset.
+
+    Numeric columns become a float block; other columns become integer
+    codes whose first level is the reference category of a one-hot
+    encoding. Returns (numeric, categorical, names, complete).
+    """
+    numeric_columns = []
+    numeric_names = []
+    categorical = []
+    categorical_names = []
+    complete = np.ones(len(data), dtype=bool)
+    for column in predictors:
+        series = data[column]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            complete &= np.isfinite(values)
+            numeric_columns.append(values)
+            numeric_names.append(column)
+        else:
+            codes, levels = pd.factorize(clean_categories(series), sort=True)
+            complete &= codes >= 0
+            categorical.append((codes, len(levels)))
+            categorical_names.extend(f"{column}[{level}]" for level in levels[1:])
+    numeric = np.column_stack(numeric_columns) if numeric_columns else np.empty((len(data), 0))
+    return numeric, categorical, numeric_names + categorical_names, complete
+
+
+def _design_chunk(numeric, categorical, rows, intercept=True, center=None, scale=None):
+    """Build the sparse design matrix for the given row positions"""
+    blocks = []
+    if intercept:
+        blocks.append(sparse.csr_matrix(np.ones((len(rows), 1))))
+    if numeric.shape[1]:
+        values = numeric[rows]
+        if center is not None:
+            values = (values - center) / scale
+        blocks.append(sparse.csr_matrix(values))
+    for codes, n_levels in categorical:
+        chunk_codes = codes[rows]
+        # Level 0 is the reference category and gets no column
+        hits = np.nonzero(chunk_codes > 0)[0]
+        blocks.append(sparse.csr_matrix(
+            (np.ones(len(hits)), (hits, chunk_codes[hits] - 1)),
+            shape=(len(rows), max(n_levels - 1, 0))
+        ))
+    return sparse.hstack(blocks, format="csr")
+
+
+def _chunks(rows):
+    for start in range(0, len(rows), MODEL_CHUNK_ROWS):
+        yield rows[start:start + MODEL_CHUNK_ROWS]
+
+
+def _coefficient_table(names, coef, std_err, test_dist, df=None):
+    statistic = np.divide(coef, std_err, out=np.full_like(coef, np.nan), where=std_err > 0)
+    if test_dist == "t":
+        p_value = 2 * stats.t.sf(np.abs(statistic), df)
+        critical = stats.t.ppf(0.975, df)
+    else:
+        p_value = 2 * stats.norm.sf(np.abs(statistic))
+        critical = stats.norm.ppf(0.975)
+    return pd.DataFrame({
+        'coef': coef,
+        'std_err': std_err,
+        f"{test_dist}_stat": statistic,
+        'p_value': p_value,
+        'ci_low': coef - critical * std_err,
+        'ci_high': coef + critical * std_err
+    }, index=pd.Index(names, name='term'))
+
+
+def _variance_inflation(xtx, n):
+    """VIFs of the non-intercept columns from the cross-product matrix"""
+    means = xtx[0, 1:] / n
+    cov = (xtx[1:, 1:] - n * np.outer(means, means)) / max(n - 1, 1)
+    sd = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(sd, sd)
+    valid = sd > 0
+    vif = np.full(len(sd), np.nan)
+    if valid.any():
+        vif[valid] = np.diag(np.linalg.pinv(corr[np.ix_(valid, valid)]))
+    return np.concatenate([[np.nan], vif])
+
+
+def _fit_linear(numeric, categorical, names, y, rows):
+    """OLS from cross-products accumulated chunk by chunk, then a residual pass"""
+    p = len(names)
+    xtx = np.zeros((p, p))
+    xty = np.zeros(p)
+    chunks = list(_chunks(rows))
+    for i, chunk in enumerate(chunks):
+        report_progress(0.5 * i / len(chunks), "Accumulating cross-products")
+        X = _design_chunk(numeric, categorical, chunk)
+        xtx += (X.T @ X).toarray()
+        xty += X.T @ y[chunk]
+
+    n = len(rows)
+    xtx_inv = np.linalg.pinv(xtx)
+    coef = xtx_inv @ xty
+    rank = np.linalg.matrix_rank(xtx)
+    df = n - rank
+    if df <= 0:
+        raise ValueError("Not enough complete rows to fit the model")
+
+    # Second pass: residual moments, Durbin-Watson and a plot sample
+    rss = r3 = r4 = dw = 0.0
+    previous = None
+    stride = max(1, n // MAX_PLOT_POINTS)
+    sample = []
+    for i, chunk in enumerate(chunks):
+        report_progress(0.5 + 0.5 * i / len(chunks), "Computing residuals")
+        fitted = _design_chunk(numeric, categorical, chunk) @ coef
+        residuals = y[chunk] - fitted
+        rss += residuals @ residuals
+        r3 += np.sum(residuals ** 3)
+        r4 += np.sum(residuals ** 4)
+        diffs = np.diff(residuals if previous is None else np.concatenate([[previous], residuals]))
+        dw += diffs @ diffs
+        previous = residuals[-1]
+        offset = i * MODEL_CHUNK_ROWS
+        picks = np.arange((-offset) % stride, len(chunk), stride)
+        sample.append(pd.DataFrame({'fitted': fitted[picks], 'residual': residuals[picks]}))
+
+    sigma2 = rss / df
+    std_err = np.sqrt(np.clip(np.diag(xtx_inv), 0, None) * sigma2)
+    coefficients = _coefficient_table(names, coef, std_err, "t", df)
+    coefficients['vif'] = _variance_inflation(xtx, n)
+
+    y_used = y[rows]
+    tss = np.sum((y_used - y_used.mean()) ** 2)
+    r_squared = 1 - rss / tss if tss > 0 else np.nan
+    model_df = rank - 1
+    f_stat = ((tss - rss) / model_df) / sigma2 if model_df > 0 and sigma2 > 0 else np.nan
+    skew = (r3 / n) / (rss / n) ** 1.5 if rss > 0 else np.nan
+    kurtosis = (r4 / n) / (rss / n) ** 2 if rss > 0 else np.nan
+    jarque_bera = n / 6 * (skew ** 2 + (kurtosis - 3) ** 2 / 4)
+
+    return {
+        'method': "ols",
+        'coefficients': coefficients,
+        'diagnostics': {
+            'observations': n,
+            'r_squared': r_squared,
+            'adj_r_squared': 1 - (1 - r_squared) * (n - 1) / df if tss > 0 else np.nan,
+            'f_statistic': f_stat,
+            'f_p_value': stats.f.sf(f_stat, model_df, df) if model_df > 0 else np.nan,
+            'residual_std_error': np.sqrt(sigma2),
+            'durbin_watson': dw / rss if rss > 0 else np.nan,
+            'jarque_bera': jarque_bera,
+            'jarque_bera_p_value': stats.chi2.sf(jarque_bera, 2),
+            'condition_number': np.sqrt(np.linalg.cond(xtx))
+        },
+        'residuals': pd.concat(sample, ignore_index=True)
+    }
+
+
+def _classification_diagnostics(y, probabilities, log_likelihood, parameters):
+    n = len(y)
+    rate = y.mean()
+    null_ll = n * (rate * np.log(rate) + (1 - rate) * np.log(1 - rate)) if 0 < rate < 1 else 0.0
+    return {
+        'observations': n,
+        'log_likelihood': log_likelihood,
+        'null_log_likelihood': null_ll,
+        'pseudo_r_squared': 1 - log_likelihood / null_ll if null_ll else np.nan,
+        'aic': 2 * parameters - 2 * log_likelihood,
+        'accuracy': np.mean((probabilities >= 0.5) == y),
+        'roc_auc': metrics.roc_auc_score(y, probabilities) if 0 < rate < 1 else np.nan
+    }
+
+
+def _log_likelihood(y, probabilities):
+    probabilities = np.clip(probabilities, 1e-15, 1 - 1e-15)
+    return np.sum(y * np.log(probabilities) + (1 - y) * np.log(1 - probabilities))
+
+
+def _fit_logistic_irls(numeric, categorical, names, y, rows):
+    """Maximum likelihood by iteratively reweighted least squares"""
+    X = _design_chunk(numeric, categorical, rows)
+    y = y[rows]
+    coef = np.zeros(X.shape[1])
+    converged = False
+    for iteration in range(1, IRLS_MAX_ITERATIONS + 1):
+        report_progress(iteration / IRLS_MAX_ITERATIONS, f"Newton step {iteration}")
+        probabilities = 1 / (1 + np.exp(-(X @ coef)))
+        weights = probabilities * (1 - probabilities)
+        hessian = (X.T @ X.multiply(weights[:, None])).toarray()
+        step = np.linalg.lstsq(hessian, X.T @ (y - probabilities), rcond=None)[0]
+        coef += step
+        if np.max(np.abs(step)) < IRLS_TOLERANCE:
+            converged = True
+            break
+
+    probabilities = 1 / (1 + np.exp(-(X @ coef)))
+    weights = probabilities * (1 - probabilities)
+    covariance = np.linalg.pinv((X.T @ X.multiply(weights[:, None])).toarray())
+    std_err = np.sqrt(np.clip(np.diag(covariance), 0, None))
+    diagnostics = _classification_diagnostics(y, probabilities, _log_likelihood(y, probabilities), len(coef))
+    diagnostics.update({'converged': converged, 'iterations': iteration})
+    if not converged:
+        logger.warning("Logistic regression did not converge; the classes may be perfectly separated")
+    return {
+        'method': "irls",
+        'coefficients': _coefficient_table(names, coef, std_err, "z"),
+        'diagnostics': diagnostics
+    }
+
+
+def _fit_logistic_sgd(numeric, categorical, names, y, rows):
+    """Averaged log-loss SGD with partial_fit over chunks; numeric columns are standardized.
+
+    The intercept is an explicit column: on sparse input scikit-learn damps
+    its own intercept updates, which left it far from the maximum likelihood
+    estimate after a few epochs.
+    """
+    center = numeric[rows].mean(axis=0)
+    scale = numeric[rows].std(axis=0)
+    scale[scale == 0] = 1.0
+    model = linear_model.SGDClassifier(loss="log_loss", alpha=1e-6, fit_intercept=False, learning_rate="constant",
+                                       eta0=SGD_STEP_SIZE, average=True, random_state=0)
+    rng = np.random.default_rng(0)
+    chunks = list(_chunks(rows))
+    for epoch in range(SGD_EPOCHS):
+        for i in rng.permutation(len(chunks)):
+            report_progress((epoch + i / len(chunks)) / SGD_EPOCHS, f"SGD epoch {epoch + 1}")
+            chunk = chunks[i]
+            X = _design_chunk(numeric, categorical, chunk, center=center, scale=scale)
+            model.partial_fit(X, y[chunk], classes=np.array([0.0, 1.0]))
+
+    probabilities = np.concatenate([
+        model.predict_proba(
+            _design_chunk(numeric, categorical, chunk, center=center, scale=scale)
+        )[:, 1]
+        for chunk in chunks
+    ])
+
+    # Undo the standardization so coefficients are on the original scale
+    coef = model.coef_[0].copy()
+    n_numeric = numeric.shape[1]
+    coef[1:n_numeric + 1] /= scale
+    coef[0] -= np.sum(coef[1:n_numeric + 1] * center)
+    y = y[rows]
+    coefficients = pd.DataFrame(
+        {'coef': coef},
+        index=pd.Index(names, name='term')
+    )
+    diagnostics = _classification_diagnostics(y, probabilities, _log_likelihood(y, probabilities), len(names))
+    diagnostics['epochs'] = SGD_EPOCHS
+    return {'method': "sgd", 'coefficients': coefficients, 'diagnostics': diagnostics}
+
+
+@timed("modeling.fit_model")
+def fit_model(data, target, predictors, model_type="linear"):
+    """Fit a linear or logistic regression of `target` on `predictors`.
+
+    Categorical predictors are one-hot encoded into a sparse design matrix
+    against their first level; rows with missing values are dropped.
+    Returns the coefficient table and model diagnostics.
+    """
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"Unsupported model type: {model_type}")
+    predictors = [column for column in predictors if column != target]
+    if not predictors:
+        raise ValueError("Select at least one predictor")
+
+    numeric, categorical, names, complete = _encode_predictors(data, predictors)
+    names = ["Intercept"] + names
+    classes = None
+    if model_type == "linear":
+        y = pd.to_numeric(data[target], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        codes, classes = pd.factorize(clean_categories(data[target]), sort=True)
+        if len(classes) != 2:
+            raise ValueError(f"Logistic regression needs a target with exactly 2 classes (found {len(classes)})")
+        y = np.where(codes >= 0, codes, np.nan).astype(np.float64)
+    complete &= np.isfinite(y)
+    rows = np.nonzero(complete)[0]
+    if len(rows) <= len(names):
+        raise ValueError("Not enough complete rows to fit the model")
+
+    if model_type == "linear":
+        result = _fit_linear(numeric, categorical, names, y, rows)
+    elif len(rows) > INCREMENTAL_MIN_ROWS:
+        result = _fit_logistic_sgd(numeric, categorical, names, y, rows)
+    else:
+        result = _fit_logistic_irls(numeric, categorical, names, y, rows)
+
+    if model_type == "logistic":
+        result['coefficients']['odds_ratio'] = np.exp(result['coefficients']['coef'])
+        result['classes'] = [classes[0], classes[1]]
+    result.update({
+        'model_type': model_type,
+        'formula': model_formula(target, predictors),
+        'dropped_rows': len(data) - len(rows)
+    })
+    logger.info(f"Fit {model_type} model {result['formula']} on {len(rows)} rows ({result['method']})")
+    return result
@@ -0,0 +1,253 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Worker processes shared by every session; set SCHOLARPATH_WORKERS to scale across cores
+MAX_WORKERS = int(os.environ.get("SCHOLARPATH_WORKERS", min(4, os.cpu_count() or 1)))
+
+_pool = None
+_pool_lock = threading.Lock()
+# key -> (handle, segments, owners); segments are unlinked when the last owner releases them
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_process_pool():
+    """Return the shared process pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn avoids forking a multi-threaded Streamlit server
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Started process pool with {MAX_WORKERS} workers")
+        return _pool
+
+
+def reset_process_pool(wait=False):
+    """Drop the pool so the next submission starts a fresh one; queued work is cancelled.
+
+    With wait=True this blocks until running work has finished.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class SharedFrame:
+    """Picklable handle to a DataFrame stored in shared memory.
+
+    Numeric columns are stored as one block per NumPy dtype and other
+    columns as int32 codes; their labels and dtypes are serialized once
+    into a bytes segment indexed by offsets. Sending a handle to a worker
+    therefore costs a few hundred bytes plus the column names, however
+    many distinct labels the data has. Every column comes back with the
+    dtype it was shared with.
+    """
+
+    def __init__(self, key, blocks, codes_name, labels_name, code_columns, label_offsets, columns, n_rows):
+        self.key = key
+        self.blocks = blocks
+        self.codes_name = codes_name
+        self.labels_name = labels_name
+        self.code_columns = code_columns
+        self.label_offsets = label_offsets
+        self.columns = columns
+        self.n_rows = n_rows
+
+    def attach(self, columns=None):
+        """Rebuild the DataFrame in a worker without copying the numeric blocks.
+
+        Returns the frame and the shared memory segments, which must stay
+        open while the frame is used and be closed afterwards.
+        """
+        segments = []
+        frames = []
+        wanted = set(columns) if columns is not None else None
+
+        for name, dtype, block_columns in self.blocks:
+            positions = [i for i, c in enumerate(block_columns) if wanted is None or c in wanted]
+            if not positions:
+                continue
+            segment = _attach_segment(name)
+            segments.append(segment)
+            block = np.ndarray((len(block_columns), self.n_rows), dtype=np.dtype(dtype), buffer=segment.buf)
+            frames.append(pd.DataFrame(
+                block[positions].T if len(positions) != len(block_columns) else block.T,
+                columns=[block_columns[i] for i in positions],
+                copy=False
+            ))
+
+        positions = [i for i, c in enumerate(self.code_columns) if wanted is None or c in wanted]
+        if positions:
+            segment = _attach_segment(self.codes_name)
+            segments.append(segment)
+            labels = _attach_segment(self.labels_name)
+            segments.append(labels)
+            codes = np.ndarray((len(self.code_columns), self.n_rows), dtype=np.int32, buffer=segment.buf)
+            for i in positions:
+                with labels.buf[self.label_offsets[i]:self.label_offsets[i + 1]] as view:
+                    categories, dtype = pickle.loads(view)
+                values = pd.Series(pd.Categorical.from_codes(codes[i], categories=categories), name=self.code_columns[i])
+                frames.append(values.astype(dtype).to_frame())
+
+        frame = pd.concat(frames, axis=1, copy=False) if frames else pd.DataFrame(index=range(self.n_rows))
+        return frame[list(columns) if columns is not None else self.columns], segments
+
+
+def _attach_segment(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Spawned workers share the parent's resource tracker, where the segment
+    # is already registered; unregistering here would drop the parent's entry
+    return shared_memory.SharedMemory(name=name)
+
+
+def _create_segment(array):
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+    return segment
+
+
+def retain_frame(key, owner):
+    """Add an owner to a shared dataset; returns its handle, or None if it is not shared"""
+    with _shared_lock:
+        entry = _shared.get(key)
+        if entry is None:
+            return None
+        entry[2].add(owner)
+        return entry[0]
+
+
+def share_frame(data, key, owner):
+    """Copy a DataFrame into shared memory once and return a handle to it.
+
+    `key` identifies the dataset (e.g. its fingerprint) and `owner` the
+    session or job using it. Sharing the same key again adds the owner to
+    the existing handle; the memory is kept until every owner has called
+    release_frame.
+    """
+    handle = retain_frame(key, owner)
+    if handle is not None:
+        return handle
+
+    # Plain NumPy columns are shared as-is, grouped by dtype; nullable and
+    # non-numeric columns are factorized
+    numeric = [c for c in data.columns if isinstance(data[c].dtype, np.dtype) and data[c].dtype.kind in "biufc"]
+    others = [c for c in data.columns if c not in set(numeric)]
+    segments = []
+
+    by_dtype = {}
+    for column in numeric:
+        by_dtype.setdefault(str(data[column].dtype), []).append(column)
+    blocks = []
+    for dtype, block_columns in by_dtype.items():
+        segment = _create_segment(data[block_columns].to_numpy(dtype=np.dtype(dtype)).T)
+        segments.append(segment)
+        blocks.append((segment.name, dtype, block_columns))
+
+    codes_segment = labels_segment = None
+    label_offsets = [0]
+    if others:
+        codes = np.empty((len(others), len(data)), dtype=np.int32)
+        labels = []
+        for i, column in enumerate(others):
+            codes[i], uniques = pd.factorize(data[column])
+            if isinstance(uniques.dtype, pd.CategoricalDtype):
+                # Plain labels; categorical ones would be read back in category order
+                uniques = pd.Index(np.asarray(uniques))
+            labels.append(pickle.dumps((uniques, data[column].dtype), protocol=pickle.HIGHEST_PROTOCOL))
+            label_offsets.append(label_offsets[-1] + len(labels[-1]))
+        codes_segment = _create_segment(codes)
+        segments.append(codes_segment)
+        labels_segment = _create_segment(np.frombuffer(b"".join(labels), dtype=np.uint8))
+        segments.append(labels_segment)
+
+    handle = SharedFrame(
+        key,
+        blocks,
+        codes_segment.name if codes_segment else None,
+        labels_segment.name if labels_segment else None,
+        others,
+        label_offsets,
+        list(data.columns),
+        len(data)
+    )
+
+    with _shared_lock:
+        entry = _shared.setdefault(key, (handle, segments, set()))
+        entry[2].add(owner)
+    if entry[0] is not handle:
+        # Another thread shared the same dataset first
+        _release(segments)
+        return entry[0]
+    logger.info(f"Shared dataset {key[:12]} ({data.shape[0]} rows) in shared memory")
+    return handle
+
+
+def _release(segments):
+    for segment in segments:
+        try:
+            segment.close()
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def release_frame(key, owner):
+    """Drop an owner's reference; the shared memory is freed when no owners remain"""
+    with _shared_lock:
+        entry = _shared.get(key)
+        if entry is None:
+            return
+        entry[2].discard(owner)
+        if entry[2]:
+            return
+        del _shared[key]
+    _release(entry[1])
+    logger.info(f"Released shared dataset {key[:12]}")
+
+
+def release_owners(is_stale):
+    """Drop every owner for which `is_stale(owner)` is true, e.g. closed sessions"""
+    with _shared_lock:
+        stale = [(key, owner) for key, (_, _, owners) in _shared.items() for owner in owners if is_stale(owner)]
+    for key, owner in stale:
+        release_frame(key, owner)
+
+
+@atexit.register
+def _release_all():
+    with _shared_lock:
+        entries = list(_shared.values())
+        _shared.clear()
+    for _, segments, _ in entries:
+        _release(segments)
+
+
+def call_on_shared_frame(func, handle, columns=None, *args, **kwargs):
+    """Worker entry point: attach a shared dataset and run `func(frame, *args, **kwargs)`"""
+    frame, segments = handle.attach(columns)
+    try:
+        result = func(frame, *args, **kwargs)
+        # Results must not keep views into memory that is about to be closed
+        if isinstance(result, (pd.DataFrame, pd.Series, np.ndarray)):
+            result = result.copy()
+        return result
+    finally:
+        del frame
+        for segment in segments:
+            segment.close()
+
@@ -0,0 +1,240 @@
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import timed
+from utils.jobs import report_progress
+
+logger = logging.getLogger(__name__)
+
+# Columns longer than this get a HyperLogLog distinct-count estimate
+HLL_MIN_ROWS = 1_000_000
+
+# 2**14 registers: about 0.8% standard error in 16 KB per column
+HLL_PRECISION = 14
+
+# Rows per chunk when scanning text columns
+PROFILE_CHUNK_ROWS = 1_000_000
+
+# Distinct labels checked when deciding whether text holds dates
+DATE_SAMPLE_SIZE = 200
+
+# Share of values that must parse for a text column to count as numeric/boolean/date
+TYPE_MATCH_SHARE = 0.95
+
+# Text columns with at most this many labels are treated as categorical
+CATEGORICAL_MAX_DISTINCT = 50
+
+Z_THRESHOLD = 3.0
+IQR_FACTOR = 1.5
+
+# Flag columns missing more than this share of values
+NULL_RATE_WARNING = 0.2
+
+MISSING_TOKENS = {"", "na", "n/a", "nan", "null", "none", "-", "?"}
+BOOLEAN_TOKENS = {"true", "false", "yes", "no", "y", "n", "t", "f"}
+
+
+def hll_update(registers, hashes):
+    """Fold 64-bit hashes into HyperLogLog registers in place"""
+    bits = 64 - HLL_PRECISION
+    index = (hashes >> np.uint64(bits)).astype(np.intp)
+    # The remaining 50 bits are exact in float64, so frexp gives their bit length
+    remainder = (hashes & np.uint64((1 << bits) - 1)).astype(np.float64)
+    rank = (bits + 1 - np.frexp(remainder)[1]).astype(np.uint8)
+    np.maximum.at(registers, index, rank)
+
+
+def hll_estimate(registers):
+    """Estimate the number of distinct hashes folded into `registers`"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Linear counting is more accurate for small cardinalities
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+def _new_registers():
+    return np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+
+
+def _normalize_labels(labels):
+    return labels.str.strip().str.replace(r"\s+", " ", regex=True).str.casefold()
+
+
+def _numeric_profile(series):
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = values[~np.isnan(values)]
+    profile = {'nulls': len(values) - len(present), 'invalid': 0, 'dirty_labels': 0}
+    if pd.api.types.is_bool_dtype(series):
+        profile['inferred_type'] = "boolean"
+    elif len(present) and np.all(np.mod(present[np.isfinite(present)], 1) == 0):
+        profile['inferred_type'] = "integer"
+    else:
+        profile['inferred_type'] = "float" if len(present) else "empty"
+
+    if len(present) > HLL_MIN_ROWS:
+        registers = _new_registers()
+        hll_update(registers, pd.util.hash_array(present))
+        profile['distinct'], profile['distinct_estimated'] = hll_estimate(registers), True
+    else:
+        profile['distinct'], profile['distinct_estimated'] = len(pd.unique(present)), False
+
+    finite = present[np.isfinite(present)]
+    if len(finite):
+        q1, q3 = np.quantile(finite, [0.25, 0.75])
+        spread = IQR_FACTOR * (q3 - q1)
+        mean, std = finite.mean(), finite.std()
+        profile.update({
+            'min': finite.min(),
+            'max': finite.max(),
+            'mean': mean,
+            'iqr_outliers': int(np.count_nonzero((finite < q1 - spread) | (finite > q3 + spread))),
+            'z_outliers': int(np.count_nonzero(np.abs(finite - mean) > Z_THRESHOLD * std)) if std > 0 else 0
+        })
+    return profile
+
+
+def _text_profile(series):
+    """Profile a text or categorical column from its distinct labels and their counts.
+
+    Long object columns are scanned in chunks and their distinct count is
+    estimated with HyperLogLog; categorical columns are counted exactly.
+    """
+    chunked = not isinstance(series.dtype, pd.CategoricalDtype) and len(series) > HLL_MIN_ROWS
+    step = PROFILE_CHUNK_ROWS if chunked else max(len(series), 1)
+    registers = _new_registers() if chunked else None
+    totals = {'nulls': 0, 'present': 0, 'numeric': 0, 'boolean': 0}
+    keys = set()
+    distinct = 0
+    date_sample = None
+
+    for start in range(0, len(series), step):
+        chunk = series.iloc[start:start + step]
+        totals['nulls'] += int(chunk.isna().sum())
+        counts = chunk.value_counts()
+        counts = counts[counts > 0]
+        labels = pd.Series(counts.index.astype(str), index=counts.index).str.strip()
+        lowered = labels.str.lower()
+        missing = lowered.isin(MISSING_TOKENS).to_numpy()
+        present = counts[~missing]
+        labels = labels[~missing]
+
+        # Disguised missing values ("N/A", "null", blanks) count as nulls
+        totals['nulls'] += int(counts[missing].sum())
+        totals['present'] += int(present.sum())
+        totals['numeric'] += int(present[pd.to_numeric(labels, errors="coerce").notna().to_numpy()].sum())
+        totals['boolean'] += int(present[lowered[~missing].isin(BOOLEAN_TOKENS).to_numpy()].sum())
+        if date_sample is None:
+            date_sample = labels.iloc[:DATE_SAMPLE_SIZE]
+
+        if chunked:
+            hll_update(registers, pd.util.hash_array(labels.to_numpy(dtype=object)))
+        else:
+            distinct = len(labels)
+            keys = set(_normalize_labels(labels))
+
+    profile = {'nulls': totals['nulls'], 'invalid': 0, 'dirty_labels': None}
+    if chunked:
+        profile['distinct'], profile['distinct_estimated'] = hll_estimate(registers), True
+    else:
+        profile['distinct'], profile['distinct_estimated'] = distinct, False
+        # Labels that only differ from another in case or spacing
+        profile['dirty_labels'] = distinct - len(keys)
+
+    present = totals['present']
+    if not present:
+        profile['inferred_type'] = "empty"
+    elif totals['numeric'] >= TYPE_MATCH_SHARE * present:
+        profile['inferred_type'] = "numeric"
+        profile['invalid'] = present - totals['numeric']
+    elif totals['boolean'] >= TYPE_MATCH_SHARE * present:
+        profile['inferred_type'] = "boolean"
+        profile['invalid'] = present - totals['boolean']
+    elif len(date_sample) and pd.to_datetime(
+            date_sample, errors="coerce", format="mixed").notna().mean() >= TYPE_MATCH_SHARE:
+        profile['inferred_type'] = "datetime"
+    elif profile['distinct'] <= CATEGORICAL_MAX_DISTINCT:
+        profile['inferred_type'] = "categorical"
+    else:
+        profile['inferred_type'] = "text"
+    return profile
+
+
+def _column_issues(row, rows):
+    issues = []
+    if row['null_rate'] > NULL_RATE_WARNING:
+        issues.append(f"{row['null_rate']:.0%} of values are missing")
+    if row['inferred_type'] in ("numeric", "boolean", "datetime") and row['stored_type'].startswith(("object", "string", "category")):
+        invalid = f" ({row['invalid']:,} values don't parse)" if row['invalid'] else ""
+        issues.append(f"{row['inferred_type']} values stored as text{invalid}")
+    if row['dirty_labels']:
+        issues.append(f"{row['dirty_labels']} labels differ from another only in case or spacing")
+    if row['distinct'] == 1 and rows > 1:
+        issues.append("has a single value")
+    outliers = row.get('iqr_outliers')
+    if outliers and not pd.isna(outliers):
+        issues.append(f"{int(outliers):,} IQR outliers, {int(row['z_outliers']):,} beyond {Z_THRESHOLD:g} standard deviations")
+    return issues
+
+
+@timed("profiling.profile_dataset")
+def profile_dataset(data, dtypes=None):
+    """Profile every column of a dataset in one pass per column.
+
+    Returns {'rows', 'columns': DataFrame of per-column statistics, 'issues'}.
+    `dtypes` overrides the reported storage types, e.g. when `data` was
+    re-encoded for shared memory.
+    """
+    dtypes = dtypes or {}
+    rows = len(data)
+    records = []
+    issues = []
+    for i, column in enumerate(data.columns):
+        report_progress(i / max(len(data.columns), 1), f"Profiling {column}")
+        series = data[column]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            profile = _numeric_profile(series)
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            profile = {
+                'nulls': int(series.isna().sum()), 'invalid': 0, 'dirty_labels': 0, 'inferred_type': "datetime",
+                'distinct': int(series.nunique()), 'distinct_estimated': False
+            }
+        else:
+            profile = _text_profile(series)
+
+        record = {
+            'column': column,
+            'stored_type': dtypes.get(column, str(series.dtype)),
+            'null_rate': profile['nulls'] / rows if rows else 0.0,
+            **profile
+        }
+        records.append(record)
+        issues.extend(f"{column}: {issue}" for issue in _column_issues(record, rows))
+
+    report_progress(1.0, "Profile complete")
+    columns = pd.DataFrame(records)
+    if not columns.empty:
+        columns = columns.set_index('column')
+    logger.info(f"Profiled {len(records)} columns ({rows} rows), {len(issues)} issues")
+    return {'rows': rows, 'columns': columns, 'issues': issues}
+
+
+def clean_categories(series):
+    """Merge labels that differ only in case or spacing and blank out missing-value markers.
+
+    Each variant is mapped to its most frequent spelling.
+    """
+    counts = series.value_counts()
+    counts = counts[counts > 0]
+    keys = _normalize_labels(pd.Series(counts.index.astype(str)))
+    canonical = {}
+    mapping = {}
+    for label, key in zip(counts.index, keys):
+        mapping[label] = np.nan if key in MISSING_TOKENS else canonical.setdefault(key, label)
+    return series.map(mapping)
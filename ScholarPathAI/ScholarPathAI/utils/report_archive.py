@@ -0,0 +1,137 @@
+import json
+import logging
+import re
+import uuid
+from datetime import datetime
+from utils.instrumentation import timed
+from utils.storage import user_data_dir
+
+logger = logging.getLogger(__name__)
+
+# Each user's archive index is append-only: one JSON line per archived
+# report, plus tombstones for deletions. Reports are archived from job
+# worker processes, and small appends never interleave, so no
+# cross-process lock is needed.
+REPORT_INDEX_NAME = "index.jsonl"
+
+# Extensions whose archived content is read back as text
+TEXT_FORMATS = {"txt", "md", "html"}
+
+
+def _slug(text):
+    """Make a title safe to use in a file name"""
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_")[:60] or "report"
+
+
+def reports_dir(username=None):
+    """Return the directory holding a user's archived reports"""
+    return user_data_dir(username) / "reports"
+
+
+def _read_index(username=None):
+    entries = {}
+    index_path = reports_dir(username) / REPORT_INDEX_NAME
+    if index_path.exists():
+        with open(index_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A write cut short by a crash; the entries around it are intact
+                    logger.warning(f"Skipping unreadable line in {index_path}")
+                    continue
+                if record.get('deleted'):
+                    entries.pop(record['id'], None)
+                else:
+                    entries[record['id']] = record
+    return list(entries.values())
+
+
+def _append_index(record, username=None):
+    directory = reports_dir(username)
+    directory.mkdir(exist_ok=True, parents=True)
+    line = json.dumps(record) + "\n"
+    with open(directory / REPORT_INDEX_NAME, "ab+") as f:
+        # Start on a fresh line if a previous append was cut short
+        if f.seek(0, 2) > 0:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                line = "\n" + line
+        f.write(line.encode("utf-8"))
+
+
+@timed("report.save_report")
+def save_report(project_title, chunks, extension="txt", username=None):
+    """Stream report chunks to the user's archive and add the report to the index"""
+    try:
+        directory = reports_dir(username)
+        directory.mkdir(exist_ok=True, parents=True)
+        created = datetime.now()
+        report_id = f"{created.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        path = directory / f"{report_id}_{_slug(project_title)}.{extension}"
+
+        if isinstance(chunks, bytes):
+            path.write_bytes(chunks)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                if isinstance(chunks, str):
+                    f.write(chunks)
+                else:
+                    f.writelines(chunks)
+
+        entry = {
+            'id': report_id,
+            'project': project_title,
+            'created': created.isoformat(timespec="seconds"),
+            'file': path.name,
+            'format': extension,
+            'size': path.stat().st_size
+        }
+        _append_index(entry, username)
+        logger.info(f"Archived report {report_id} for {project_title}")
+        return entry
+    except Exception as e:
+        logger.error(f"Error saving report: {str(e)}", exc_info=True)
+        return None
+
+
+@timed("report.list_reports")
+def list_reports(project_title=None, username=None):
+    """List the user's archived reports, newest first, from the index alone"""
+    try:
+        entries = _read_index(username)
+    except Exception as e:
+        logger.error(f"Error reading report index: {str(e)}", exc_info=True)
+        return []
+    if project_title is not None:
+        entries = [entry for entry in entries if entry['project'] == project_title]
+    # The index is in archive order; 'created' only has one-second resolution
+    return entries[::-1]
+
+
+def load_report(entry, username=None):
+    """Read an archived report's content; binary formats are returned as bytes"""
+    path = reports_dir(username) / entry['file']
+    try:
+        if entry.get('format', 'txt') in TEXT_FORMATS:
+            return path.read_text(encoding="utf-8")
+        return path.read_bytes()
+    except Exception as e:
+        logger.error(f"Error loading report {entry['id']}: {str(e)}", exc_info=True)
+        return None
+
+
+def delete_report(report_id, username=None):
+    """Remove a report file and its index entry"""
+    try:
+        entry = next((entry for entry in _read_index(username) if entry['id'] == report_id), None)
+        if entry is None:
+            return False
+        (reports_dir(username) / entry['file']).unlink(missing_ok=True)
+        _append_index({'id': report_id, 'deleted': True}, username)
+        return True
+    except Exception as e:
+        logger.error(f"Error deleting report {report_id}: {str(e)}", exc_info=True)
+        return False
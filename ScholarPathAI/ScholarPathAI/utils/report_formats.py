@@ -0,0 +1,263 @@
+import base64
+import html
+import io
+import logging
+import re
+import struct
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from utils.instrumentation import timed
+from utils.jobs import discard_job_result, get_job, get_job_result, jobs_dir, report_progress, submit_job
+from utils.lazy_imports import lazy_import
+from utils.report_archive import save_report
+from utils.storage import current_username
+from utils.report_generator import (
+    HEADER_TEMPLATE,
+    SECTION_RULE,
+    SECTION_TEMPLATE,
+    build_report_sections,
+    fingerprint
+)
+
+logger = logging.getLogger(__name__)
+
+pio = lazy_import("plotly.io")
+
+REPORT_FORMATS = {
+    'text': {'label': "Plain text", 'extension': "txt", 'mime': "text/plain"},
+    'markdown': {'label': "Markdown", 'extension': "md", 'mime': "text/markdown"},
+    'html': {'label': "HTML", 'extension': "html", 'mime': "text/html"},
+    'docx': {
+        'label': "Word (DOCX)",
+        'extension': "docx",
+        'mime': "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    }
+}
+
+# Figures are inserted after this section
+FIGURES_AFTER_SECTION = "Results"
+
+_XML_INVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _figure_png(spec):
+    """Render a Plotly figure spec to PNG bytes, or None if kaleido is unavailable"""
+    try:
+        return pio.from_json(spec).to_image(format="png", width=900, height=500)
+    except Exception as e:
+        logger.warning(f"Could not render figure image: {str(e)}")
+        return None
+
+
+def _png_size(png):
+    """Read width and height from a PNG header"""
+    return struct.unpack(">II", png[16:24])
+
+
+def render_text(title, date, sections, figures, progress):
+    parts = [HEADER_TEMPLATE.substitute(rule='-' * 50, title=title, date=date)]
+    for number, (heading, body) in enumerate(sections, 1):
+        parts.append(SECTION_TEMPLATE.substitute(number=number, heading=heading, rule=SECTION_RULE, body=body))
+        progress(number / len(sections))
+    return "".join(parts).encode("utf-8")
+
+
+def render_markdown(title, date, sections, figures, progress):
+    parts = [f"# Research Report: {title}\n\n*{date}*\n\n"]
+    for number, (heading, body) in enumerate(sections, 1):
+        parts.append(f"## {number}. {heading}\n\n{body.strip()}\n\n".replace("\n", "  \n"))
+        if heading == FIGURES_AFTER_SECTION:
+            for figure in figures:
+                png = _figure_png(figure['spec'])
+                if png:
+                    encoded = base64.b64encode(png).decode("ascii")
+                    parts.append(f"![{figure['title']}](data:image/png;base64,{encoded})\n\n")
+                else:
+                    parts.append(f"*Figure: {figure['title']}*\n\n")
+        progress(number / len(sections))
+    return "".join(parts).encode("utf-8")
+
+
+def render_html(title, date, sections, figures, progress):
+    parts = [
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">",
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:Georgia,serif;max-width:50em;margin:2em auto;line-height:1.5}"
+        "h1,h2{font-family:Helvetica,Arial,sans-serif}.date{color:#666}</style>",
+        "</head><body>",
+        f"<h1>Research Report: {html.escape(title)}</h1><p class=\"date\">{html.escape(date)}</p>"
+    ]
+    for number, (heading, body) in enumerate(sections, 1):
+        parts.append(f"<h2>{number}. {html.escape(heading)}</h2>")
+        parts.extend(f"<p>{html.escape(line)}</p>" for line in body.splitlines() if line.strip())
+        if heading == FIGURES_AFTER_SECTION:
+            for i, figure in enumerate(figures):
+                try:
+                    fig = pio.from_json(figure['spec'])
+                    parts.append(pio.to_html(fig, include_plotlyjs="cdn" if i == 0 else False, full_html=False))
+                except Exception as e:
+                    logger.warning(f"Could not embed figure {figure['title']}: {str(e)}")
+                    parts.append(f"<p><em>Figure: {html.escape(figure['title'])}</em></p>")
+        progress(number / len(sections))
+    parts.append("</body></html>\n")
+    return "\n".join(parts).encode("utf-8")
+
+
+_DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Default Extension="png" ContentType="image/png"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_DOCX_PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+_DOCX_DOCUMENT = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+ xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+ xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+ xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
+ xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">
+<w:body>{body}<w:sectPr/></w:body></w:document>"""
+
+_DOCX_IMAGE = """<w:p><w:r><w:drawing><wp:inline><wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="{n}" name="Figure {n}"/>\
+<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:pic>\
+<pic:nvPicPr><pic:cNvPr id="{n}" name="image{n}.png"/><pic:cNvPicPr/></pic:nvPicPr>\
+<pic:blipFill><a:blip r:embed="rIdImage{n}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>\
+<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>\
+</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>"""
+
+# Figures are scaled to 6 inches wide; DOCX measures in EMUs
+_DOCX_IMAGE_WIDTH_EMU = 6 * 914400
+
+
+def _docx_paragraph(text, size=None, bold=False):
+    properties = ("<w:b/>" if bold else "") + (f'<w:sz w:val="{size}"/>' if size else "")
+    run_properties = f"<w:rPr>{properties}</w:rPr>" if properties else ""
+    text = escape(_XML_INVALID.sub("", text))
+    return f'<w:p><w:r>{run_properties}<w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+
+def render_docx(title, date, sections, figures, progress):
+    body = [_docx_paragraph(f"Research Report: {title}", size=40, bold=True), _docx_paragraph(date)]
+    images = []
+    for number, (heading, text) in enumerate(sections, 1):
+        body.append(_docx_paragraph(f"{number}. {heading}", size=30, bold=True))
+        body.extend(_docx_paragraph(line) for line in text.splitlines() if line.strip())
+        if heading == FIGURES_AFTER_SECTION:
+            for figure in figures:
+                png = _figure_png(figure['spec'])
+                if png is None:
+                    body.append(_docx_paragraph(f"Figure: {figure['title']}", bold=True))
+                    continue
+                images.append(png)
+                width, height = _png_size(png)
+                body.append(_DOCX_IMAGE.format(
+                    n=len(images), cx=_DOCX_IMAGE_WIDTH_EMU, cy=_DOCX_IMAGE_WIDTH_EMU * height // width
+                ))
+                body.append(_docx_paragraph(figure['title'], bold=True))
+        progress(number / len(sections))
+
+    relationships = "".join(
+        f'<Relationship Id="rIdImage{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image" Target="media/image{n}.png"/>'
+        for n in range(1, len(images) + 1)
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _DOCX_PACKAGE_RELS)
+        docx.writestr("word/_rels/document.xml.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{relationships}</Relationships>'
+        ))
+        docx.writestr("word/document.xml", _DOCX_DOCUMENT.format(body="".join(body)))
+        for n, png in enumerate(images, 1):
+            docx.writestr(f"word/media/image{n}.png", png)
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'text': render_text,
+    'markdown': render_markdown,
+    'html': render_html,
+    'docx': render_docx
+}
+
+
+def artifact_path(job_id, report_format, username=None):
+    """Rendered reports are cached next to the user's jobs"""
+    return jobs_dir(username) / "artifacts" / f"{job_id}.{REPORT_FORMATS[report_format]['extension']}"
+
+
+@timed("report.render")
+def render_report_artifact(report_format, project_data, analysis_results, citations, figures, path, username=None):
+    """Job body: render a report, store it in the artifact cache and archive it in the user's reports"""
+    report_progress(0.0, "Building sections")
+    title, date, sections = build_report_sections(project_data, analysis_results, citations)
+
+    label = REPORT_FORMATS[report_format]['label']
+    # Section building is the first 20% of the work
+    content = RENDERERS[report_format](
+        title, date, sections, figures,
+        lambda fraction: report_progress(0.2 + 0.8 * fraction, f"Rendering {label}")
+    )
+
+    path = Path(path)
+    path.parent.mkdir(exist_ok=True, parents=True)
+    path.write_bytes(content)
+    save_report(title, content, REPORT_FORMATS[report_format]['extension'], username)
+    return str(path)
+
+
+def submit_report_render(report_format, project_data, analysis_results, citations, figures=None):
+    """Submit a report render job and return its job id.
+
+    The job key is a digest of the format and every input, so resubmitting
+    an unchanged report returns the cached artifact instead of rendering again.
+    """
+    figures = figures or []
+    digest = fingerprint([
+        report_format,
+        datetime.now().strftime('%Y-%m-%d'),
+        project_data,
+        analysis_results,
+        fingerprint(citations),
+        figures
+    ])
+    return submit_job(
+        f"report:{report_format}",
+        render_report_artifact,
+        report_format, project_data, analysis_results, citations, figures,
+        str(artifact_path(digest, report_format).resolve()),
+        current_username(),
+        key=digest
+    )
+
+
+def get_report_job(job_id):
+    """Return a render job with its report format, or None if unknown"""
+    job = get_job(job_id)
+    if job is not None:
+        job['format'] = job['kind'].split(":", 1)[1]
+    return job
+
+
+def load_artifact(job):
+    """Read a finished job's rendered report, or None once it has expired.
+
+    An expired job's result is discarded, so submitting the same report
+    renders it again instead of returning the missing artifact.
+    """
+    path = get_job_result(job['id'])
+    if path is not None and Path(path).exists():
+        return Path(path).read_bytes()
+    discard_job_result(job['id'])
+    logger.info(f"Report artifact for job {job['id']} has expired")
+    return None
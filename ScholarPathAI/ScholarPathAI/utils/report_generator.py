@@ -1,62 +1,193 @@
+import ast
+import hashlib
+import io
+import json
+from collections import OrderedDict
 from datetime import datetime
+from string import Template
 
-def generate_research_report(project_data, analysis_results, citations):
-    """Generate a research report"""
-    report = f"""
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import timed
+
+SECTION_RULE = '-' * 20
+
+HEADER_TEMPLATE = Template("""
 Research Report
-{'-' * 50}
+$rule
+
+Title: $title
+Date: $date
+
+""")
+
+SECTION_TEMPLATE = Template("""$number. $heading
+$rule
+$body
+
+""")
 
-Title: {project_data['title']}
-Date: {datetime.now().strftime('%Y-%m-%d')}
+# Rendered section bodies keyed by (section, input fingerprint), so only
+# sections whose inputs changed are rebuilt between report generations
+MAX_CACHED_SECTIONS = 256
+_section_cache = OrderedDict()
 
-1. Introduction
-{'-' * 20}
-{project_data.get('problem_statement', 'No problem statement provided')}
 
-2. Research Questions
-{'-' * 20}
-{format_research_questions(project_data.get('research_questions', []))}
+def _text(value, default):
+    """Return a text field, treating missing values and NaN as absent"""
+    if isinstance(value, str):
+        return value or default
+    if value is None or pd.isna(value):
+        return default
+    return str(value)
 
-3. Methodology
-{'-' * 20}
-{project_data.get('methodology', 'Methodology not specified')}
 
-4. Results
-{'-' * 20}
-{format_analysis_results(analysis_results)}
+def _questions(value):
+    """Research questions may be stored as a list or as its CSV string form"""
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            value = [value]
+    if not isinstance(value, (list, tuple)):
+        return []
+    return list(value)
+
+
+def _json_default(value):
+    """Hash pandas and NumPy values nested in other inputs by content, not by their truncated repr"""
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return fingerprint(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def fingerprint(value):
+    """Stable digest of a section's inputs"""
+    digest = hashlib.sha1()
+    if isinstance(value, pd.DataFrame):
+        digest.update(",".join(map(str, value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(str(value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(pd.util.hash_array(value.ravel()).tobytes())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=_json_default).encode())
+    return digest.hexdigest()
 
-5. References
-{'-' * 20}
-{format_citations(citations)}
-"""
-    return report
 
 def format_research_questions(questions):
     """Format research questions for the report"""
+    questions = _questions(questions)
     if not questions:
         return "No research questions defined"
-    
-    formatted = "Research Questions:\n"
-    for i, q in enumerate(questions, 1):
-        formatted += f"{i}. {q}\n"
-    return formatted
+
+    lines = ["Research Questions:"]
+    lines.extend(f"{i}. {q}" for i, q in enumerate(questions, 1))
+    return "\n".join(lines) + "\n"
+
 
 def format_analysis_results(results):
     """Format analysis results for the report"""
     if not results:
         return "No analysis results available"
-    
-    formatted = "Analysis Results:\n"
-    for key, value in results.items():
-        formatted += f"\n{key}:\n{value}\n"
-    return formatted
+
+    parts = ["Analysis Results:\n"]
+    parts.extend(f"\n{key}:\n{value}\n" for key, value in results.items())
+    return "".join(parts)
+
 
 def format_citations(citations):
     """Format citations in APA style"""
     if citations.empty:
         return "No citations"
-    
-    formatted = "References:\n"
-    for _, citation in citations.iterrows():
-        formatted += f"\n{citation['authors']} ({citation['year']}). {citation['title']}. {citation['journal']}."
-    return formatted
+
+    entries = (
+        citations['authors'].astype(str) + " (" + citations['year'].astype(str) + "). "
+        + citations['title'].astype(str) + ". " + citations['journal'].fillna('').astype(str) + "."
+    )
+    return "References:\n" + "".join("\n" + entry for entry in entries)
+
+
+# (heading, inputs, renderer) for each numbered report section
+REPORT_SECTIONS = [
+    (
+        "Introduction",
+        lambda project, results, citations: _text(
+            project.get('introduction'), _text(project.get('problem_statement'), 'No problem statement provided')
+        ),
+        lambda text: text
+    ),
+    (
+        "Research Questions",
+        lambda project, results, citations: _questions(project.get('research_questions', [])),
+        format_research_questions
+    ),
+    (
+        "Methodology",
+        lambda project, results, citations: _text(project.get('methodology'), 'Methodology not specified'),
+        lambda text: text
+    ),
+    (
+        "Results",
+        lambda project, results, citations: results,
+        format_analysis_results
+    ),
+    (
+        "References",
+        lambda project, results, citations: citations,
+        format_citations
+    )
+]
+
+
+def render_section(heading, inputs, renderer):
+    """Render a section body, reusing the cached body if its inputs are unchanged"""
+    key = (heading, fingerprint(inputs))
+    if key in _section_cache:
+        _section_cache.move_to_end(key)
+        return _section_cache[key]
+
+    body = renderer(inputs)
+    _section_cache[key] = body
+    if len(_section_cache) > MAX_CACHED_SECTIONS:
+        _section_cache.popitem(last=False)
+    return body
+
+
+def build_report_sections(project_data, analysis_results, citations):
+    """Return the report title, date and (heading, body) for each section"""
+    title = _text(project_data.get('title'), 'Untitled project')
+    date = datetime.now().strftime('%Y-%m-%d')
+    sections = [
+        (heading, render_section(heading, select_inputs(project_data, analysis_results, citations), renderer))
+        for heading, select_inputs, renderer in REPORT_SECTIONS
+    ]
+    return title, date, sections
+
+
+def iter_research_report(project_data, analysis_results, citations):
+    """Yield the report piece by piece: the header, then one chunk per section"""
+    title, date, sections = build_report_sections(project_data, analysis_results, citations)
+    yield HEADER_TEMPLATE.substitute(rule='-' * 50, title=title, date=date)
+    for number, (heading, body) in enumerate(sections, 1):
+        yield SECTION_TEMPLATE.substitute(number=number, heading=heading, rule=SECTION_RULE, body=body)
+
+
+def write_research_report(stream, project_data, analysis_results, citations):
+    """Stream a report into a writable text file or buffer"""
+    for chunk in iter_research_report(project_data, analysis_results, citations):
+        stream.write(chunk)
+
+
+@timed("report.generate_research_report")
+def generate_research_report(project_data, analysis_results, citations):
+    """Generate a research report"""
+    buffer = io.StringIO()
+    write_research_report(buffer, project_data, analysis_results, citations)
+    return buffer.getvalue()
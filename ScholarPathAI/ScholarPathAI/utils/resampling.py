@@ -0,0 +1,205 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.instrumentation import timed
+from utils.jobs import report_progress
+from utils.lazy_imports import lazy_import
+from utils.parallel import MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+stats = lazy_import("scipy.stats")
+
+RESAMPLE_STATISTICS = ["mean", "median"]
+
+N_RESAMPLES = 10_000
+
+# Groups are resampled as counts over at most this many support points.
+# Data with fewer distinct values is resampled exactly; otherwise values
+# are replaced by the means of this many quantile bins for resampling
+# only, and point statistics still come from the raw values.
+MAX_SUPPORT = 4096
+
+# Permutations draw value by value ("count") rather than support point by
+# support point ("marginals") while the pooled size is below this many
+# values per support point; per-value draws are ~25x cheaper.
+COUNT_METHOD_RATIO = 16
+
+# Count-matrix cells generated per chunk (rows x support points), ~32 MB
+CHUNK_CELLS = 1 << 22
+
+
+def _clean(values):
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[np.isfinite(values)]
+
+
+def _point_statistic(values, statistic):
+    if statistic == "mean":
+        return np.mean(values)
+    if statistic == "median":
+        return np.median(values)
+    raise ValueError(f"Unsupported statistic: {statistic}")
+
+
+def weighted_support(*groups, max_support=MAX_SUPPORT):
+    """Describe groups as counts over a shared sorted support.
+
+    Returns (support, [counts per group], exact); `exact` is False when
+    the pooled data had to be binned.
+    """
+    ordered = np.sort(np.concatenate(groups))
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    exact = len(starts) <= max_support
+    if exact:
+        support = ordered[starts]
+        return support, [np.bincount(np.searchsorted(support, group), minlength=len(support)) for group in groups], exact
+
+    # Quantile bins; sorting once lets both edges and bin totals come from `ordered`
+    edges = ordered[(np.arange(1, max_support) * len(ordered)) // max_support]
+    edges = edges[np.r_[True, edges[1:] != edges[:-1]]]
+    bins = np.searchsorted(edges, ordered, side="right")
+    totals = np.bincount(bins, minlength=len(edges) + 1)
+    used = totals > 0
+    support = np.bincount(bins, weights=ordered, minlength=len(edges) + 1)[used] / totals[used]
+    # Renumber so empty bins disappear
+    renumber = np.cumsum(used) - 1
+    counts = [
+        np.bincount(renumber[np.searchsorted(edges, group, side="right")], minlength=len(support))
+        for group in groups
+    ]
+    return support, counts, exact
+
+
+def _statistic(counts, support, n, statistic):
+    """Evaluate a statistic for every row of a count matrix"""
+    if statistic == "mean":
+        return counts @ support / n
+    if statistic == "median":
+        return support[np.argmax(np.cumsum(counts, axis=1) >= n / 2, axis=1)]
+    raise ValueError(f"Unsupported statistic: {statistic}")
+
+
+def _run_chunks(draw, n_resamples, support_size, seed, label):
+    """Evaluate `draw(rng, rows)` over chunks of resamples in a thread pool.
+
+    Each chunk gets its own generator spawned from `seed`, so results do
+    not depend on scheduling; NumPy releases the GIL in the heavy loops.
+    """
+    rows = max(1, CHUNK_CELLS // max(support_size, 1))
+    sizes = [min(rows, n_resamples - start) for start in range(0, n_resamples, rows)]
+    generators = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(len(sizes))]
+    results = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for i, result in enumerate(pool.map(draw, generators, sizes)):
+            results.append(result)
+            report_progress((i + 1) / len(sizes), f"{label}: {sum(sizes[:i + 1]):,} resamples")
+    return np.concatenate(results)
+
+
+@timed("resampling.bootstrap_ci")
+def bootstrap_ci(group1, group2=None, statistic="mean", n_resamples=N_RESAMPLES, confidence=0.95, seed=None):
+    """Percentile bootstrap interval for a statistic, or for its difference between two groups.
+
+    Each resample redraws every group with replacement as a multinomial
+    count vector over the group's support. With binned support the
+    replicates are shifted so the interval surrounds the raw estimate.
+    """
+    groups = [_clean(group1)] + ([_clean(group2)] if group2 is not None else [])
+    if any(len(group) == 0 for group in groups):
+        raise ValueError("Bootstrap needs at least one value per group")
+    support, counts, exact = weighted_support(*groups)
+    sizes = [len(group) for group in groups]
+    probabilities = [count / size for count, size in zip(counts, sizes)]
+
+    def draw(rng, rows):
+        values = [
+            _statistic(rng.multinomial(size, p, size=rows), support, size, statistic)
+            for size, p in zip(sizes, probabilities)
+        ]
+        return values[0] - values[1] if len(values) == 2 else values[0]
+
+    replicates = _run_chunks(draw, n_resamples, len(support), seed, "Bootstrap")
+    observed = [_point_statistic(group, statistic) for group in groups]
+    estimate = observed[0] - observed[1] if len(observed) == 2 else observed[0]
+    if not exact:
+        binned = [_statistic(count[None, :], support, size, statistic)[0] for count, size in zip(counts, sizes)]
+        replicates += estimate - (binned[0] - binned[1] if len(binned) == 2 else binned[0])
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(replicates, [alpha, 1 - alpha])
+    return {
+        'estimate': estimate,
+        'ci_low': low,
+        'ci_high': high,
+        'standard_error': replicates.std(ddof=1),
+        'confidence': confidence,
+        'n_resamples': n_resamples,
+        'exact_support': exact
+    }
+
+
+@timed("resampling.permutation_test")
+def permutation_test(group1, group2, statistic="mean", n_resamples=N_RESAMPLES, alternative="two-sided", seed=None):
+    """Permutation test for a difference in a statistic between two groups.
+
+    Relabelling the pooled data is drawn as a multivariate hypergeometric
+    split of the pooled counts, so each permutation costs O(support). The
+    reported statistic is computed from the raw values; with binned support
+    the p-value compares replicates against the binned observed statistic.
+    """
+    group1, group2 = _clean(group1), _clean(group2)
+    if not len(group1) or not len(group2):
+        raise ValueError("Permutation test needs at least one value per group")
+    support, (counts1, counts2), exact = weighted_support(group1, group2)
+    n1, n2 = len(group1), len(group2)
+    pooled = counts1 + counts2
+
+    def difference(counts):
+        return (_statistic(counts, support, n1, statistic)
+                - _statistic(pooled - counts, support, n2, statistic))
+
+    method = "count" if n1 + n2 < COUNT_METHOD_RATIO * len(support) else "marginals"
+
+    def draw(rng, rows):
+        return difference(rng.multivariate_hypergeometric(pooled, n1, size=rows, method=method))
+
+    observed = difference(counts1[None, :])[0]
+    replicates = _run_chunks(draw, n_resamples, len(support), seed, "Permutations")
+    # Tolerance keeps ties from being lost to rounding
+    tolerance = 1e-12 * max(1.0, abs(observed))
+    if alternative == "two-sided":
+        extreme = np.count_nonzero(np.abs(replicates) >= abs(observed) - tolerance)
+    elif alternative == "greater":
+        extreme = np.count_nonzero(replicates >= observed - tolerance)
+    elif alternative == "less":
+        extreme = np.count_nonzero(replicates <= observed + tolerance)
+    else:
+        raise ValueError(f"Unsupported alternative: {alternative}")
+    return {
+        'statistic': _point_statistic(group1, statistic) - _point_statistic(group2, statistic),
+        'p_value': (extreme + 1) / (n_resamples + 1),
+        'n_resamples': n_resamples,
+        'exact_support': exact
+    }
+
+
+@timed("resampling.effect_sizes")
+def effect_sizes(group1, group2):
+    """Cohen's d, Hedges' g and the rank-biserial correlation between two groups"""
+    group1, group2 = _clean(group1), _clean(group2)
+    n1, n2 = len(group1), len(group2)
+    if n1 < 2 or n2 < 2:
+        raise ValueError("Effect sizes need at least two values per group")
+    pooled_sd = np.sqrt(((n1 - 1) * group1.var(ddof=1) + (n2 - 1) * group2.var(ddof=1)) / (n1 + n2 - 2))
+    cohens_d = (group1.mean() - group2.mean()) / pooled_sd if pooled_sd > 0 else np.nan
+    # Mann-Whitney U from mid-ranks of the pooled data
+    ranks = stats.rankdata(np.concatenate([group1, group2]))
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    return {
+        'cohens_d': cohens_d,
+        'hedges_g': cohens_d * (1 - 3 / (4 * (n1 + n2) - 9)),
+        'rank_biserial': 2 * u1 / (n1 * n2) - 1,
+        'common_language': u1 / (n1 * n2)
+    }
@@ -1,5 +1,15 @@
+import hashlib
+import re
+import numpy as np
 import pandas as pd
+from collections import Counter, OrderedDict
 from datetime import datetime
+from functools import lru_cache
+from utils.lazy_imports import lazy_import
+
+px = lazy_import("plotly.express")
+stats = lazy_import("scipy.stats")
+feature_extraction = lazy_import("sklearn.feature_extraction.text")
 
 def create_problem_statement(context, focus, significance):
     """Generate a structured problem statement"""
@@ -16,41 +26,429 @@ which is significant because {significance}."""
     
     return template
 
-def generate_research_questions(problem_statement, num_questions=3):
-    """Generate research questions based on problem statement"""
-    # This would typically use NLP, but for now we'll return template questions
-    questions = [
-        "What are the primary factors affecting the research problem?",
-        "How do these factors interact with each other?",
-        "What are the potential solutions to address this problem?"
-    ]
-    return questions[:num_questions]
-
-def create_research_timeline(start_date, end_date):
-    """Create a research timeline with milestones"""
-    timeline = {
-        'Problem Formulation': {'start': start_date, 'duration': '2 weeks'},
-        'Literature Review': {'start': None, 'duration': '4 weeks'},
-        'Research Design': {'start': None, 'duration': '3 weeks'},
-        'Data Collection': {'start': None, 'duration': '6 weeks'},
-        'Data Analysis': {'start': None, 'duration': '4 weeks'},
-        'Report Writing': {'start': None, 'duration': '4 weeks'}
+# Words from the problem statement template that carry no topic
+_TEMPLATE_WORDS = {
+    "research", "problem", "statement", "context", "focus", "significance", "significant",
+    "aims", "aim", "address", "study", "within", "because"
+}
+
+_GENERIC_QUESTIONS = [
+    "What are the primary factors affecting the research problem?",
+    "How do these factors interact with each other?",
+    "What are the potential solutions to address this problem?"
+]
+
+_QUESTION_TEMPLATES = [
+    (1, "What are the primary factors influencing {0}?"),
+    (2, "How does {0} relate to {1}?"),
+    (1, "What gaps exist in current research on {0}?"),
+    (2, "To what extent does {1} affect outcomes in {0}?"),
+    (1, "How effective are existing approaches to {0}?"),
+    (3, "How do {0}, {1} and {2} interact?"),
+    (1, "What methods are best suited to measuring {0}?")
+]
+
+# Fitted vectorizers by corpus digest, reused across reruns
+MAX_CACHED_VECTORIZERS = 8
+_vectorizers = OrderedDict()
+
+def _stop_words():
+    return feature_extraction.ENGLISH_STOP_WORDS | _TEMPLATE_WORDS
+
+def _tokens(text):
+    return re.findall(r"[a-z][a-z0-9-]*", text.lower())
+
+def extract_phrases(text):
+    """RAKE: split on stop words and punctuation, score phrases by word degree / frequency"""
+    stop_words = _stop_words()
+    phrases = []
+    for fragment in re.split(r"[.,;:!?()\n\"]+", text.lower()):
+        phrase = []
+        for word in _tokens(fragment):
+            if word in stop_words or len(word) < 3:
+                if phrase:
+                    phrases.append(tuple(phrase))
+                phrase = []
+            else:
+                phrase.append(word)
+        if phrase:
+            phrases.append(tuple(phrase))
+
+    frequency, degree = Counter(), Counter()
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+    scores = {}
+    for phrase in phrases:
+        # Long run-on phrases are rarely useful question subjects
+        if len(phrase) <= 4:
+            scores[" ".join(phrase)] = sum(degree[w] / frequency[w] for w in phrase)
+    return scores
+
+def _get_vectorizer(corpus):
+    """Fit (or reuse) a TF-IDF vocabulary over a background corpus such as citation titles.
+
+    Returns the vectorizer and its term names.
+    """
+    digest = hashlib.sha1("\n".join(corpus).encode("utf-8")).hexdigest()
+    if digest in _vectorizers:
+        _vectorizers.move_to_end(digest)
+        return _vectorizers[digest]
+    vectorizer = feature_extraction.TfidfVectorizer(
+        stop_words=list(_stop_words()), ngram_range=(1, 2), sublinear_tf=True, min_df=1
+    )
+    vectorizer.fit(corpus)
+    # Term names are kept alongside so lookups per statement stay cheap
+    _vectorizers[digest] = (vectorizer, vectorizer.get_feature_names_out())
+    while len(_vectorizers) > MAX_CACHED_VECTORIZERS:
+        _vectorizers.popitem(last=False)
+    return _vectorizers[digest]
+
+def rank_key_phrases(problem_statement, corpus=None, limit=5):
+    """Rank RAKE phrases of a statement, boosted by how distinctive their words are in the corpus"""
+    phrases = extract_phrases(problem_statement)
+    if not phrases:
+        return []
+    sentences = [sentence for sentence in re.split(r"[.\n]+", problem_statement) if sentence.strip()]
+    vectorizer, terms = _get_vectorizer(tuple(corpus) if corpus else tuple(sentences))
+    # Only the statement's own non-zero terms are looked at, not the whole vocabulary
+    weights = vectorizer.transform([problem_statement]).tocsr()
+    term_weight = dict(zip(terms[weights.indices], weights.data))
+
+    ranked = []
+    for phrase, score in phrases.items():
+        boost = max((term_weight.get(word, 0) for word in phrase.split()), default=0)
+        boost = max(boost, term_weight.get(phrase, 0))
+        ranked.append((score * (1 + boost), phrase))
+    ranked.sort(reverse=True)
+
+    selected = []
+    for _, phrase in ranked:
+        # Skip phrases whose words run inside an already selected one, or the reverse
+        padded = f" {phrase} "
+        if any(padded in f" {chosen} " or f" {chosen} " in padded for chosen in selected):
+            continue
+        selected.append(phrase)
+        if len(selected) == limit:
+            break
+    return selected
+
+def generate_research_questions(problem_statement, num_questions=3, citations=None):
+    """Generate research questions tailored to the key phrases of a problem statement.
+
+    `citations` (titles of related work) tune which phrases count as
+    distinctive; without any phrases the generic questions are returned.
+    """
+    phrases = rank_key_phrases(problem_statement or "", citations)
+    if not phrases:
+        return _GENERIC_QUESTIONS[:num_questions]
+
+    questions = []
+    for needed, template in _QUESTION_TEMPLATES:
+        if len(phrases) < needed:
+            continue
+        offset = len(questions) % max(1, len(phrases) - needed + 1)
+        questions.append(template.format(*phrases[offset:offset + needed]))
+        if len(questions) == num_questions:
+            break
+    return questions + _GENERIC_QUESTIONS[:num_questions - len(questions)]
+
+# Stage, nominal duration in weeks, prerequisite stages, project progress column
+TIMELINE_STAGES = [
+    ('Problem Formulation', 2, [], 'problem_formulation_progress'),
+    ('Literature Review', 4, ['Problem Formulation'], 'literature_review_progress'),
+    ('Research Design', 3, ['Problem Formulation'], 'research_design_progress'),
+    ('Data Collection', 6, ['Literature Review', 'Research Design'], 'data_collection_progress'),
+    ('Data Analysis', 4, ['Data Collection'], 'analysis_progress'),
+    ('Report Writing', 4, ['Data Analysis'], 'reporting_progress')
+]
+
+def _critical_path_offsets():
+    """Forward/backward pass over the stage graph in nominal weeks.
+
+    Returns start and finish offsets as fractions of the whole plan, and
+    which stages have no slack (the critical path).
+    """
+    names = [stage for stage, _, _, _ in TIMELINE_STAGES]
+    durations = {stage: weeks for stage, weeks, _, _ in TIMELINE_STAGES}
+    depends = {stage: deps for stage, _, deps, _ in TIMELINE_STAGES}
+
+    earliest_start, earliest_finish = {}, {}
+    for stage in names:
+        earliest_start[stage] = max((earliest_finish[dep] for dep in depends[stage]), default=0)
+        earliest_finish[stage] = earliest_start[stage] + durations[stage]
+    total = max(earliest_finish.values())
+
+    latest_finish = {}
+    for stage in reversed(names):
+        successors = [s for s in names if stage in depends[s]]
+        latest_finish[stage] = min((latest_finish[s] - durations[s] for s in successors), default=total)
+
+    starts = np.array([earliest_start[stage] / total for stage in names])
+    finishes = np.array([earliest_finish[stage] / total for stage in names])
+    critical = np.array([latest_finish[stage] == earliest_finish[stage] for stage in names])
+    return starts, finishes, critical, total
+
+_STAGE_STARTS, _STAGE_FINISHES, _STAGE_CRITICAL, _PLAN_WEEKS = _critical_path_offsets()
+
+def create_research_timeline(start_date, end_date=None):
+    """Create a research timeline with concrete stage dates fitted to the project window"""
+    schedule = schedule_projects(pd.DataFrame([{'start_date': start_date, 'end_date': end_date}]))
+    return {
+        row['stage']: {
+            'start': row['start'].date(),
+            'end': row['finish'].date(),
+            'duration_days': (row['finish'] - row['start']).days,
+            'depends_on': deps,
+            'critical': row['critical']
+        }
+        for row, (_, _, deps, _) in zip(schedule.to_dict(orient="records"), TIMELINE_STAGES)
     }
-    return timeline
+
+def schedule_projects(projects, today=None):
+    """Schedule every stage of every project in one vectorized pass.
+
+    Stages are placed on the critical-path plan and stretched to each
+    project's start/end window (the nominal plan length when there is no
+    end date). Returns one row per project and stage, with overdue stages
+    being those that should have finished but are not complete.
+    """
+    today = pd.Timestamp(today or datetime.now().date())
+    n = len(projects)
+    if n == 0:
+        return pd.DataFrame(columns=[
+            'project_id', 'title', 'stage', 'start', 'finish', 'critical', 'progress', 'overdue'
+        ])
+
+    def column(name):
+        if name in projects:
+            return pd.to_datetime(projects[name], errors="coerce")
+        return pd.Series(pd.NaT, index=projects.index)
+
+    start = column('start_date').fillna(column('created_date')).fillna(today)
+    end = column('end_date')
+    nominal = pd.Timedelta(weeks=_PLAN_WEEKS)
+    window = (end - start).where(end > start, nominal).fillna(nominal)
+
+    start_ns = start.to_numpy(dtype="datetime64[ns]")[:, None]
+    window_ns = window.to_numpy(dtype="timedelta64[ns]").astype(np.int64)[:, None]
+    starts = start_ns + (window_ns * _STAGE_STARTS[None, :]).astype(np.int64).astype("timedelta64[ns]")
+    finishes = start_ns + (window_ns * _STAGE_FINISHES[None, :]).astype(np.int64).astype("timedelta64[ns]")
+
+    progress = np.column_stack([
+        pd.to_numeric(projects[progress_column], errors="coerce").fillna(0).to_numpy()
+        if progress_column in projects else np.zeros(n)
+        for _, _, _, progress_column in TIMELINE_STAGES
+    ])
+    overdue = (finishes < today.to_datetime64()) & (progress < 1)
+
+    stages = len(TIMELINE_STAGES)
+    ids = projects['id'].to_numpy() if 'id' in projects else np.arange(n)
+    titles = projects['title'].to_numpy() if 'title' in projects else ids
+    return pd.DataFrame({
+        'project_id': np.repeat(ids, stages),
+        'title': np.repeat(titles, stages),
+        'stage': np.tile([stage for stage, _, _, _ in TIMELINE_STAGES], n),
+        'start': starts.ravel(),
+        'finish': finishes.ravel(),
+        'critical': np.tile(_STAGE_CRITICAL, n),
+        'progress': progress.ravel(),
+        'overdue': overdue.ravel()
+    })
+
+def overdue_projects(schedule):
+    """Summarize overdue stages per project"""
+    overdue = schedule[schedule['overdue']]
+    return overdue.groupby(['project_id', 'title'], sort=False).agg(
+        overdue_stages=('stage', 'size'),
+        earliest_due=('finish', 'min')
+    ).reset_index()
+
+def timeline_figure(schedule, title="Research Timeline"):
+    """Gantt chart of a schedule; overdue stages in red, critical-path stages hatched"""
+    frame = schedule.assign(
+        status=np.where(schedule['overdue'], "Overdue", np.where(schedule['progress'] >= 1, "Done", "Planned")),
+        label=schedule['title'].astype(str) + " · " + schedule['stage']
+    )
+    fig = px.timeline(
+        frame,
+        x_start='start',
+        x_end='finish',
+        y='label',
+        color='status',
+        color_discrete_map={'Overdue': "#d62728", 'Done': "#2ca02c", 'Planned': "#1f77b4"},
+        pattern_shape='critical',
+        pattern_shape_map={True: "/", False: ""},
+        hover_data={'progress': ':.0%', 'critical': True, 'label': False},
+        title=title
+    )
+    fig.update_yaxes(autorange="reversed", title=None)
+    fig.add_vline(x=datetime.now(), line_dash="dash", line_color="gray")
+    fig.update_layout(height=max(300, 22 * len(frame)))
+    return fig
+
+# Effect size measure expected by each test
+POWER_TESTS = {
+    't-test': "Cohen's d",
+    'proportions': "Cohen's h",
+    'anova': "Cohen's f",
+    'correlation': "Correlation r"
+}
+
+# Bisection steps when solving for n; enough for samples up to 2**40
+_SOLVER_STEPS = 40
+
+def _z(alpha, two_sided=True):
+    return stats.norm.ppf(1 - alpha / 2) if two_sided else stats.norm.ppf(1 - alpha)
+
+def statistical_power(test, effect_size, n, alpha=0.05, groups=3):
+    """Power of a test for arrays of effect size, sample size and alpha (broadcast together).
+
+    `n` is the size of each group for t-tests and proportions, and the total
+    sample size for ANOVA and correlation.
+    """
+    effect_size, n, alpha = np.broadcast_arrays(
+        np.asarray(effect_size, dtype=float), np.asarray(n, dtype=float), np.asarray(alpha, dtype=float)
+    )
+    if test == 't-test':
+        df = 2 * n - 2
+        noncentrality = effect_size * np.sqrt(n / 2)
+        critical = stats.t.ppf(1 - alpha / 2, df)
+        return stats.nct.sf(critical, df, noncentrality) + stats.nct.cdf(-critical, df, noncentrality)
+    if test == 'proportions':
+        shift = np.abs(effect_size) * np.sqrt(n / 2)
+        z = _z(alpha)
+        return stats.norm.cdf(shift - z) + stats.norm.cdf(-shift - z)
+    if test == 'anova':
+        dfn, dfd = groups - 1, n - groups
+        critical = stats.f.ppf(1 - alpha, dfn, dfd)
+        return stats.ncf.sf(critical, dfn, dfd, effect_size ** 2 * n)
+    if test == 'correlation':
+        shift = np.arctanh(np.abs(effect_size)) * np.sqrt(np.maximum(n - 3, 0))
+        z = _z(alpha)
+        return stats.norm.cdf(shift - z) + stats.norm.cdf(-shift - z)
+    raise ValueError(f"Unsupported test: {test}")
+
+def _normal_sample_size(test, effect_size, alpha, power, groups):
+    """Closed-form normal approximation, used as the solver's starting bracket"""
+    z = _z(alpha) + stats.norm.ppf(power)
+    if test == 'correlation':
+        return (z / np.arctanh(np.abs(effect_size))) ** 2 + 3
+    if test == 'anova':
+        return (z / effect_size) ** 2 + groups
+    return 2 * (z / np.abs(effect_size)) ** 2
+
+def _solve_sample_size(test, effect_size, alpha, power, groups):
+    """Smallest n reaching the target power, by vectorized bisection over the whole grid"""
+    minimum = {'t-test': 2, 'proportions': 1, 'anova': groups + 1, 'correlation': 4}[test]
+    if test in ('proportions', 'correlation'):
+        # Exact inverse of the normal-based power (ignoring the far tail)
+        return np.maximum(np.ceil(_normal_sample_size(test, effect_size, alpha, power, groups)), minimum)
+
+    low = np.full(effect_size.shape, float(minimum - 1))
+    high = np.maximum(np.ceil(2 * _normal_sample_size(test, effect_size, alpha, power, groups)), minimum)
+    for _ in range(_SOLVER_STEPS):
+        short = statistical_power(test, effect_size, high, alpha, groups) < power
+        if not short.any():
+            break
+        high = np.where(short, high * 2, high)
+    for _ in range(_SOLVER_STEPS):
+        open_ = high - low > 1
+        if not open_.any():
+            break
+        middle = np.floor((low + high) / 2)
+        enough = statistical_power(test, effect_size, middle, alpha, groups) >= power
+        high = np.where(open_ & enough, middle, high)
+        low = np.where(open_ & ~enough, middle, low)
+    return high
+
+@lru_cache(maxsize=256)
+def _sample_size_grid(test, effect_sizes, alphas, powers, populations, groups):
+    effect_size, alpha, power, population = np.meshgrid(
+        np.array(effect_sizes, dtype=float),
+        np.array(alphas, dtype=float),
+        np.array(powers, dtype=float),
+        np.array(populations, dtype=float),
+        indexing="ij"
+    )
+    n = _solve_sample_size(test, effect_size, alpha, power, groups)
+    groups_in_n = 2 if test in ('t-test', 'proportions') else 1
+    total = n * groups_in_n
+    # Finite population correction; an infinite population leaves n unchanged
+    corrected = np.ceil(total / (1 + (total - 1) / population))
+    grid = pd.DataFrame({
+        'effect_size': effect_size.ravel(),
+        'alpha': alpha.ravel(),
+        'power': power.ravel(),
+        'population': population.ravel(),
+        'n_total': corrected.ravel().astype(int)
+    })
+    per_group = groups if test == 'anova' else groups_in_n
+    grid['n_per_group'] = np.ceil(grid['n_total'] / per_group).astype(int) if per_group > 1 else grid['n_total']
+    return grid
+
+def sample_size_grid(test, effect_sizes, alphas=(0.05,), powers=(0.8,), populations=(np.inf,), groups=3):
+    """Required sample sizes for every combination of effect size, alpha, power and population.
+
+    All combinations are solved at once with exact scipy.stats quantiles;
+    results are memoized, so repeated requests (e.g. slider reruns) are free.
+    """
+    if np.any(np.atleast_1d(effect_sizes) <= 0):
+        raise ValueError("Effect sizes must be positive")
+    if test == 'correlation' and np.any(np.atleast_1d(effect_sizes) >= 1):
+        raise ValueError("Correlations must be below 1")
+    grid = _sample_size_grid(
+        test,
+        tuple(np.atleast_1d(effect_sizes).tolist()),
+        tuple(np.atleast_1d(alphas).tolist()),
+        tuple(np.atleast_1d(powers).tolist()),
+        tuple(float(p) if p else np.inf for p in np.atleast_1d(populations).tolist()),
+        int(groups)
+    )
+    return grid.copy()
+
+@lru_cache(maxsize=256)
+def _power_curve(test, effect_sizes, alpha, max_n, groups):
+    minimum = {'t-test': 2, 'proportions': 1, 'anova': groups + 1, 'correlation': 4}[test]
+    n = np.unique(np.geomspace(minimum, max(max_n, minimum + 1), 200).round())
+    effect_size, n_grid = np.meshgrid(np.array(effect_sizes, dtype=float), n, indexing="ij")
+    power = statistical_power(test, effect_size, n_grid, alpha, groups)
+    return pd.DataFrame({'effect_size': effect_size.ravel(), 'n': n_grid.ravel(), 'power': power.ravel()})
+
+def power_curve(test, effect_sizes, alpha=0.05, max_n=500, groups=3):
+    """Power as a function of sample size for one or more effect sizes"""
+    return _power_curve(
+        test, tuple(np.atleast_1d(effect_sizes).tolist()), float(alpha), int(max_n), int(groups)
+    ).copy()
+
+def power_curve_figure(curve, target_power=None, title="Power curve"):
+    """Line chart of a power curve, with the target power marked"""
+    fig = px.line(
+        curve.assign(effect_size=curve['effect_size'].round(3).astype(str)),
+        x='n',
+        y='power',
+        color='effect_size',
+        labels={'n': "Sample size", 'power': "Power", 'effect_size': "Effect size"},
+        title=title
+    )
+    if target_power is not None:
+        fig.add_hline(y=target_power, line_dash="dash", line_color="gray")
+    fig.update_yaxes(range=[0, 1])
+    return fig
 
 def calculate_sample_size(confidence_level, margin_error, population_size=None):
-    """Calculate required sample size"""
-    # Basic sample size calculation
-    z_scores = {
-        0.90: 1.645,
-        0.95: 1.96,
-        0.99: 2.576
-    }
-    z = z_scores.get(confidence_level, 1.96)
-    
+    """Calculate required sample size to estimate a proportion.
+
+    Works on scalars or arrays; the z value is the exact normal quantile
+    for any confidence level.
+    """
+    z = stats.norm.ppf(1 - (1 - np.asarray(confidence_level, dtype=float)) / 2)
+    sample_size = (z ** 2 * 0.25) / (np.asarray(margin_error, dtype=float) ** 2)
     if population_size:
-        sample_size = (z**2 * 0.25 * population_size) / ((margin_error**2 * (population_size - 1)) + (z**2 * 0.25))
-    else:
-        sample_size = (z**2 * 0.25) / (margin_error**2)
-    
-    return round(sample_size)
+        population_size = np.asarray(population_size, dtype=float)
+        sample_size = (z ** 2 * 0.25 * population_size) / ((margin_error ** 2 * (population_size - 1)) + (z ** 2 * 0.25))
+
+    if np.ndim(sample_size) == 0:
+        return round(float(sample_size))
+    return np.round(sample_size).astype(int)
@@ -0,0 +1,130 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import threading
+
+from utils.storage import user_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "citation_style": "APA",
+    "date_format": "%Y-%m-%d",
+    "default_analysis_plots": ["histogram", "box"],
+    "auto_save": True,
+    "notifications": True
+}
+
+DEFAULT_PROFILE = {
+    "name": "",
+    "email": "",
+    "institution": "",
+    "research_interests": [],
+    "expertise": [],
+    "education": [],
+    "publications": []
+}
+
+# Seconds to wait for further saves before writing a document to disk
+WRITE_DELAY = 0.5
+
+# path -> document; every read after the first is served from here
+_cache = {}
+# path -> (document, timer) for writes that have not reached disk yet
+_pending = {}
+_lock = threading.Lock()
+
+
+def _read_document(path, defaults):
+    if path.exists():
+        try:
+            with open(path, "r") as f:
+                return {**defaults, **json.load(f)}
+        except Exception as e:
+            logger.error(f"Error reading {path}: {str(e)}", exc_info=True)
+    return copy.deepcopy(defaults)
+
+
+def _write_document(path):
+    """Atomically write the latest pending version of a document"""
+    with _lock:
+        pending = _pending.pop(path, None)
+    if pending is None:
+        return
+    try:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(pending[0], f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Error writing {path}: {str(e)}", exc_info=True)
+
+
+def _load(name, defaults, username):
+    path = user_file(name, username)
+    with _lock:
+        document = _cache.get(path)
+    if document is None:
+        document = _read_document(path, defaults)
+        with _lock:
+            document = _cache.setdefault(path, document)
+    return copy.deepcopy(document)
+
+
+def _save(name, document, username):
+    path = user_file(name, username)
+    document = copy.deepcopy(document)
+    timer = threading.Timer(WRITE_DELAY, _write_document, args=(path,))
+    timer.daemon = True
+    with _lock:
+        _cache[path] = document
+        previous = _pending.get(path)
+        if previous is not None:
+            previous[1].cancel()
+        _pending[path] = (document, timer)
+    timer.start()
+
+
+@atexit.register
+def flush():
+    """Write every pending document now"""
+    with _lock:
+        paths = list(_pending)
+    for path in paths:
+        with _lock:
+            pending = _pending.get(path)
+        if pending is not None:
+            pending[1].cancel()
+        _write_document(path)
+
+
+def load_settings(username=None):
+    """Return a copy of the user's settings"""
+    return _load("settings.json", DEFAULT_SETTINGS, username)
+
+
+def save_settings(settings, username=None):
+    """Update the user's settings; the file is written shortly afterwards"""
+    _save("settings.json", settings, username)
+
+
+def get_setting(key, default=None, username=None):
+    """Read one setting from the in-memory cache"""
+    path = user_file("settings.json", username)
+    with _lock:
+        settings = _cache.get(path)
+    if settings is None:
+        settings = load_settings(username)
+    return copy.deepcopy(settings.get(key, DEFAULT_SETTINGS.get(key, default)))
+
+
+def load_profile(username=None):
+    """Return a copy of the user's research profile"""
+    return _load("profile.json", DEFAULT_PROFILE, username)
+
+
+def save_profile(profile, username=None):
+    """Update the user's research profile; the file is written shortly afterwards"""
+    _save("profile.json", profile, username)
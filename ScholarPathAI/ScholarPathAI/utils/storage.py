@@ -1,49 +1,151 @@
 import pandas as pd
+import csv
 import json
+import re
+import shutil
+import uuid
 from pathlib import Path
 import os
 import logging
+from utils import dashboard, db_storage
+from utils.instrumentation import timed
 
 logger = logging.getLogger(__name__)
 
-def initialize_storage():
-    """Initialize storage directories and files"""
+USERS_DIR = Path("data/users")
+
+# Files that used to be shared by every user, keyed by their per-user name
+LEGACY_FILES = {
+    'projects.csv': Path("data/projects.csv"),
+    'citations.csv': Path("data/citations.csv"),
+    'profile.json': Path("data/profile.json"),
+    'settings.json': Path("data/settings.json")
+}
+
+# Directories that used to be shared, keyed by their per-user name
+LEGACY_DIRS = {
+    'reports': Path("data/reports"),
+    'analysis': Path("data/analysis")
+}
+
+# The user who inherits the legacy shared files; without it nothing is migrated
+LEGACY_OWNER = os.environ.get("SCHOLARPATH_LEGACY_OWNER")
+
+CITATION_COLUMNS = ['title', 'authors', 'year', 'journal', 'doi', 'project', 'project_id']
+
+
+def current_username():
+    """Return the logged-in user, or None outside a Streamlit session"""
+    try:
+        import streamlit as st
+        return st.session_state.get("username")
+    except Exception:
+        return None
+
+
+# Name used for data created outside a login; it cannot be registered
+ANONYMOUS_USER = "anonymous"
+
+
+def user_slug(username):
+    """Encode a username as a file name.
+
+    Bytes other than ASCII letters, digits, '_' and '-' are percent-encoded,
+    so distinct names never share a directory and '.'/'..' cannot escape it.
+    """
+    return "".join(
+        chr(byte) if chr(byte).isascii() and (chr(byte).isalnum() or chr(byte) in "_-") else f"%{byte:02X}"
+        for byte in (username or ANONYMOUS_USER).encode("utf-8")
+    )
+
+
+def validate_username(username):
+    """Return why a new username is not allowed, or None if it is"""
+    if not username or not username.strip():
+        return "Username cannot be empty"
+    if username != username.strip():
+        return "Username cannot start or end with spaces"
+    if username in (".", "..") or username.casefold() == ANONYMOUS_USER:
+        return f"'{username}' is a reserved name"
+    return None
+
+
+def user_data_dir(username=None):
+    """Return a user's data directory, creating and migrating it on first use"""
+    username = username or current_username()
+    path = USERS_DIR / user_slug(username)
+    if not path.exists():
+        path.mkdir(parents=True, exist_ok=True)
+        migrate_legacy_storage(username)
+    return path
+
+
+def user_file(name, username=None):
+    """Return the path of one of a user's data files"""
+    return user_data_dir(username) / name
+
+
+def projects_path(username=None):
+    """Legacy single-table projects file, migrated to per-project records on first use"""
+    return user_file("projects.csv", username)
+
+
+def projects_dir(username=None):
+    path = user_data_dir(username) / "projects"
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def citations_path(username=None):
+    return user_file("citations.csv", username)
+
+
+def migrate_legacy_storage(username):
+    """Copy the old shared data files into the directory of SCHOLARPATH_LEGACY_OWNER.
+
+    Other users, and every user when no owner is configured, start empty.
+    Legacy files are left in place.
+    """
+    if not LEGACY_OWNER or username != LEGACY_OWNER:
+        return
+    path = USERS_DIR / user_slug(username)
+    for name, legacy_path in LEGACY_FILES.items():
+        target = path / name
+        if target.exists() or not legacy_path.exists():
+            continue
+        try:
+            shutil.copyfile(legacy_path, target)
+            logger.info(f"Migrated {legacy_path} for {username}")
+        except Exception as e:
+            logger.error(f"Error migrating {legacy_path}: {str(e)}", exc_info=True)
+    for name, legacy_path in LEGACY_DIRS.items():
+        target = path / name
+        if target.exists() or not legacy_path.is_dir():
+            continue
+        try:
+            # Rendered-report caches are rebuilt on demand
+            shutil.copytree(legacy_path, target, ignore=shutil.ignore_patterns("artifacts"))
+            logger.info(f"Migrated {legacy_path} for {username}")
+        except Exception as e:
+            logger.error(f"Error migrating {legacy_path}: {str(e)}", exc_info=True)
+
+
+@timed("storage.initialize_storage")
+def initialize_storage(username=None):
+    """Initialize the current user's storage directory and files"""
     try:
         logger.info("Initializing storage directories...")
 
         # Create necessary directories
-        for directory in ["data", "data/projects", "data/citations", "data/reports"]:
+        for directory in ["data", str(USERS_DIR)]:
             Path(directory).mkdir(exist_ok=True, parents=True)
-            logger.info(f"Created directory: {directory}")
-
-        # Initialize projects database if not exists
-        if not Path("data/projects.csv").exists():
-            projects_df = pd.DataFrame({
-                'title': [],
-                'description': [],
-                'status': [],
-                'created_date': [],
-                'problem_formulation_progress': [],
-                'literature_review_progress': [],
-                'research_design_progress': [],
-                'data_collection_progress': [],
-                'analysis_progress': [],
-                'reporting_progress': []
-            })
-            projects_df.to_csv("data/projects.csv", index=False)
-            logger.info("Created projects database")
+
+        # Initialize projects index if not exists
+        _read_project_index(username)
 
         # Initialize citations database if not exists
-        if not Path("data/citations.csv").exists():
-            citations_df = pd.DataFrame({
-                'title': [],
-                'authors': [],
-                'year': [],
-                'journal': [],
-                'doi': [],
-                'project': []
-            })
-            citations_df.to_csv("data/citations.csv", index=False)
+        if not citations_path(username).exists():
+            pd.DataFrame(columns=CITATION_COLUMNS).to_csv(citations_path(username), index=False)
             logger.info("Created citations database")
 
         return True
@@ -51,48 +153,224 @@ def initialize_storage():
         logger.error(f"Error initializing storage: {str(e)}", exc_info=True)
         return False
 
-def load_projects():
-    """Load projects database"""
+def _write_json(path, data):
+    """Write JSON atomically so readers never see a partial file"""
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+def _new_project_id():
+    return uuid.uuid4().hex[:12]
+
+def _read_project_index(username=None):
+    """Return {project id: title}, migrating a legacy projects.csv the first time"""
+    index_path = projects_dir(username) / "index.json"
+    if index_path.exists():
+        with open(index_path, "r") as f:
+            return json.load(f)
+    index = _migrate_projects_csv(username)
+    _write_json(index_path, index)
+    return index
+
+def _write_project_index(index, username=None):
+    _write_json(projects_dir(username) / "index.json", index)
+
+def _migrate_projects_csv(username=None):
+    """Turn projects.csv rows into keyed records; blank titles become 'Untitled project'"""
+    path = projects_path(username)
+    if not path.exists():
+        return {}
+    index = {}
+    for record in pd.read_csv(path).to_dict(orient="records"):
+        record = {key: value for key, value in record.items() if not (isinstance(value, float) and pd.isna(value))}
+        record['id'] = _new_project_id()
+        if not str(record.get('title', "")).strip():
+            record['title'] = "Untitled project"
+        _write_json(projects_dir(username) / f"{record['id']}.json", record)
+        index[record['id']] = record['title']
+        # Analysis results were stored under the project title; only the user's own
+        # copy of them (see LEGACY_DIRS) is renamed
+        results_dir = user_data_dir(username) / "analysis"
+        legacy_results = results_dir / (re.sub(r"[^A-Za-z0-9]+", "_", record['title']).strip("_")[:60] or "project")
+        if legacy_results.exists() and not (results_dir / record['id']).exists():
+            legacy_results.rename(results_dir / record['id'])
+    path.rename(path.with_suffix(".csv.migrated"))
+
+    # Link existing citations to the new ids by project title
+    citations_file = citations_path(username)
+    if citations_file.exists():
+        citations = pd.read_csv(citations_file)
+        if 'project' in citations:
+            ids_by_title = {}
+            for project_id, title in index.items():
+                ids_by_title.setdefault(title, project_id)
+            citations['project_id'] = citations['project'].map(ids_by_title)
+            citations.to_csv(citations_file, index=False)
+    logger.info(f"Migrated {len(index)} projects to keyed records")
+    return index
+
+def list_projects(username=None):
+    """Return {project id: title} from the index without reading any project"""
     try:
-        if Path("data/projects.csv").exists():
-            return pd.read_csv("data/projects.csv")
-        logger.warning("Projects database not found, returning empty DataFrame")
-        return pd.DataFrame()
+        return _read_project_index(username)
+    except Exception as e:
+        logger.error(f"Error reading project index: {str(e)}", exc_info=True)
+        return {}
+
+@timed("storage.get_project")
+def get_project(project_id, username=None):
+    """Load one project record by id, or None"""
+    if not project_id:
+        return None
+    try:
+        with open(projects_dir(username) / f"{project_id}.json", "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Error loading project {project_id}: {str(e)}", exc_info=True)
+        return None
+
+@timed("storage.load_projects")
+def load_projects(username=None):
+    """Load all of the user's projects as a DataFrame with an 'id' column"""
+    try:
+        records = [get_project(project_id, username) for project_id in _read_project_index(username)]
+        records = [record for record in records if record is not None]
+        if not records:
+            return pd.DataFrame()
+        return pd.DataFrame.from_records(records)
     except Exception as e:
         logger.error(f"Error loading projects: {str(e)}", exc_info=True)
         return pd.DataFrame()
 
-def save_project(project_data):
-    """Save project to database"""
+@timed("storage.save_project")
+def save_project(project_data, username=None):
+    """Store a new project and return its id, or None on failure"""
     try:
-        projects = load_projects()
-        projects = pd.concat([projects, pd.DataFrame([project_data])], ignore_index=True)
-        projects.to_csv("data/projects.csv", index=False)
-        logger.info(f"Saved project: {project_data.get('title', 'Unknown')}")
-        return True
+        project = dict(project_data)
+        project['id'] = _new_project_id()
+        if not str(project.get('title') or "").strip():
+            project['title'] = "Untitled project"
+        _write_json(projects_dir(username) / f"{project['id']}.json", project)
+        index = _read_project_index(username)
+        index[project['id']] = project['title']
+        previous_state = db_storage.source_state(projects_dir(username) / "index.json")
+        _write_project_index(index, username)
+        dashboard.record_project(project, username)
+        db_storage.record_project(project, previous_state, username)
+        logger.info(f"Saved project: {project['title']}")
+        return project['id']
     except Exception as e:
         logger.error(f"Error saving project: {str(e)}", exc_info=True)
+        return None
+
+@timed("storage.update_project")
+def update_project(project_id, changes, username=None):
+    """Change fields of one project; only its record (and the index on a rename) is rewritten"""
+    try:
+        project = get_project(project_id, username)
+        if project is None:
+            return False
+        project.update(changes)
+        project['id'] = project_id
+        previous_state = db_storage.source_state(projects_dir(username) / "index.json")
+        _write_json(projects_dir(username) / f"{project_id}.json", project)
+        if 'title' in changes:
+            index = _read_project_index(username)
+            index[project_id] = project['title']
+            _write_project_index(index, username)
+        dashboard.record_project(project, username, created=False)
+        db_storage.record_project(project, previous_state, username)
+        return True
+    except Exception as e:
+        logger.error(f"Error updating project {project_id}: {str(e)}", exc_info=True)
+        return False
+
+@timed("storage.delete_project")
+def delete_project(project_id, username=None):
+    """Remove one project record; its citations are kept"""
+    try:
+        index = _read_project_index(username)
+        if index.pop(project_id, None) is None:
+            return False
+        previous_state = db_storage.source_state(projects_dir(username) / "index.json")
+        _write_project_index(index, username)
+        (projects_dir(username) / f"{project_id}.json").unlink(missing_ok=True)
+        dashboard.remove_project(project_id, username)
+        db_storage.remove_project(project_id, previous_state, username)
+        return True
+    except Exception as e:
+        logger.error(f"Error deleting project {project_id}: {str(e)}", exc_info=True)
         return False
 
-def load_citations():
-    """Load citations database"""
+@timed("storage.load_citations")
+def load_citations(username=None):
+    """Load the user's citations database"""
     try:
-        if Path("data/citations.csv").exists():
-            return pd.read_csv("data/citations.csv")
+        path = citations_path(username)
+        if path.exists():
+            return pd.read_csv(path)
         logger.warning("Citations database not found, returning empty DataFrame")
         return pd.DataFrame()
     except Exception as e:
         logger.error(f"Error loading citations: {str(e)}", exc_info=True)
         return pd.DataFrame()
 
-def save_citation(citation_data):
-    """Save citation to database"""
+def _csv_columns(path):
+    """Read a CSV file's header row"""
+    with open(path, "r", newline="") as f:
+        return next(csv.reader(f), [])
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+@timed("storage.save_citations_batch")
+def save_citations_batch(records, username=None):
+    """Append citation records to the user's database in one write.
+
+    The batch is serialized in memory and appended with a single write,
+    so existing rows are never re-read or rewritten; only a batch that
+    adds a new field rewrites the file.
+    """
     try:
-        citations = load_citations()
-        citations = pd.concat([citations, pd.DataFrame([citation_data])], ignore_index=True)
-        citations.to_csv("data/citations.csv", index=False)
-        logger.info(f"Saved citation: {citation_data.get('title', 'Unknown')}")
+        if not records:
+            return True
+        path = citations_path(username)
+        previous_state = db_storage.source_state(path)
+        batch = pd.DataFrame.from_records(records)
+        columns = _csv_columns(path) if path.exists() and path.stat().st_size else []
+        header = not columns
+        if header:
+            columns = CITATION_COLUMNS + [c for c in batch.columns if c not in CITATION_COLUMNS]
+
+        if any(c not in columns for c in batch.columns):
+            # A new field cannot be appended under the old header; rewrite once
+            citations = pd.concat([load_citations(username), batch], ignore_index=True)
+            citations.to_csv(path, index=False)
+        else:
+            text = batch.reindex(columns=columns).to_csv(index=False, header=header)
+            if not header and not _ends_with_newline(path):
+                text = "\n" + text
+            with open(path, "a", newline="") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+        dashboard.record_citations(records, username)
+        db_storage.record_citations(records, previous_state, username)
+        logger.info(f"Saved {len(batch)} citations")
         return True
     except Exception as e:
-        logger.error(f"Error saving citation: {str(e)}", exc_info=True)
-        return False
\ No newline at end of file
+        logger.error(f"Error saving citations: {str(e)}", exc_info=True)
+        return False
+
+@timed("storage.save_citation")
+def save_citation(citation_data, username=None):
+    """Save citation to the user's database"""
+    if save_citations_batch([citation_data], username):
+        logger.info(f"Saved citation: {citation_data.get('title', 'Unknown')}")
+        return True
+    return False